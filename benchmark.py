@@ -0,0 +1,407 @@
+"""
+Benchmarks for the analyzer, device layer and runner output pump
+Runs against synthetic data and the fake adb server, so no phone is needed.
+Results are written as JSON and compared against a baseline saved on the
+same machine, so a change that slows a hot path shows up as a regression.
+Timings differ between machines, so no baseline is committed: record one
+with --save-baseline before making changes
+
+Usage:
+    python benchmark.py                          # Small dataset, compare to baseline
+    python benchmark.py --scale large            # 1M users, 2 GB of logs
+    python benchmark.py --save-baseline          # Record this machine's baseline
+    python benchmark.py --only analyzer pump     # Some groups only
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+ROOT = Path(__file__).parent
+BASELINE_PATH = ROOT / "benchmark_baseline.json"
+DATA_DIR = Path(tempfile.gettempdir()) / "instabot_benchmark"
+
+# Users in interacted_users.json, sessions in sessions.json, bytes of logs
+SCALES = {
+    "small": {"users": 10_000, "sessions": 500, "log_bytes": 50 * 1024 ** 2},
+    "medium": {"users": 100_000, "sessions": 2_000, "log_bytes": 500 * 1024 ** 2},
+    "large": {"users": 1_000_000, "sessions": 10_000, "log_bytes": 2 * 1024 ** 3},
+}
+
+BENCH_ACCOUNT = "bench.account"
+DEVICE_SERIAL = "emulator-5554"
+PUMP_BYTES = 128 * 1024 ** 2
+SESSION_QUERIES = 1000
+
+# A result slower than the baseline by more than this fraction is a
+# regression, unless the difference is too small to be more than noise
+REGRESSION_THRESHOLD = 0.20
+REGRESSION_MIN_SECONDS = 0.002
+
+SOURCES = ["#python", "#django", "#devops", "@realpython", "@freecodecamp", "#kubernetes", "#aws"]
+
+
+def generate_interacted_users(path: Path, count: int, seed: int = 1):
+    """Write an interacted_users.json of `count` GramAddict-shaped records, streamed"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for i in range(count):
+            followed = rng.random() < 0.3
+            unfollowed = followed and rng.random() < 0.4
+            record = {
+                "last_interaction": (start + timedelta(seconds=i * 37)).strftime("%Y-%m-%d %H:%M:%S.%f"),
+                "following_status": "unfollowed" if unfollowed else ("following" if followed else "none"),
+                "followed": followed,
+                "unfollowed": unfollowed,
+                "liked": rng.choice((0, 1, 2, 2, 3)),
+                "watched": rng.choice((0, 0, 1, 2)),
+                "commented": int(rng.random() < 0.02),
+                "pm_sent": False,
+                "target": rng.choice(SOURCES),
+                "job_name": "hashtag-likers-top",
+                "session_id": f"session-{i // 40}",
+            }
+            f.write(("," if i else "") + json.dumps(f"user_{i:07d}") + ":" + json.dumps(record))
+        f.write("}")
+
+
+def generate_sessions(path: Path, count: int, seed: int = 1):
+    """Write a sessions.json of `count` sessions spread over the past months"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    sessions = []
+    for i in range(count):
+        started = now - timedelta(hours=(count - i) * 6, minutes=rng.randrange(60))
+        interactions = rng.randrange(20, 200)
+        sessions.append({
+            "id": f"session-{i}",
+            "start_time": started.strftime("%Y-%m-%d %H:%M:%S.%f"),
+            "finish_time": (started + timedelta(minutes=rng.randrange(20, 70))).strftime("%Y-%m-%d %H:%M:%S.%f"),
+            "total_interactions": interactions,
+            "successful_interactions": interactions // 5,
+            "total_likes": rng.randrange(10, 80),
+            "total_followed": rng.randrange(0, 25),
+            "total_unfollowed": rng.randrange(0, 10),
+            "total_watched": rng.randrange(0, 30),
+            "profile_data": {"followers": 1000 + i, "following": 800 + i // 2, "posts": 120},
+        })
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(sessions, f)
+
+
+def generate_log_block(rng: random.Random, lines: int = 20_000) -> bytes:
+    """A block of GramAddict-style log lines, mostly noise like a real session"""
+    out = []
+    for i in range(lines):
+        ts = f"[10/18 {9 + i // 3600 % 12:02d}:{i // 60 % 60:02d}:{i % 60:02d}]"
+        roll = rng.random()
+        user = f"user_{rng.randrange(1_000_000):07d}"
+        if roll < 0.05:
+            out.append(f"{ts} INFO | @{user}: interact")
+        elif roll < 0.07:
+            out.append(f"{ts} INFO | {rng.choice(('Private', 'Empty', 'Business'))} account.")
+        elif roll < 0.08:
+            out.append(f"{ts} INFO | @{user} - successful interaction")
+        elif roll < 0.085:
+            out.append(f"{ts} INFO | Followed @{user}")
+        elif roll < 0.09:
+            out.append(
+                f"{ts} INFO | Session progress: {i % 97} likes, {i % 13} watched, 0 commented, "
+                f"0 PM sent, {i % 31} followed"
+            )
+        else:
+            out.append(
+                f"{ts} DEBUG | Swipe from ({rng.randrange(1080)},{rng.randrange(1920)}) "
+                f"to ({rng.randrange(1080)},{rng.randrange(1920)}) in {rng.randrange(100, 400)}ms"
+            )
+    return ("\n".join(out) + "\n").encode("utf-8")
+
+
+def generate_log(path: Path, size: int, seed: int = 1):
+    """Write about `size` bytes of log by repeating a few random blocks"""
+    rng = random.Random(seed)
+    blocks = [generate_log_block(rng) for _ in range(4)]
+    written = 0
+    with open(path, "wb") as f:
+        while written < size:
+            block = blocks[written // len(blocks[0]) % len(blocks)]
+            f.write(block)
+            written += len(block)
+
+
+def prepare_data(data_dir: Path, scale: str) -> Path:
+    """Generate the dataset for a scale once; later runs reuse it"""
+    base = data_dir / scale
+    marker = base / "complete.json"
+    settings = SCALES[scale]
+    if marker.exists() and json.loads(marker.read_text()) == settings:
+        return base
+
+    account_dir = base / "accounts" / BENCH_ACCOUNT
+    account_dir.mkdir(parents=True, exist_ok=True)
+    (base / "logs").mkdir(exist_ok=True)
+
+    print(f"Generating {scale} dataset in {base}...")
+    started = time.perf_counter()
+    generate_interacted_users(account_dir / "interacted_users.json", settings["users"])
+    generate_sessions(account_dir / "sessions.json", settings["sessions"])
+    # GramAddict's rotation: the live log plus one older backup
+    generate_log(base / "logs" / f"{BENCH_ACCOUNT}.log.1", settings["log_bytes"] // 2, seed=2)
+    generate_log(base / "logs" / f"{BENCH_ACCOUNT}.log", settings["log_bytes"] - settings["log_bytes"] // 2)
+    marker.write_text(json.dumps(settings))
+    print(f"Generated in {time.perf_counter() - started:.1f}s")
+    return base
+
+
+def measure(func: Callable, repeat: int, setup: Optional[Callable] = None) -> dict:
+    """Best and median wall time of `repeat` calls"""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return {"seconds": round(min(times), 6), "median_seconds": round(statistics.median(times), 6), "runs": repeat}
+
+
+def throughput(result: dict, size: int) -> dict:
+    result["mb_per_s"] = round(size / 1_000_000 / result["seconds"], 1) if result["seconds"] else None
+    return result
+
+
+def per_call(result: dict, calls: int) -> dict:
+    result["per_call_ms"] = round(result["seconds"] / calls * 1000, 3)
+    return result
+
+
+def bench_analyzer(base: Path, repeat: int) -> dict:
+    from metrics_analyzer import MetricsAnalyzer
+
+    results = {}
+    log_bytes = sum(path.stat().st_size for path in (base / "logs").glob(f"{BENCH_ACCOUNT}.log*"))
+
+    results["analyzer.load_data"] = measure(lambda: MetricsAnalyzer(BENCH_ACCOUNT, base_path=base), repeat)
+    results["analyzer.load_data_streaming"] = measure(
+        lambda: MetricsAnalyzer(BENCH_ACCOUNT, streaming=True, base_path=base).get_account_stats(), repeat
+    )
+
+    # Loading happens in setup, so each getter is timed on a fresh analyzer
+    # and measures its first (uncached) call, not a cached lookup
+    fresh = {}
+
+    def new_analyzer():
+        fresh["analyzer"] = MetricsAnalyzer(BENCH_ACCOUNT, base_path=base)
+
+    results["analyzer.get_account_stats"] = measure(
+        lambda: fresh["analyzer"].get_account_stats(), repeat, setup=new_analyzer
+    )
+    # A windowed query is a bisect over the session index, so time a batch
+    # of windows to get above timer noise and the regression floor
+    windows = range(1, SESSION_QUERIES + 1)
+    results["analyzer.get_session_stats"] = per_call(measure(
+        lambda: [fresh["analyzer"].get_session_stats(days) for days in windows], repeat, setup=new_analyzer
+    ), SESSION_QUERIES)
+    results["analyzer.get_source_performance"] = measure(
+        lambda: fresh["analyzer"].get_source_performance(), repeat, setup=new_analyzer
+    )
+    analyzer = fresh["analyzer"]
+
+    results["analyzer.filter_full_scan"] = throughput(
+        measure(lambda: analyzer.get_filter_effectiveness(incremental=False), repeat), log_bytes
+    )
+    results["analyzer.filter_incremental_noop"] = measure(
+        lambda: analyzer.get_filter_effectiveness(incremental=True), repeat
+    )
+    return results
+
+
+def bench_device(repeat: int) -> dict:
+    from device_manager import AdbClient, DeviceManager, ShellSession
+    from fake_adb_server import FakeAdbServer
+
+    server = FakeAdbServer(devices={DEVICE_SERIAL: "device"}).start()
+    results = {}
+    try:
+        adb = AdbClient(port=server.port)
+        calls = 200
+
+        results["device.adb_devices_query"] = per_call(
+            measure(lambda: [adb.devices() for _ in range(calls)], repeat), calls
+        )
+
+        manager = DeviceManager(DEVICE_SERIAL, adb)
+        manager.is_device_connected()  # Starts the tracker once, outside the timing
+        results["device.is_device_connected"] = per_call(
+            measure(lambda: [manager.is_device_connected() for _ in range(calls)], repeat), calls
+        )
+
+        with ShellSession(DEVICE_SERIAL, adb) as shell:
+            results["device.shell_run"] = per_call(
+                measure(lambda: [shell.run("true") for _ in range(calls)], repeat), calls
+            )
+            results["device.shell_batch"] = per_call(measure(lambda: shell.batch(["true"] * calls), repeat), calls)
+    finally:
+        server.stop()
+    return results
+
+
+def bench_pump(base: Path, repeat: int) -> dict:
+    import runner
+    from log_rotation import close_rotating_log, get_rotating_log
+
+    results = {}
+    block = generate_log_block(random.Random(3))
+    logger = logging.getLogger("benchmark")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_path = os.path.join(temp_dir, "pump.log")
+
+        async def pump_in_memory():
+            # The pump alone: output handed over as fast as the reader takes it
+            reader = asyncio.StreamReader(limit=runner.PUMP_CHUNK_SIZE)
+
+            async def feed():
+                for _ in range(0, PUMP_BYTES, len(block)):
+                    reader.feed_data(block)
+                    await asyncio.sleep(0)
+                reader.feed_eof()
+
+            feeder = asyncio.create_task(feed())
+            await runner.pump_process_output(reader, log_path)
+            await feeder
+
+        def run_pump(rotate: bool):
+            if not rotate:
+                get_rotating_log(log_path).maxBytes = 0
+            asyncio.run(pump_in_memory())
+            close_rotating_log(log_path)
+
+        def clean():
+            for name in os.listdir(temp_dir):
+                os.unlink(os.path.join(temp_dir, name))
+
+        results["runner.pump_in_memory"] = throughput(measure(lambda: run_pump(False), repeat, clean), PUMP_BYTES)
+        # Same output with the log rotating and gzipping segments as it grows
+        results["runner.pump_rotating"] = throughput(measure(lambda: run_pump(True), repeat, clean), PUMP_BYTES)
+
+        # A real child writing a log through the pipe, as in a session
+        source = base / "logs" / f"{BENCH_ACCOUNT}.log"
+        cmd = [sys.executable, "-c",
+               "import shutil, sys; f = open(sys.argv[1], 'rb');"
+               "shutil.copyfileobj(f, sys.stdout.buffer, 1 << 20)", str(source)]
+
+        def run_child():
+            asyncio.run(runner.run_process(cmd, dict(os.environ), log_path, logger))
+            close_rotating_log(log_path)
+
+        results["runner.run_process_child"] = throughput(measure(run_child, repeat, clean), source.stat().st_size)
+    return results
+
+
+BENCHMARKS = {
+    "analyzer": bench_analyzer,
+    "device": lambda base, repeat: bench_device(repeat),
+    "pump": bench_pump,
+}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() or None
+
+
+def compare(results: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list[str]:
+    """Names of benchmarks slower than their baseline by more than threshold"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous.get("seconds"):
+            continue
+        change = result["seconds"] / previous["seconds"] - 1
+        result["vs_baseline"] = round(change, 3)
+        if change > threshold and result["seconds"] - previous["seconds"] > REGRESSION_MIN_SECONDS:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the analyzer, device layer and output pump")
+    parser.add_argument("--scale", choices=SCALES, default="small", help="Dataset size (default: small)")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="Benchmark groups to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the best is reported")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help="Where generated datasets are kept")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--output", type=Path, help="Also write the results JSON here")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Slowdown that counts as a regression (default: 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    base = prepare_data(args.data_dir, args.scale)
+    results = {}
+    for group in args.only or BENCHMARKS:
+        print(f"Running {group} benchmarks...")
+        results.update(BENCHMARKS[group](base, args.repeat))
+
+    baselines = {}
+    if args.baseline.exists():
+        baselines = json.loads(args.baseline.read_text())
+    baseline = baselines.get(args.scale, {}).get("results", {})
+    if not baseline and not args.save_baseline:
+        print(f"No {args.scale} baseline in {args.baseline}; run with --save-baseline to record one")
+    regressions = compare(results, baseline, args.threshold)
+
+    print(f"\n{'benchmark':<38} {'best':>10} {'median':>10} {'vs baseline':>12}")
+    for name, result in results.items():
+        change = result.get("vs_baseline")
+        marker = "  REGRESSION" if name in regressions else ""
+        change_text = f"{change:+.1%}" if change is not None else "-"
+        print(f"{name:<38} {result['seconds']:>9.4f}s {result['median_seconds']:>9.4f}s {change_text:>12}{marker}")
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "dataset": SCALES[args.scale],
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        # Keep other groups' baselines when only some groups were run
+        saved = {name: {k: v for k, v in result.items() if k != "vs_baseline"} for name, result in results.items()}
+        merged = {**baselines.get(args.scale, {}).get("results", {}), **saved}
+        baselines[args.scale] = {**report, "results": merged}
+        args.baseline.write_text(json.dumps(baselines, indent=2))
+        print(f"\n✓ Baseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
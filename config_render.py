@@ -0,0 +1,123 @@
+"""
+Render GramAddict configs with per-launch overrides (username, device, ...)
+Templates are parsed once per mtime and rendered configs are written to a
+content-addressed cache, so repeated and concurrent launches share files
+"""
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+ROOT = Path(__file__).parent
+CONFIG_CACHE_DIR = ROOT / ".cache" / "configs"
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+class ConfigTemplate:
+    """
+    A config file's text plus the line span of each top-level key
+
+    Spans come from yaml.compose, so overrides replace the existing entry
+    (including multi-line values) instead of adding a duplicate key that
+    the YAML loader may resolve either way.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        st = self.path.stat()
+        self.signature = (st.st_mtime_ns, st.st_size)
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.text = f.read()
+        self.lines = self.text.splitlines(keepends=True)
+        if self.lines and not self.lines[-1].endswith("\n"):
+            self.lines[-1] += "\n"
+
+        self.spans = {}
+        self._rendered = {}
+        self.first_key_line = len(self.lines)
+        root = yaml.compose(self.text)
+        if isinstance(root, yaml.MappingNode):
+            for key, value in root.value:
+                start = key.start_mark.line
+                # A value ending mid-line owns that line; block values end
+                # at column 0 of the line after them
+                end = max(value.end_mark.line + (1 if value.end_mark.column else 0), start + 1)
+                # Comments and blank lines after a block value stay in place
+                while end - 1 > start and self.lines[end - 1].strip()[:1] in ("", "#"):
+                    end -= 1
+                self.spans[key.value] = (start, end)
+                self.first_key_line = min(self.first_key_line, start)
+
+    def render(self, overrides: dict) -> str:
+        """Template text with each override replacing (or preceding) its top-level key"""
+        overrides = {key: value for key, value in overrides.items() if value is not None}
+        cache_key = repr(sorted(overrides.items()))
+        if cache_key not in self._rendered:
+            self._rendered[cache_key] = self._render(overrides)
+        return self._rendered[cache_key]
+
+    def _render(self, overrides: dict) -> str:
+        replacements = {}
+        prepended = []
+        for key, value in overrides.items():
+            entry = yaml.safe_dump({key: value}, default_flow_style=False, allow_unicode=True, sort_keys=False)
+            if key in self.spans:
+                replacements[self.spans[key][0]] = (self.spans[key][1], entry)
+            else:
+                prepended.append(entry)
+
+        out = self.lines[:self.first_key_line] + prepended
+        line = self.first_key_line
+        while line < len(self.lines):
+            if line in replacements:
+                end, entry = replacements[line]
+                out.append(entry)
+                line = end
+            else:
+                out.append(self.lines[line])
+                line += 1
+        return "".join(out)
+
+
+def load_template(path) -> ConfigTemplate:
+    """Parsed template, re-read only when the file's mtime or size changes"""
+    path = Path(path).resolve()
+    st = path.stat()
+    with _templates_lock:
+        template = _templates.get(path)
+        if template is None or template.signature != (st.st_mtime_ns, st.st_size):
+            template = _templates[path] = ConfigTemplate(path)
+        return template
+
+
+def render_config(path, overrides: dict, cache_dir: Optional[Path] = None) -> Path:
+    """
+    Render a config with overrides into the content-addressed cache
+
+    Args:
+        path: Template config file
+        overrides: Top-level keys to set; None values are skipped
+        cache_dir: Defaults to .cache/configs/ in the repo
+
+    Returns the path of the rendered file, named by the hash of its content.
+    Identical renders reuse one file, and files are written atomically, so
+    concurrent launches never see a partial config. Nothing needs cleanup.
+    """
+    text = load_template(path).render(overrides)
+    cache_dir = Path(cache_dir or CONFIG_CACHE_DIR)
+    rendered = cache_dir / f"{hashlib.sha256(text.encode('utf-8')).hexdigest()[:20]}.yml"
+    if rendered.exists():
+        return rendered
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    temp_path = rendered.with_name(f"{rendered.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp_path, rendered)
+    return rendered
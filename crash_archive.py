@@ -0,0 +1,399 @@
+"""
+Deduplicated archive of GramAddict crash artifacts
+Each crash zip (screenshot, view hierarchy, logs) is split into
+content-addressed, compressed objects under crashes/archive/objects/ and
+indexed in SQLite by stack-trace signature, so crashes can be counted and
+grouped without unzipping anything
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).parent
+CRASHES_PATH = ROOT / "crashes"
+ARCHIVE_PATH = CRASHES_PATH / "archive"
+
+# Already-compressed formats are stored as-is; gzip would only cost CPU
+RAW_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".gz", ".zip", ".mp4"}
+TEXT_SUFFIXES = {".log", ".txt", ".xml", ".json"}
+
+TRACEBACK_START = "Traceback (most recent call last):"
+FRAME_PATTERN = re.compile(r'^\s*File "(?P<file>[^"]+)", line \d+, in (?P<function>\S+)')
+
+
+def parse_traceback(text: str) -> Optional[dict]:
+    """
+    Signature of the last Python traceback in text
+
+    Line numbers, paths and the exception message vary between otherwise
+    identical crashes, so the signature only hashes the exception type and
+    the (file name, function) of every frame.
+
+    Returns {"signature", "exception", "top_frame", "message"} or None
+    """
+    start = text.rfind(TRACEBACK_START)
+    if start < 0:
+        return None
+
+    frames = []
+    for line in text[start + len(TRACEBACK_START):].splitlines()[1:]:
+        match = FRAME_PATTERN.match(line)
+        if match:
+            frames.append(f"{os.path.basename(match.group('file'))}:{match.group('function')}")
+            continue
+        if line.startswith((" ", "\t")) or not line.strip():
+            continue  # Source lines and carets under a frame
+
+        # The first unindented line after the frames names the exception
+        # (log prefixes such as "[12/02 19:53:32] ERROR | " are stripped)
+        line = line.split(" | ", 1)[-1].strip()
+        exception, _, message = line.partition(":")
+        signature = hashlib.sha1("\n".join([exception, *frames]).encode("utf-8")).hexdigest()[:16]
+        return {
+            "signature": signature,
+            "exception": exception.strip(),
+            "top_frame": frames[-1] if frames else None,
+            "message": message.strip()[:500],
+        }
+    return None
+
+
+class CrashArchive:
+    """Content-addressed object store plus a SQLite index of crashes"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS crashes (
+            id INTEGER PRIMARY KEY,
+            source TEXT NOT NULL,
+            source_sha256 TEXT NOT NULL UNIQUE,
+            crashed_at TEXT NOT NULL,
+            ingested_at TEXT NOT NULL,
+            signature TEXT,
+            exception TEXT,
+            top_frame TEXT,
+            message TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_crashes_signature ON crashes (signature, crashed_at);
+        CREATE INDEX IF NOT EXISTS idx_crashes_time ON crashes (crashed_at);
+        CREATE TABLE IF NOT EXISTS objects (
+            sha256 TEXT PRIMARY KEY,
+            encoding TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            stored_size INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS members (
+            crash_id INTEGER NOT NULL REFERENCES crashes (id),
+            name TEXT NOT NULL,
+            sha256 TEXT NOT NULL REFERENCES objects (sha256),
+            PRIMARY KEY (crash_id, name)
+        );
+    """
+
+    def __init__(self, path: Path = ARCHIVE_PATH):
+        self.path = Path(path)
+        self.objects_path = self.path / "objects"
+        self.db_path = self.path / "index.sqlite"
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path)
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+
+    def close(self):
+        """Close the database connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _object_path(self, sha256: str, encoding: str) -> Path:
+        return self.objects_path / sha256[:2] / (f"{sha256}.gz" if encoding == "gzip" else sha256)
+
+    def _store(self, name: str, sha256: str, data: bytes, pending: list) -> str:
+        """
+        Stage one member's bytes unless an identical object exists; returns its hash
+
+        The object is written to a temp file recorded in pending as
+        (temp_path, path); the caller moves it into place once the
+        transaction indexing it has committed, or removes it if it fails.
+        """
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM objects WHERE sha256 = ?", (sha256,)).fetchone():
+            return sha256
+
+        encoding = "raw" if Path(name).suffix.lower() in RAW_SUFFIXES else "gzip"
+        stored = gzip.compress(data, compresslevel=6) if encoding == "gzip" else data
+        path = self._object_path(sha256, encoding)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        pending.append((temp_path, path))
+        temp_path.write_bytes(stored)
+
+        conn.execute(
+            "INSERT INTO objects VALUES (?, ?, ?, ?)",
+            (sha256, encoding, len(data), len(stored)),
+        )
+        return sha256
+
+    def read_object(self, sha256: str) -> bytes:
+        """Original bytes of a stored object"""
+        row = self._connect().execute("SELECT encoding FROM objects WHERE sha256 = ?", (sha256,)).fetchone()
+        if row is None:
+            raise KeyError(sha256)
+        data = self._object_path(sha256, row[0]).read_bytes()
+        return gzip.decompress(data) if row[0] == "gzip" else data
+
+    @staticmethod
+    def _read_members(source: Path):
+        """(name, bytes) for every file in a crash zip or crash directory"""
+        if source.is_dir():
+            for path in sorted(source.rglob("*")):
+                if path.is_file():
+                    yield path.relative_to(source).as_posix(), path.read_bytes()
+            return
+
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    yield info.filename, archive.read(info)
+
+    def ingest(self, source: Path) -> Optional[dict]:
+        """
+        Archive one crash zip (or directory) and index its traceback
+
+        Returns the crash record, or None if this exact crash was ingested
+        before (or the zip is unreadable).
+        """
+        source = Path(source)
+        conn = self._connect()
+        members = {}
+        traceback_info = None
+        source_hash = hashlib.sha256()
+
+        try:
+            for name, data in self._read_members(source):
+                sha256 = hashlib.sha256(data).hexdigest()
+                source_hash.update(f"{name}\0{sha256}\n".encode("utf-8"))
+                members[name] = (sha256, data)
+        except (OSError, zipfile.BadZipFile):
+            return None
+
+        source_sha256 = source_hash.hexdigest()
+        if conn.execute("SELECT 1 FROM crashes WHERE source_sha256 = ?", (source_sha256,)).fetchone():
+            return None
+
+        for name, (_, data) in members.items():
+            if Path(name).suffix.lower() in TEXT_SUFFIXES:
+                found = parse_traceback(data.decode("utf-8", errors="replace"))
+                if found:
+                    traceback_info = found
+
+        traceback_info = traceback_info or {}
+        record = {
+            "source": source.name,
+            "source_sha256": source_sha256,
+            "crashed_at": datetime.fromtimestamp(source.stat().st_mtime).isoformat(timespec="seconds"),
+            "ingested_at": datetime.now().isoformat(timespec="seconds"),
+            "signature": traceback_info.get("signature"),
+            "exception": traceback_info.get("exception"),
+            "top_frame": traceback_info.get("top_frame"),
+            "message": traceback_info.get("message"),
+        }
+
+        # Objects only appear under objects/ once the rows referencing them
+        # are committed, so a failed insert leaves no orphaned files behind
+        pending = []
+        try:
+            with conn:
+                cursor = conn.execute(
+                    """
+                    INSERT INTO crashes (source, source_sha256, crashed_at, ingested_at, signature, exception, top_frame, message)
+                    VALUES (:source, :source_sha256, :crashed_at, :ingested_at, :signature, :exception, :top_frame, :message)
+                    """,
+                    record,
+                )
+                record["id"] = cursor.lastrowid
+                conn.executemany(
+                    "INSERT INTO members VALUES (?, ?, ?)",
+                    [
+                        (record["id"], name, self._store(name, sha256, data, pending))
+                        for name, (sha256, data) in members.items()
+                    ],
+                )
+        except BaseException:
+            for temp_path, _ in pending:
+                temp_path.unlink(missing_ok=True)
+            raise
+        for temp_path, path in pending:
+            os.replace(temp_path, path)
+        return record
+
+    def ingest_all(self, crashes_path: Path = CRASHES_PATH, remove: bool = False) -> list[dict]:
+        """
+        Ingest every crash zip in crashes_path (and crashes/latest)
+
+        Args:
+            remove: Delete zips once they are safely archived
+        """
+        crashes_path = Path(crashes_path)
+        sources = sorted(crashes_path.glob("*.zip"), key=lambda path: path.stat().st_mtime)
+        if (crashes_path / "latest").is_dir():
+            sources.append(crashes_path / "latest")
+
+        ingested = []
+        for source in sources:
+            record = self.ingest(source)
+            if record is not None:
+                ingested.append(record)
+            if remove and source.suffix == ".zip" and self.contains(source):
+                source.unlink()
+        return ingested
+
+    def contains(self, source: Path) -> bool:
+        """Whether source (a zip) is already archived"""
+        digest = hashlib.sha256()
+        try:
+            for name, data in self._read_members(Path(source)):
+                digest.update(f"{name}\0{hashlib.sha256(data).hexdigest()}\n".encode("utf-8"))
+        except (OSError, zipfile.BadZipFile):
+            return False
+        row = self._connect().execute(
+            "SELECT 1 FROM crashes WHERE source_sha256 = ?", (digest.hexdigest(),)
+        ).fetchone()
+        return row is not None
+
+    def count_signature(self, signature: str, days: int = 7) -> int:
+        """Crashes with this signature in the last `days` days"""
+        since = (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds")
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM crashes WHERE signature IS ? AND crashed_at >= ?",
+            (signature, since),
+        ).fetchone()[0]
+
+    def stats(self, days: int = 7) -> list[dict]:
+        """Crash counts per signature in the last `days` days, most frequent first"""
+        since = (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds")
+        rows = self._connect().execute(
+            """
+            SELECT signature, exception, top_frame, COUNT(*), MIN(crashed_at), MAX(crashed_at)
+            FROM crashes
+            WHERE crashed_at >= ?
+            GROUP BY signature
+            ORDER BY COUNT(*) DESC, MAX(crashed_at) DESC
+            """,
+            (since,),
+        ).fetchall()
+        return [
+            {
+                "signature": signature,
+                "exception": exception,
+                "top_frame": top_frame,
+                "count": count,
+                "first_seen": first_seen,
+                "last_seen": last_seen,
+            }
+            for signature, exception, top_frame, count, first_seen, last_seen in rows
+        ]
+
+    def storage(self) -> dict:
+        """Object store totals: original bytes referenced vs bytes on disk"""
+        conn = self._connect()
+        referenced = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(o.size), 0) FROM members m JOIN objects o USING (sha256)"
+        ).fetchone()
+        stored = conn.execute("SELECT COUNT(*), COALESCE(SUM(stored_size), 0) FROM objects").fetchone()
+        return {
+            "crashes": conn.execute("SELECT COUNT(*) FROM crashes").fetchone()[0],
+            "files": referenced[0],
+            "original_bytes": referenced[1],
+            "objects": stored[0],
+            "stored_bytes": stored[1],
+        }
+
+    def extract(self, crash_id: int, dest: Path) -> list[Path]:
+        """
+        Restore one crash's files into dest
+
+        Member names come from the crash zip, so any that would resolve
+        outside dest (absolute paths, "..") raise ValueError before anything
+        is written.
+        """
+        dest = Path(dest).resolve()
+        rows = self._connect().execute(
+            "SELECT name, sha256 FROM members WHERE crash_id = ?", (crash_id,)
+        ).fetchall()
+        targets = []
+        for name, sha256 in rows:
+            path = (dest / name).resolve()
+            if path == dest or not path.is_relative_to(dest):
+                raise ValueError(f"Crash #{crash_id} member {name!r} would be written outside {dest}")
+            targets.append((path, sha256))
+
+        written = []
+        for path, sha256 in targets:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(self.read_object(sha256))
+            written.append(path)
+        return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive and query GramAddict crash artifacts")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ingest = sub.add_parser("ingest", help="Archive crash zips (default: everything in crashes/)")
+    ingest.add_argument("paths", nargs="*", help="Crash zips or directories")
+    ingest.add_argument("--remove", action="store_true", help="Delete zips from crashes/ once archived")
+
+    stats = sub.add_parser("stats", help="Crash counts per stack-trace signature")
+    stats.add_argument("--days", type=int, default=7)
+
+    extract = sub.add_parser("extract", help="Restore a crash's files")
+    extract.add_argument("crash_id", type=int)
+    extract.add_argument("dest")
+
+    args = parser.parse_args()
+    archive = CrashArchive()
+
+    if args.command == "ingest":
+        if args.paths:
+            records = [record for record in map(archive.ingest, args.paths) if record]
+        else:
+            records = archive.ingest_all(remove=args.remove)
+        for record in records:
+            print(f"  #{record['id']} {record['source']}: {record['exception'] or 'no traceback'} [{record['signature']}]")
+        storage = archive.storage()
+        print(f"✓ Ingested {len(records)} crashes; archive holds {storage['crashes']} crashes, "
+              f"{storage['original_bytes'] / 1_000_000:.1f} MB in {storage['stored_bytes'] / 1_000_000:.1f} MB")
+
+    elif args.command == "stats":
+        rows = archive.stats(args.days)
+        print(f"\n💥 Crashes in the last {args.days} days ({sum(row['count'] for row in rows)} total):\n")
+        for row in rows:
+            print(f"  {row['count']:4d}x [{row['signature']}] {row['exception']} at {row['top_frame']}")
+            print(f"        first {row['first_seen']}, last {row['last_seen']}")
+
+    elif args.command == "extract":
+        try:
+            paths = archive.extract(args.crash_id, Path(args.dest))
+        except ValueError as exc:
+            print(f"✗ {exc}", file=sys.stderr)
+            return 1
+        for path in paths:
+            print(f"  {path}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,20 +2,550 @@
 Device Manager for Instagram Bot
 Handles both USB (physical) and network (emulator) device connections
 """
+import json
 import os
+import re
+import socket
 import subprocess
 import sys
+import threading
+import time
+from datetime import datetime
 from typing import Literal, Optional
 
 DeviceType = Literal["usb", "network"]
 
+ADB_SERVER_HOST = os.getenv("ANDROID_ADB_SERVER_ADDRESS", "127.0.0.1")
+ADB_SERVER_PORT = int(os.getenv("ANDROID_ADB_SERVER_PORT", "5037"))
+
+DEVICE_PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "devices")
+INSTAGRAM_PACKAGE = "com.instagram.android"
+
+# getprop keys kept in the device profile
+PROFILE_PROPS = {
+    "ro.product.manufacturer": "manufacturer",
+    "ro.product.model": "model",
+    "ro.build.version.release": "android",
+    "ro.build.version.sdk": "sdk",
+    "ro.product.cpu.abi": "abi",
+}
+
+# Cheap checks that decide whether a cached profile is still valid: the boot
+# id changes on reboot, the APK path and mtime on an Instagram upgrade.
+# `cmd package` answers without starting a JVM like `pm` does.
+PROFILE_KEY_COMMANDS = [
+    "cat /proc/sys/kernel/random/boot_id",
+    f"p=$( (cmd package path {INSTAGRAM_PACKAGE} 2>/dev/null || pm path {INSTAGRAM_PACKAGE}) | head -n 1); "
+    f"p=${{p#package:}}; echo \"$p $(stat -c %Y \"$p\" 2>/dev/null)\"",
+]
+PROFILE_COMMANDS = [
+    "wm size",
+    "wm density",
+    "getprop",
+    f"dumpsys package {INSTAGRAM_PACKAGE} | grep -E 'versionName=|versionCode=|lastUpdateTime='",
+]
+
+
+class AdbError(Exception):
+    """The adb server answered a request with FAIL"""
+
+
+class AdbClient:
+    """
+    Client for the adb server's smart-socket protocol (the one `adb` itself uses)
+
+    Requests are sent as a 4-digit hex length followed by the service name,
+    e.g. "000chost:version". The server answers OKAY or FAIL, and host
+    services then send a hex length-prefixed payload. Talking to the server
+    directly avoids forking an `adb` process for every query.
+
+    The server closes host-service connections after each reply, so sockets
+    cannot be reused across requests. What is pooled is the client itself
+    (see get_adb_client), together with a short memo of an unreachable
+    server so callers fall back to the subprocess path without retrying the
+    socket on every call.
+    """
+
+    UNAVAILABLE_BACKOFF = 5.0
+
+    def __init__(self, host: str = ADB_SERVER_HOST, port: int = ADB_SERVER_PORT, timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._unavailable_until = 0.0
+
+    def is_available(self) -> bool:
+        """False while a recent connection attempt to the server was refused"""
+        return time.monotonic() >= self._unavailable_until
+
+    def open(self, request: str) -> socket.socket:
+        """Open a connection, send a request and consume the OKAY status"""
+        if not self.is_available():
+            raise ConnectionRefusedError(f"adb server at {self.host}:{self.port} is unavailable")
+
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        except OSError:
+            self._unavailable_until = time.monotonic() + self.UNAVAILABLE_BACKOFF
+            raise
+
+        try:
+            self.send(sock, request)
+            self.read_status(sock)
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    @staticmethod
+    def send(sock: socket.socket, request: str):
+        payload = request.encode("utf-8")
+        sock.sendall(b"%04x" % len(payload) + payload)
+
+    @classmethod
+    def read_status(cls, sock: socket.socket):
+        status = cls.read_exactly(sock, 4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            raise AdbError(cls.read_payload(sock))
+        raise AdbError(f"Unexpected adb server status: {status!r}")
+
+    @classmethod
+    def read_payload(cls, sock: socket.socket) -> str:
+        length = int(cls.read_exactly(sock, 4), 16)
+        return cls.read_exactly(sock, length).decode("utf-8", errors="replace")
+
+    @staticmethod
+    def read_exactly(sock: socket.socket, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("adb server closed the connection")
+            data += chunk
+        return data
+
+    def query(self, request: str) -> str:
+        """Run a host service that replies with one length-prefixed payload"""
+        with self.open(request) as sock:
+            return self.read_payload(sock)
+
+    def version(self) -> int:
+        return int(self.query("host:version"), 16)
+
+    def devices(self) -> dict[str, str]:
+        """Map of serial -> state ("device", "offline", "unauthorized", ...)"""
+        return parse_device_list(self.query("host:devices"))
+
+    def connect(self, address: str) -> str:
+        return self.query(f"host:connect:{address}")
+
+    def disconnect(self, address: str) -> str:
+        return self.query(f"host:disconnect:{address}")
+
+    def transport(self, serial: str, service: str) -> socket.socket:
+        """Open a device service (e.g. "shell:...") on one device"""
+        sock = self.open(f"host:transport:{serial}")
+        try:
+            self.send(sock, service)
+            self.read_status(sock)
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+
+_adb_clients: dict[tuple[str, int], AdbClient] = {}
+
+
+def get_adb_client(host: str = ADB_SERVER_HOST, port: int = ADB_SERVER_PORT) -> AdbClient:
+    """Shared AdbClient per adb server address"""
+    key = (host, port)
+    if key not in _adb_clients:
+        _adb_clients[key] = AdbClient(host, port)
+    return _adb_clients[key]
+
+
+def parse_device_list(output: str) -> dict[str, str]:
+    """Parse `adb devices` / host:devices output into serial -> state"""
+    devices = {}
+    for line in output.splitlines():
+        if "\t" not in line:
+            continue  # Header, blank lines and daemon notices
+        serial, state = line.split("\t", 1)
+        devices[serial.strip()] = state.strip()
+    return devices
+
+
+class DeviceTracker:
+    """
+    In-memory device state table fed by the adb server's track-devices stream
+
+    One long-lived connection receives a fresh device list whenever any
+    device changes state, so lookups answer from memory with exact serial
+    matching, and callers can block on a state change instead of sleeping
+    and polling `adb devices`. The stream is reopened if the server restarts,
+    backing off exponentially while it stays unreachable.
+    """
+
+    RECONNECT_DELAY = 1.0
+    RECONNECT_MAX_DELAY = 60.0
+
+    def __init__(self, adb: Optional[AdbClient] = None):
+        self.adb = adb or get_adb_client()
+        self._devices: dict[str, str] = {}
+        self._synced = False
+        self._connect_failed = False
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._sock: Optional[socket.socket] = None
+        self._stopped = False
+
+    @property
+    def running(self) -> bool:
+        """True while the table mirrors a live track-devices stream"""
+        with self._condition:
+            return self._synced
+
+    def start(self, timeout: float = 2.0) -> bool:
+        """
+        Subscribe to track-devices and wait for the first device list
+
+        Returns False if the adb server is unreachable or did not answer in time
+        """
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._connect_failed = False
+                self._thread = threading.Thread(target=self._run, name="adb-track-devices", daemon=True)
+                self._thread.start()
+            self._condition.wait_for(lambda: self._synced or self._connect_failed, timeout)
+            return self._synced
+
+    def stop(self):
+        """Close the stream and stop the background thread"""
+        with self._condition:
+            self._stopped = True
+            self._synced = False
+            sock = self._sock
+            self._condition.notify_all()
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _run(self):
+        delay = self.RECONNECT_DELAY
+        while not self._stopped:
+            try:
+                sock = self.adb.open("host:track-devices")
+                sock.settimeout(None)
+                with self._condition:
+                    self._sock = sock
+                with sock:
+                    while not self._stopped:
+                        self._update(parse_device_list(AdbClient.read_payload(sock)))
+                        delay = self.RECONNECT_DELAY  # Streaming again; restart the back-off
+            except (OSError, AdbError, ValueError):
+                pass
+
+            with self._condition:
+                self._sock = None
+                self._synced = False
+                # Any failure (refused, FAIL reply, dropped stream) releases
+                # start() at once so callers fall back to `adb devices`
+                self._connect_failed = True
+                self._condition.notify_all()
+                self._condition.wait_for(lambda: self._stopped, delay)
+            delay = min(delay * 2, self.RECONNECT_MAX_DELAY)
+
+    def _update(self, devices: dict[str, str]):
+        with self._condition:
+            self._devices = devices
+            self._synced = True
+            self._connect_failed = False
+            self._condition.notify_all()
+
+    def devices(self) -> dict[str, str]:
+        """Snapshot of serial -> state"""
+        with self._condition:
+            return dict(self._devices)
+
+    def state(self, serial: str) -> Optional[str]:
+        """State of one device ("device", "offline", ...) or None if absent"""
+        with self._condition:
+            return self._devices.get(serial)
+
+    def wait_for(self, serial: str, state: Optional[str] = "device", timeout: float = 10.0) -> bool:
+        """
+        Block until a device reaches a state (None waits for it to disappear)
+
+        Returns True if the state was reached before the timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._synced and self._devices.get(serial) == state, timeout
+            )
+
+
+_device_trackers: dict[tuple[str, int], DeviceTracker] = {}
+
+
+def get_device_tracker(adb: Optional[AdbClient] = None) -> DeviceTracker:
+    """Shared DeviceTracker per adb server, started on first use"""
+    adb = adb or get_adb_client()
+    key = (adb.host, adb.port)
+    if key not in _device_trackers:
+        _device_trackers[key] = DeviceTracker(adb)
+    tracker = _device_trackers[key]
+    if not tracker.running:
+        tracker.start()
+    return tracker
+
+
+class ShellSession:
+    """
+    One long-lived `sh` on a device that runs many commands in turn
+
+    Commands are written to the shell's stdin, each followed by a printf of
+    a per-session sentinel and its exit status, so outputs can be split
+    apart while later commands are already queued. batch() sends a whole
+    routine at once and reads the answers back, costing one round trip
+    instead of one `adb` process per command.
+
+    The stream goes through the adb server's shell service; if the server
+    is unreachable, an `adb -s <serial> shell` process carries it instead.
+    Commands must not read stdin (it is redirected from /dev/null).
+    """
+
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, serial: str, adb: Optional[AdbClient] = None, timeout: float = 30.0):
+        self.serial = serial
+        self.adb = adb or get_adb_client()
+        self.timeout = timeout
+        self._token = os.urandom(6).hex()
+        self._counter = 0
+        self._buffer = b""
+        self._sock: Optional[socket.socket] = None
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._sock is not None or (self._proc is not None and self._proc.poll() is None)
+
+    def open(self):
+        """Start the device shell (reused until close() or the stream drops)"""
+        if self.is_open:
+            return
+        self._buffer = b""
+        try:
+            self._sock = self.adb.transport(self.serial, "shell:sh")
+            self._sock.settimeout(self.timeout)
+        except OSError:
+            self._proc = subprocess.Popen(
+                ["adb", "-s", self.serial, "shell"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=0,
+            )
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self._proc.kill()
+            self._proc = None
+
+    def __enter__(self) -> "ShellSession":
+        self.open()
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def run(self, command: str) -> tuple[int, str]:
+        """(exit status, output) of one command"""
+        return self.batch([command])[0]
+
+    def batch(self, commands: list[str]) -> list[tuple[int, str]]:
+        """Send all commands at once, then collect (exit status, output) for each"""
+        with self._lock:
+            try:
+                return self._batch(commands)
+            except (OSError, ConnectionError):
+                self.close()  # Leave no half-read output behind for the next caller
+                raise
+
+    def _batch(self, commands: list[str]) -> list[tuple[int, str]]:
+        self.open()
+        sentinels = []
+        script = []
+        for command in commands:
+            self._counter += 1
+            sentinel = f"__shell_{self._token}_{self._counter}__".encode()
+            sentinels.append(sentinel)
+            # The leading newline keeps the sentinel on its own line even
+            # when the output does not end with one
+            script.append(f"{{ {command}\n}} </dev/null 2>&1; printf '\\n%s %d\\n' {sentinel.decode()} $?\n")
+        self._write("".join(script).encode("utf-8"))
+        return [self._read_result(sentinel) for sentinel in sentinels]
+
+    def _write(self, data: bytes):
+        if self._sock is not None:
+            self._sock.sendall(data)
+        else:
+            self._proc.stdin.write(data)
+
+    def _recv(self) -> bytes:
+        if self._sock is not None:
+            return self._sock.recv(self.READ_SIZE)
+        return self._proc.stdout.read(self.READ_SIZE)
+
+    def _read_result(self, sentinel: bytes) -> tuple[int, str]:
+        marker = b"\n" + sentinel + b" "
+        searched = 0
+        while True:
+            index = self._buffer.find(marker, searched)
+            if index >= 0:
+                line_end = self._buffer.find(b"\n", index + len(marker))
+                if line_end >= 0:
+                    break
+            else:
+                # Only the tail could still hold the start of the marker
+                searched = max(0, len(self._buffer) - len(marker))
+            chunk = self._recv()
+            if not chunk:
+                raise ConnectionError(f"Shell on {self.serial} closed")
+            self._buffer += chunk
+
+        output = self._buffer[:index].decode("utf-8", errors="replace")
+        status = int(self._buffer[index + len(marker):line_end])
+        self._buffer = self._buffer[line_end + 1:]
+        return status, output
+
+
+_shell_sessions: dict[tuple[str, str, int], ShellSession] = {}
+_shell_sessions_lock = threading.Lock()
+
+
+def get_shell_session(serial: str, adb: Optional[AdbClient] = None) -> ShellSession:
+    """Shared ShellSession per device, opened on first command"""
+    adb = adb or get_adb_client()
+    key = (serial, adb.host, adb.port)
+    with _shell_sessions_lock:
+        if key not in _shell_sessions:
+            _shell_sessions[key] = ShellSession(serial, adb)
+        return _shell_sessions[key]
+
+
+def parse_device_profile(device_id: str, outputs: list[str]) -> dict:
+    """Build a device profile from the PROFILE_COMMANDS outputs"""
+    size_output, density_output, props_output, package_output = outputs
+
+    # An override (`wm size 720x1280`) is what apps actually get
+    sizes = re.findall(r"size: (\d+)x(\d+)", size_output)
+    densities = re.findall(r"density: (\d+)", density_output)
+    props = dict(re.findall(r"^\[([^\]]+)\]: \[(.*)\]$", props_output, re.MULTILINE))
+
+    profile = {"device_id": device_id}
+    profile["screen"] = {"width": int(sizes[-1][0]), "height": int(sizes[-1][1])} if sizes else None
+    profile["density"] = int(densities[-1]) if densities else None
+    for prop, field in PROFILE_PROPS.items():
+        profile[field] = props.get(prop)
+    if profile["sdk"] and profile["sdk"].isdigit():
+        profile["sdk"] = int(profile["sdk"])
+
+    version = re.search(r"versionName=(\S+)", package_output)
+    if version:
+        version_code = re.search(r"versionCode=(\d+)", package_output)
+        last_update = re.search(r"lastUpdateTime=(.+)", package_output)
+        profile["instagram"] = {
+            "version": version.group(1),
+            "version_code": int(version_code.group(1)) if version_code else None,
+            "last_update": last_update.group(1).strip() if last_update else None,
+        }
+    else:
+        profile["instagram"] = None
+    return profile
+
 
 class DeviceManager:
     """Manages ADB device connections for both USB and network devices"""
 
-    def __init__(self, device_id: str):
+    def __init__(self, device_id: str, adb: Optional[AdbClient] = None, tracker: Optional[DeviceTracker] = None):
         self.device_id = device_id
         self.device_type = self.detect_device_type(device_id)
+        self.adb = adb or get_adb_client()
+        self._tracker = tracker
+        self._profile: Optional[dict] = None
+
+    @property
+    def tracker(self) -> DeviceTracker:
+        """Device tracker for this adb server (shared unless one was passed in)"""
+        if self._tracker is None:
+            self._tracker = get_device_tracker(self.adb)
+        elif not self._tracker.running:
+            self._tracker.start()
+        return self._tracker
+
+    def shell(self) -> ShellSession:
+        """The device's shared persistent shell"""
+        return get_shell_session(self.device_id, self.adb)
+
+    @property
+    def profile_path(self) -> str:
+        return os.path.join(DEVICE_PROFILE_DIR, re.sub(r"[^\w.-]", "_", self.device_id) + ".json")
+
+    def get_profile(self, refresh: bool = False) -> dict:
+        """
+        Screen size, density, build props and Instagram version of the device
+
+        Cached in .cache/devices/<device>.json and reused until the device
+        reboots or Instagram is reinstalled or upgraded, so checking it costs
+        one round trip of two cheap shell commands. A rebuild queries wm,
+        getprop and dumpsys in one batch on the device's persistent shell.
+        Raises OSError if the device shell cannot be reached.
+        """
+        shell = self.shell()
+        boot_id, apk = (output.strip() for _, output in shell.batch(PROFILE_KEY_COMMANDS))
+        key = {"boot_id": boot_id, "instagram_apk": apk}
+
+        if not refresh:
+            if self._profile is not None and self._profile.get("key") == key:
+                return self._profile
+            try:
+                with open(self.profile_path, "r", encoding="utf-8") as f:
+                    cached = json.load(f)
+                if cached.get("key") == key:
+                    self._profile = cached
+                    return cached
+            except (OSError, ValueError, AttributeError):
+                pass
+
+        profile = parse_device_profile(self.device_id, [output for _, output in shell.batch(PROFILE_COMMANDS)])
+        profile["key"] = key
+        profile["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        self._profile = profile
+
+        os.makedirs(DEVICE_PROFILE_DIR, exist_ok=True)
+        temp_path = f"{self.profile_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(profile, f, indent=2)
+            os.replace(temp_path, self.profile_path)
+        except OSError:
+            pass  # Only the cache is lost; the profile itself is fine
+        return profile
 
     @staticmethod
     def detect_device_type(device_id: str) -> DeviceType:
@@ -51,14 +581,31 @@ class DeviceManager:
         # For network devices, attempt connection
         if self.device_type == "network":
             log(f"Network device {self.device_id} not found, attempting connection...")
-            return self.connect_network_device(logger)
+            if not self.connect_network_device(logger):
+                return False
+            # adb reports "connected" before the device is usable
+            if self.tracker.running and not self.tracker.wait_for(self.device_id, timeout=10):
+                log(f"Device {self.device_id} did not come online "
+                    f"(state: {self.tracker.state(self.device_id)})", "ERROR")
+                return False
+            return True
 
         # For USB devices, can't auto-connect
         log(f"USB device {self.device_id} not found. Please check USB connection.", "ERROR")
         return False
 
     def is_device_connected(self) -> bool:
-        """Check if device is in adb devices list"""
+        """Check if device is in adb devices list and online (exact serial match)"""
+        if self.tracker.running:
+            return self.tracker.state(self.device_id) == "device"
+
+        try:
+            return self.adb.devices().get(self.device_id) == "device"
+        except OSError:
+            pass  # adb server not running yet; `adb devices` starts it
+        except AdbError:
+            return False
+
         try:
             result = subprocess.run(
                 ["adb", "devices"],
@@ -66,7 +613,7 @@ class DeviceManager:
                 text=True,
                 timeout=10
             )
-            return self.device_id in result.stdout
+            return parse_device_list(result.stdout).get(self.device_id) == "device"
         except Exception:
             return False
 
@@ -80,18 +627,22 @@ class DeviceManager:
 
         try:
             log(f"Connecting to network device: {self.device_id}")
-            result = subprocess.run(
-                ["adb", "connect", self.device_id],
-                capture_output=True,
-                text=True,
-                timeout=15
-            )
-
-            if "connected" in result.stdout.lower() or "already connected" in result.stdout.lower():
+            try:
+                output = self.adb.connect(self.device_id)
+            except OSError:
+                result = subprocess.run(
+                    ["adb", "connect", self.device_id],
+                    capture_output=True,
+                    text=True,
+                    timeout=15
+                )
+                output = result.stdout
+
+            if "connected" in output.lower() or "already connected" in output.lower():
                 log(f"Successfully connected to {self.device_id}")
                 return True
             else:
-                log(f"Failed to connect: {result.stdout.strip()}", "ERROR")
+                log(f"Failed to connect: {output.strip()}", "ERROR")
                 return False
 
         except subprocess.TimeoutExpired:
@@ -114,13 +665,17 @@ class DeviceManager:
 
         try:
             log(f"Disconnecting network device: {self.device_id}")
-            result = subprocess.run(
-                ["adb", "disconnect", self.device_id],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            log(f"Disconnect result: {result.stdout.strip()}")
+            try:
+                output = self.adb.disconnect(self.device_id)
+            except OSError:
+                result = subprocess.run(
+                    ["adb", "disconnect", self.device_id],
+                    capture_output=True,
+                    text=True,
+                    timeout=10
+                )
+                output = result.stdout
+            log(f"Disconnect result: {output.strip()}")
             return True
         except Exception as e:
             log(f"Error disconnecting device: {e}", "WARNING")
@@ -132,6 +687,17 @@ class DeviceManager:
         List all connected devices with their types
         Returns list of (device_id, device_type) tuples
         """
+        try:
+            return [
+                (device_id, DeviceManager.detect_device_type(device_id))
+                for device_id, state in get_adb_client().devices().items()
+                if state == "device"
+            ]
+        except OSError:
+            pass
+        except AdbError:
+            return []
+
         try:
             result = subprocess.run(
                 ["adb", "devices"],
@@ -154,6 +720,12 @@ class DeviceManager:
     @staticmethod
     def check_adb_available() -> bool:
         """Check if ADB is installed and accessible"""
+        try:
+            get_adb_client().version()
+            return True
+        except (OSError, AdbError, ValueError):
+            pass
+
         try:
             result = subprocess.run(
                 ["adb", "version"],
@@ -2,72 +2,440 @@
 """
 Dismiss Instagram banners/notifications that break GramAddict.
 Run this before running the bot if you see crashes.
+Pass --profile-startup to report import and pre-flight costs.
+
+Buttons are found in the UI hierarchy (uiautomator dump) by resource-id and
+text, so taps land on any screen resolution. Known banners are listed in
+DEFAULT_BANNERS; add your own in accounts/banners.yml (same fields).
+Check the matching against saved dumps with --from-xml, without a device;
+--self-test checks it against the dumps in docs/fixtures.
 """
 
+import startup_profile  # First, so --profile-startup can time the imports below
+
+import argparse
 import os
-import subprocess
+import re
 import sys
+import time
+import xml.etree.ElementTree as ElementTree
+from typing import Callable, Optional
+
 from dotenv import load_dotenv
 
-load_dotenv(override=True)
+from device_manager import AdbError, DeviceManager, ShellSession, get_shell_session
+
+with startup_profile.step("load .env"):
+    load_dotenv(override=True)
 
+ROOT = os.path.abspath(os.path.dirname(__file__))
 DEVICE = os.getenv("DEVICE", "127.0.0.1:5555")
+BANNERS_PATH = os.path.join(ROOT, "accounts", "banners.yml")
+
+INSTAGRAM_ACTIVITY = "com.instagram.android/com.instagram.mainactivity.MainActivity"
+
+# The profile tab, and what shows the profile has finished loading
+PROFILE_TAB = {"ids": ["profile_tab"], "labels": ["Profile"]}
+# Where the profile tab sat on the 1080x1920 layout this script was written
+# for; scaled to the device's screen when the hierarchy does not show the tab
+REFERENCE_SCREEN = (1080, 1920)
+FALLBACK_PROFILE_TAB = (736, 1420)
+PROFILE_READY = {"ids": ["row_profile_header", "profile_header_container", "action_bar_title"]}
+
+# Each banner is recognised by any of its ids/labels; its dismiss button is
+# the dismiss-ids/dismiss-labels node closest to it. Ids match with or
+# without the "com.instagram.android:id/" prefix; labels match text or
+# content-desc, ignoring case.
+DEFAULT_BANNERS = [
+    {
+        "name": "Professional dashboard",
+        "labels": ["Professional dashboard"],
+        "dismiss-ids": ["dismiss_button", "igds_banner_dismiss_button", "close_button"],
+        "dismiss-labels": ["Dismiss", "Close"],
+    },
+    {
+        "name": "Turn on notifications",
+        "labels": ["Turn on notifications"],
+        "dismiss-labels": ["Not Now"],
+    },
+    {
+        "name": "Save login info",
+        "labels": ["Save your login info?"],
+        "dismiss-labels": ["Not now", "Not Now"],
+    },
+    {
+        "name": "Contacts sync",
+        "labels": ["Find people you know", "Connect contacts"],
+        "dismiss-labels": ["Not now", "Skip"],
+    },
+]
+
+# Where uiautomator writes each dump on the device before it is read back
+DUMP_PATH = "/sdcard/window_dump.xml"
+
+# Poll the hierarchy quickly at first, backing off while the app is still loading
+POLL_INITIAL = 0.2
+POLL_MAX = 1.0
+POLL_BACKOFF = 1.5
+MAX_TAPS_PER_BANNER = 2
+
+# Saved uiautomator dumps and the button each must resolve to (--self-test)
+FIXTURES_DIR = os.path.join(ROOT, "docs", "fixtures")
+FIXTURE_EXPECTATIONS = {
+    "profile_dashboard_banner.xml": {"Professional dashboard": (993, 767)},
+    "feed_notifications_prompt.xml": {"Turn on notifications": (360, 815)},
+    "profile_ready.xml": {},
+}
+
+BOUNDS_PATTERN = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+
+
+class UiNode:
+    """One node of a uiautomator dump"""
+
+    __slots__ = ("resource_id", "text", "description", "bounds")
+
+    def __init__(self, resource_id: str, text: str, description: str, bounds: tuple[int, int, int, int]):
+        self.resource_id = resource_id
+        self.text = text
+        self.description = description
+        self.bounds = bounds
+
+    @property
+    def center(self) -> tuple[int, int]:
+        x1, y1, x2, y2 = self.bounds
+        return (x1 + x2) // 2, (y1 + y2) // 2
+
+    def __repr__(self):
+        label = self.text or self.description or self.resource_id
+        return f"<UiNode {label!r} {self.bounds}>"
+
+
+class UiHierarchy:
+    """
+    A parsed dump with nodes indexed by resource-id and by label
+
+    Lookups are dictionary hits, so checking a screen against every known
+    banner costs one parse no matter how many banners are configured.
+    """
+
+    def __init__(self, xml_text: str):
+        self.by_id: dict[str, list[UiNode]] = {}
+        self.by_label: dict[str, list[UiNode]] = {}
+        self.size = 0
+
+        # Ignore anything printed around the XML itself
+        start, end = xml_text.find("<"), xml_text.rfind(">")
+        if start < 0:
+            return
+        root = ElementTree.fromstring(xml_text[start:end + 1])
+        for element in root.iter("node"):
+            match = BOUNDS_PATTERN.fullmatch(element.get("bounds", ""))
+            if not match:
+                continue
+            node = UiNode(
+                element.get("resource-id", ""),
+                element.get("text", ""),
+                element.get("content-desc", ""),
+                tuple(int(value) for value in match.groups()),
+            )
+            self.size += 1
+            if node.resource_id:
+                self.by_id.setdefault(node.resource_id, []).append(node)
+                short_id = node.resource_id.rpartition(":id/")[2]
+                if short_id != node.resource_id:
+                    self.by_id.setdefault(short_id, []).append(node)
+            for label in {node.text.strip().lower(), node.description.strip().lower()} - {""}:
+                self.by_label.setdefault(label, []).append(node)
+
+    @classmethod
+    def from_file(cls, path: str) -> "UiHierarchy":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(f.read())
+
+    def find(self, ids=(), labels=()) -> list[UiNode]:
+        """Nodes with any of the resource-ids or labels"""
+        nodes = []
+        for resource_id in ids:
+            nodes.extend(self.by_id.get(resource_id, ()))
+        for label in labels:
+            nodes.extend(self.by_label.get(label.lower(), ()))
+        return nodes
+
+    def find_one(self, spec: dict) -> Optional[UiNode]:
+        nodes = self.find(spec.get("ids", ()), spec.get("labels", ()))
+        return nodes[0] if nodes else None
+
+
+def load_banners(path: str = BANNERS_PATH) -> list[dict]:
+    """DEFAULT_BANNERS plus any listed in accounts/banners.yml"""
+    banners = list(DEFAULT_BANNERS)
+    if os.path.exists(path):
+        import yaml  # Only needed when custom banners are configured
+
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                custom = yaml.safe_load(f) or []
+            except yaml.YAMLError as e:
+                raise ValueError(f"{path}: {e}") from None
+        for index, banner in enumerate(custom, start=1):
+            if not isinstance(banner, dict):
+                raise ValueError(f"{path}: banner #{index} is not a mapping")
+            if not (banner.get("ids") or banner.get("labels")):
+                raise ValueError(f"{path}: banner #{index} needs ids or labels")
+            if not (banner.get("dismiss-ids") or banner.get("dismiss-labels")):
+                raise ValueError(f"{path}: banner #{index} needs dismiss-ids or dismiss-labels")
+            banners.append({"name": f"banner #{index}", **banner})
+    return banners
+
+
+def find_banners(hierarchy: UiHierarchy, banners: list[dict]) -> list[tuple[dict, UiNode]]:
+    """(banner, dismiss button) for every known banner on screen"""
+    found = []
+    for banner in banners:
+        anchors = hierarchy.find(banner.get("ids", ()), banner.get("labels", ()))
+        if not anchors:
+            continue
+        buttons = hierarchy.find(banner.get("dismiss-ids", ()), banner.get("dismiss-labels", ()))
+        if not buttons:
+            continue
+        # The button belonging to this banner is the one nearest to it
+        ax, ay = anchors[0].center
+        button = min(buttons, key=lambda node: abs(node.center[1] - ay) * 4 + abs(node.center[0] - ax))
+        found.append((banner, button))
+    return found
 
 
-def run_adb_command(cmd: list[str]) -> str:
-    """Run ADB command and return output."""
-    result = subprocess.run(
-        ["adb", "-s", DEVICE] + cmd,
-        capture_output=True,
-        text=True,
-        check=False,
+def scale_point(point: tuple[int, int], screen: dict) -> tuple[int, int]:
+    """Map a REFERENCE_SCREEN coordinate onto a device profile's screen"""
+    return (
+        round(point[0] * screen["width"] / REFERENCE_SCREEN[0]),
+        round(point[1] * screen["height"] / REFERENCE_SCREEN[1]),
     )
-    return result.stdout + result.stderr
 
 
-def tap_coordinates(x: int, y: int):
-    """Tap at specific screen coordinates."""
-    print(f"Tapping at ({x}, {y})...")
-    run_adb_command(["shell", "input", "tap", str(x), str(y)])
+def device_shell() -> ShellSession:
+    """The device's persistent shell; every command below reuses it"""
+    return get_shell_session(DEVICE)
 
 
-def dismiss_professional_dashboard():
-    """Dismiss the 'Professional dashboard' banner by tapping the dismiss button."""
+def dump_hierarchy() -> UiHierarchy:
+    """
+    Current screen's UI hierarchy
+
+    The shell session has no terminal, so uiautomator dumps to a file on
+    the device that the same command cats back; one round trip per poll.
+    """
+    status, output = device_shell().run(f"uiautomator dump {DUMP_PATH} >/dev/null 2>&1 && cat {DUMP_PATH}")
+    if status != 0 or "<hierarchy" not in output:
+        return UiHierarchy("")  # Dump failed (e.g. screen idle check timed out); the next poll retries
+    try:
+        return UiHierarchy(output)
+    except ElementTree.ParseError:
+        return UiHierarchy("")  # Screen changed mid-dump; the next poll retries
+
+
+def tap_nodes(nodes: list[UiNode]):
+    """Tap the center of each node, sent to the device as one batch."""
+    for node in nodes:
+        print(f"Tapping {node} at {node.center}...")
+    device_shell().batch([f"input tap {node.center[0]} {node.center[1]}" for node in nodes])
+
+
+def wait_for(
+    condition: Callable[[UiHierarchy], Optional[UiNode]],
+    timeout: float,
+    dump: Callable[[], UiHierarchy] = dump_hierarchy,
+):
+    """Poll the hierarchy with growing waits until condition returns a node"""
+    deadline = time.monotonic() + timeout
+    interval = POLL_INITIAL
+    while True:
+        hierarchy = dump()
+        node = condition(hierarchy)
+        if node is not None or time.monotonic() >= deadline:
+            return node, hierarchy
+        time.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+        interval = min(interval * POLL_BACKOFF, POLL_MAX)
+
+
+def dismiss_known_banners(
+    banners: list[dict],
+    timeout: float = 8.0,
+    dump: Callable[[], UiHierarchy] = dump_hierarchy,
+    tap: Callable[[list[UiNode]], None] = tap_nodes,
+) -> list[str]:
+    """
+    Dismiss every known banner until the screen is ready and clear
+
+    Each dump is checked against all banners in one pass. Polling stops
+    once the profile has loaded and no banner is left, or at the timeout.
+    """
+    dismissed = []
+    taps = {}
+
+    def banner_or_ready(hierarchy: UiHierarchy):
+        for banner, button in find_banners(hierarchy, banners):
+            if taps.get(banner["name"], 0) < MAX_TAPS_PER_BANNER:
+                return button
+        return hierarchy.find_one(PROFILE_READY)
+
+    deadline = time.monotonic() + timeout
+    while True:
+        node, hierarchy = wait_for(banner_or_ready, max(0.0, deadline - time.monotonic()), dump)
+        pending = [
+            (banner, button) for banner, button in find_banners(hierarchy, banners)
+            if taps.get(banner["name"], 0) < MAX_TAPS_PER_BANNER
+        ]
+        if not pending:
+            return dismissed
+        for banner, _ in pending:
+            print(f"Dismissing {banner['name']} banner...")
+            taps[banner["name"]] = taps.get(banner["name"], 0) + 1
+            if banner["name"] not in dismissed:
+                dismissed.append(banner["name"])
+        tap([button for _, button in pending])
+        if time.monotonic() >= deadline:
+            return dismissed
+
+
+def dismiss_professional_dashboard(banners: list[dict], profile: dict, timeout: float = 15.0) -> bool:
+    """Open the profile and dismiss the banners shown there."""
+    if profile.get("instagram") is None:
+        print("ERROR: Instagram is not installed on this device.")
+        return False
+
     print("Opening Instagram...")
-    run_adb_command(["shell", "am", "start", "-n", "com.instagram.android/com.instagram.mainactivity.MainActivity"])
+    device_shell().run(f"am start -n {INSTAGRAM_ACTIVITY}")
+
+    profile_tab, _ = wait_for(lambda hierarchy: hierarchy.find_one(PROFILE_TAB), timeout)
+    if profile_tab is not None:
+        print("Navigating to profile...")
+        tap_nodes([profile_tab])
+    elif profile.get("screen"):
+        x, y = scale_point(FALLBACK_PROFILE_TAB, profile["screen"])
+        print(f"Profile tab not in the UI hierarchy; tapping its usual spot ({x}, {y})...")
+        device_shell().run(f"input tap {x} {y}")
+    else:
+        print("ERROR: Profile tab not found; is Instagram logged in?")
+        return False
+
+    dismissed = dismiss_known_banners(banners, timeout)
+    if dismissed:
+        print(f"✓ Dismissed: {', '.join(dismissed)}. You can now run the bot.")
+    else:
+        print("✓ No banners found. You can now run the bot.")
+    return True
 
-    # Wait for Instagram to load
-    subprocess.run(["python", "-c", "import time; time.sleep(3)"], check=True)
 
-    # Navigate to profile (bottom right corner)
-    print("Navigating to profile...")
-    tap_coordinates(736, 1420)  # Profile tab at bottom right (adjusted for 1080x1920)
+def check_fixtures(paths: list[str], banners: list[dict]) -> int:
+    """Print what would be tapped on saved hierarchy dumps"""
+    for path in paths:
+        hierarchy = UiHierarchy.from_file(path)
+        print(f"{path}: {hierarchy.size} nodes")
+        profile_tab = hierarchy.find_one(PROFILE_TAB)
+        if profile_tab is not None:
+            print(f"  profile tab -> tap {profile_tab.center}")
+        found = find_banners(hierarchy, banners)
+        for banner, button in found:
+            print(f"  {banner['name']} -> tap {button.center} ({button})")
+        if not found:
+            print("  no known banners")
+    return 0
+
+
+def self_test() -> int:
+    """Check banner matching and the dismiss loop against docs/fixtures, without a device"""
+    failures = []
+
+    def fixture(name: str) -> UiHierarchy:
+        return UiHierarchy.from_file(os.path.join(FIXTURES_DIR, name))
 
-    subprocess.run(["python", "-c", "import time; time.sleep(2)"], check=True)
+    for name, expected in FIXTURE_EXPECTATIONS.items():
+        found = {banner["name"]: button.center for banner, button in find_banners(fixture(name), DEFAULT_BANNERS)}
+        if found != expected:
+            failures.append(f"{name}: expected {expected}, found {found}")
 
-    # Look for the professional dashboard banner dismiss button (blue dot on the right)
-    # From hierarchy: blue dot at approximately bounds="[744,564]" (right side of banner)
-    print("Dismissing Professional dashboard banner...")
-    tap_coordinates(750, 460)  # Tap the blue dismiss dot
+    def run(screens: list[str]) -> tuple[list[str], list[list[tuple[int, int]]], int]:
+        """Dismiss against a scripted sequence of screens; the last one repeats"""
+        dumps, taps = [], []
 
-    subprocess.run(["python", "-c", "import time; time.sleep(1)"], check=True)
+        def dump() -> UiHierarchy:
+            dumps.append(screens[min(len(dumps), len(screens) - 1)])
+            return fixture(dumps[-1])
 
-    print("✓ Banner dismissed! You can now run the bot.")
+        dismissed = dismiss_known_banners(
+            DEFAULT_BANNERS, timeout=2.0, dump=dump,
+            tap=lambda nodes: taps.append([node.center for node in nodes]),
+        )
+        return dismissed, taps, len(dumps)
+
+    # The banner is tapped once, then polling stops at the ready profile
+    result = run(["profile_dashboard_banner.xml", "profile_ready.xml"])
+    if result != (["Professional dashboard"], [[(993, 767)]], 2):
+        failures.append(f"banner then ready profile: got {result}")
+    # Nothing to dismiss: one dump, no taps
+    result = run(["profile_ready.xml"])
+    if result != ([], [], 1):
+        failures.append(f"ready profile: got {result}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        return 1
+    print(f"✓ Banner matching OK on {len(FIXTURE_EXPECTATIONS)} fixtures")
+    return 0
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Dismiss Instagram banners that break GramAddict")
+    parser.add_argument("--from-xml", nargs="+", metavar="DUMP", help="Check saved uiautomator dumps instead of a device")
+    parser.add_argument("--self-test", action="store_true", help="Check banner matching against docs/fixtures and exit")
+    parser.add_argument("--banners", default=BANNERS_PATH, help="YAML list of extra banners to dismiss")
+    parser.add_argument("--timeout", type=float, default=15.0, help="Seconds to wait for each screen")
+    parser.add_argument("--profile-startup", action="store_true", help="Report import and pre-flight costs")
+    args = parser.parse_args()
+
+    if args.self_test:
+        return self_test()
+
+    try:
+        banners = load_banners(args.banners)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    if args.from_xml:
+        return check_fixtures(args.from_xml, banners)
+
     print(f"Target device: {DEVICE}")
     print("=" * 50)
 
     # Check ADB connection
-    result = run_adb_command(["devices"])
-    if DEVICE not in result:
+    device = DeviceManager(DEVICE)
+    with startup_profile.step("adb devices"):
+        connected = device.is_device_connected()
+    if not connected:
         print(f"ERROR: Device {DEVICE} not connected!")
         print("Run 'adb devices' to check connection.")
         return 1
 
-    dismiss_professional_dashboard()
-    return 0
+    try:
+        with startup_profile.step("device profile"):
+            profile = device.get_profile()
+        startup_profile.mark("device checked")
+        screen = profile["screen"] or {}
+        instagram = profile["instagram"] or {}
+        print(
+            f"Device: {profile['model']}, {screen.get('width')}x{screen.get('height')}, "
+            f"Instagram {instagram.get('version', 'not installed')}"
+        )
+        return 0 if dismiss_professional_dashboard(banners, profile, args.timeout) else 1
+    except (OSError, AdbError) as e:
+        print(f"ERROR: Lost the shell on {DEVICE}: {e}")
+        return 1
+    finally:
+        device_shell().close()
 
 
 if __name__ == "__main__":
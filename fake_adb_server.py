@@ -0,0 +1,219 @@
+"""
+Fake adb server for exercising DeviceManager without a device
+Speaks enough of the adb smart-socket protocol for the host services the
+project uses, backed by an in-memory device table.
+
+Usage:
+    python fake_adb_server.py --port 5038 --device emulator-5554 --device 127.0.0.1:5555
+    ANDROID_ADB_SERVER_PORT=5038 python device_manager.py
+"""
+import argparse
+import socket
+import socketserver
+import subprocess
+import threading
+from typing import Optional
+
+ADB_SERVER_VERSION = 41
+
+
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    """In-process adb server; port 0 picks a free port"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, devices: Optional[dict] = None):
+        super().__init__((host, port), FakeAdbHandler)
+        self.devices = dict(devices or {})
+        self.shell_responses: dict[str, str] = {}
+        self.lock = threading.Condition()
+        self.requests: list[str] = []
+        self.stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "FakeAdbServer":
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        with self.lock:
+            self.stopped = True
+            self.lock.notify_all()
+
+    def set_device_state(self, serial: str, state: Optional[str]):
+        """Add, update or (with state None) remove a device"""
+        with self.lock:
+            if state is None:
+                self.devices.pop(serial, None)
+            else:
+                self.devices[serial] = state
+            self.lock.notify_all()
+
+    def device_list(self) -> str:
+        with self.lock:  # Reentrant: track_devices calls this with the lock held
+            return "".join(f"{serial}\t{state}\n" for serial, state in self.devices.items())
+
+
+class FakeAdbHandler(socketserver.BaseRequestHandler):
+    server: FakeAdbServer
+
+    def read_request(self) -> Optional[str]:
+        header = self.read_exactly(4)
+        if header is None:
+            return None
+        body = self.read_exactly(int(header, 16))
+        return body.decode("utf-8") if body is not None else None
+
+    def read_exactly(self, size: int) -> Optional[bytes]:
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def okay(self, payload: Optional[str] = None):
+        message = b"OKAY"
+        if payload is not None:
+            encoded = payload.encode("utf-8")
+            message += b"%04x" % len(encoded) + encoded
+        self.request.sendall(message)
+
+    def fail(self, reason: str):
+        encoded = reason.encode("utf-8")
+        self.request.sendall(b"FAIL" + b"%04x" % len(encoded) + encoded)
+
+    def handle(self):
+        request = self.read_request()
+        if request is None:
+            return
+        self.server.requests.append(request)
+
+        if request == "host:version":
+            self.okay("%04x" % ADB_SERVER_VERSION)
+        elif request in ("host:devices", "host:devices-l"):
+            self.okay(self.server.device_list())
+        elif request == "host:track-devices":
+            self.okay()
+            self.track_devices()
+        elif request.startswith("host:connect:"):
+            address = request[len("host:connect:"):]
+            if self.server.devices.get(address) == "device":
+                self.okay(f"already connected to {address}")
+            else:
+                self.server.set_device_state(address, "device")
+                self.okay(f"connected to {address}")
+        elif request.startswith("host:disconnect:"):
+            address = request[len("host:disconnect:"):]
+            self.server.set_device_state(address, None)
+            self.okay(f"disconnected {address}")
+        elif request.startswith("host:transport:"):
+            serial = request[len("host:transport:"):]
+            if self.server.devices.get(serial) != "device":
+                self.fail(f"device '{serial}' not found")
+                return
+            self.okay()
+            self.handle_device_service(serial)
+        else:
+            self.fail(f"unknown host service: {request}")
+
+    def track_devices(self):
+        """Send the device list now and again after every change"""
+        server = self.server
+        last = None
+        try:
+            while True:
+                with server.lock:
+                    server.lock.wait_for(lambda: server.stopped or server.device_list() != last)
+                    if server.stopped:
+                        return
+                    last = server.device_list()
+                encoded = last.encode("utf-8")
+                self.request.sendall(b"%04x" % len(encoded) + encoded)
+        except OSError:
+            return
+
+    def handle_device_service(self, serial: str):
+        service = self.read_request()
+        if service is None:
+            return
+        self.server.requests.append(service)
+
+        if service in ("shell:", "shell:sh"):
+            self.okay()
+            self.interactive_shell()
+        elif service.startswith("shell:"):
+            command = service[len("shell:"):]
+            self.okay()
+            self.request.sendall(self.server.shell_responses.get(command, "").encode("utf-8"))
+        else:
+            self.fail(f"unknown device service: {service}")
+
+
+    def interactive_shell(self):
+        """
+        Stream the connection to a local `sh`, standing in for the device shell
+
+        Commands run on this host, which is enough to exercise ShellSession's
+        framing and pipelining without a device.
+        """
+        proc = subprocess.Popen(["sh"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+        def relay_output():
+            try:
+                while chunk := proc.stdout.read1(65536):
+                    self.request.sendall(chunk)
+            except OSError:
+                pass
+            finally:
+                try:
+                    self.request.shutdown(socket.SHUT_WR)
+                except OSError:
+                    pass
+
+        relay = threading.Thread(target=relay_output, daemon=True)
+        relay.start()
+        try:
+            while chunk := self.request.recv(65536):
+                proc.stdin.write(chunk)
+                proc.stdin.flush()
+        except OSError:
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+            proc.wait()
+            relay.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake adb server for local testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5038)
+    parser.add_argument("--device", action="append", default=[], help="Serial of an attached device (repeatable)")
+    args = parser.parse_args()
+
+    server = FakeAdbServer(args.host, args.port, {serial: "device" for serial in args.device})
+    print(f"Fake adb server listening on {args.host}:{server.port} with {len(server.devices)} device(s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Shared lookup of the GramAddict executable and its diagnostic output
+The resolved path, version and --help text are cached in
+.cache/gramaddict.json keyed by the executable's mtime, so repeated launches
+skip both the filesystem probing and the extra interpreter spawns
+"""
+import json
+import os
+import subprocess
+import threading
+from typing import Optional
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+CACHE_PATH = os.path.join(ROOT, ".cache", "gramaddict.json")
+
+# Set to point the runner and tools at another executable (e.g. a stand-in)
+EXECUTABLE_ENV = "GRAMADDICT_EXECUTABLE"
+
+_lock = threading.Lock()
+_state = {}
+
+
+def _candidates() -> list[str]:
+    override = os.getenv(EXECUTABLE_ENV)
+    if override:
+        return [os.path.abspath(override)]
+    return [
+        os.path.join(ROOT, ".venv", "Scripts", "gramaddict.exe"),
+        os.path.join(ROOT, ".venv", "bin", "gramaddict"),
+    ]
+
+
+def _signature(path: str) -> Optional[list]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _load_cache() -> dict:
+    try:
+        with open(CACHE_PATH, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache: dict):
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    temp_path = f"{CACHE_PATH}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(temp_path, CACHE_PATH)
+    except OSError:
+        pass  # The cache only saves spawns; never fail a launch over it
+
+
+def _entry() -> Optional[dict]:
+    """Cache entry of the current executable, re-resolved if it changed on disk"""
+    key = os.getenv(EXECUTABLE_ENV) or ROOT
+    entry = _state.get(key)
+    if entry is not None and _signature(entry["executable"]) == entry["signature"]:
+        return entry
+
+    cache = _load_cache()
+    entry = cache.get(key)
+    if not (entry and entry.get("executable") in _candidates()
+            and _signature(entry["executable"]) == entry.get("signature")):
+        entry = None
+        for path in _candidates():
+            signature = _signature(path)
+            if signature is not None:
+                entry = {"executable": path, "signature": signature}
+                break
+        if entry is None:
+            return None
+        cache[key] = entry
+        _save_cache(cache)
+
+    _state[key] = entry
+    return entry
+
+
+def find_executable() -> Optional[str]:
+    """Path of the GramAddict executable, or None if it is not installed"""
+    with _lock:
+        entry = _entry()
+        return entry["executable"] if entry else None
+
+
+def _cached_output(field: str, args: list[str], env: Optional[dict] = None) -> Optional[str]:
+    with _lock:
+        entry = _entry()
+        if entry is None:
+            return None
+        if field not in entry:
+            try:
+                result = subprocess.run(
+                    [entry["executable"], *args],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    env=env,
+                    timeout=60,
+                )
+            except (OSError, subprocess.TimeoutExpired):
+                return None
+            entry[field] = result.stdout or ""
+            cache = _load_cache()
+            cache[os.getenv(EXECUTABLE_ENV) or ROOT] = entry
+            _save_cache(cache)
+        return entry[field]
+
+
+def get_version(env: Optional[dict] = None) -> Optional[str]:
+    """GramAddict's version string (GramAddict uses -v for --version)"""
+    output = _cached_output("version", ["-v"], env)
+    return output.strip() if output else output
+
+
+def get_help(command: Optional[str] = None, env: Optional[dict] = None) -> Optional[str]:
+    """`gramaddict --help` or `gramaddict <command> --help` output"""
+    if command:
+        return _cached_output(f"help_{command}", [command, "--help"], env)
+    return _cached_output("help", ["--help"], env)
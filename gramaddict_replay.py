@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Stand-in GramAddict executable that replays recorded session logs
+Point GRAMADDICT_EXECUTABLE at this file and runner.py runs it like the real
+bot, so the log pump, session events and timeouts can be exercised without
+a phone. The `load` command starts many replay sessions through runner's
+run_process and reports pump throughput, latency to the log file and memory
+
+Usage:
+    GRAMADDICT_EXECUTABLE=./gramaddict_replay.py GRAMADDICT_REPLAY_LOG=logs/morning.log python runner.py morning
+    python gramaddict_replay.py run --log logs/morning.log --speed 20
+    python gramaddict_replay.py load --sessions 50 --speed 0 --loop 5
+    python gramaddict_replay.py load --sessions 20 --speed 10 --burst 5000:30 --stall 20:60
+
+Replay settings come from flags or GRAMADDICT_REPLAY_* variables (runner.py
+only passes `run --config`). Without a recorded log, a synthetic one is used.
+Runs on Linux/Mac; Windows cannot execute a .py file as GRAMADDICT_EXECUTABLE.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from log_rotation import open_log
+
+VERSION = "3.2.12+replay"
+ENV_PREFIX = "GRAMADDICT_REPLAY_"
+
+# "[10/18 09:31:02] INFO | ..." as GramAddict writes it
+TIMESTAMP = re.compile(rb"^\[(\d\d)/(\d\d) (\d\d):(\d\d):(\d\d)\]")
+MARK_PATTERN = re.compile(rb"REPLAY-MARK (\d+\.\d+)")
+DONE_PATTERN = re.compile(rb"REPLAY-DONE (\d+) (\d+)")
+
+# Output is written in chunks of at most this size when nothing is waiting
+WRITE_CHUNK = 64 * 1024
+SYNTHETIC_LINES = 20_000
+# Lines looked at to decide whether a log carries timestamps
+TIMING_PROBE_LINES = 1000
+TAIL_INTERVAL = 0.01
+
+
+def env_default(name: str, default=None):
+    return os.getenv(ENV_PREFIX + name.upper(), default)
+
+
+def parse_every(value: Optional[str]) -> Optional[tuple[float, float]]:
+    """'AMOUNT:EVERY' (e.g. '5000:30') as two floats"""
+    if not value:
+        return None
+    try:
+        amount, every = value.split(":")
+        return float(amount), float(every)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected AMOUNT:SECONDS, got {value!r}")
+
+
+def line_seconds(line: bytes) -> Optional[int]:
+    """Seconds since the start of the year of a log line's timestamp (months as 31 days)"""
+    match = TIMESTAMP.match(line)
+    if not match:
+        return None
+    month, day, hour, minute, second = (int(part) for part in match.groups())
+    return (((month * 31 + day) * 24 + hour) * 60 + minute) * 60 + second
+
+
+def iter_lines(paths: list[str]) -> Iterator[bytes]:
+    """
+    Lines of the recorded logs (.gz segments included), or a synthetic session
+
+    Streamed from disk on every pass, so a replay holds one line at a time
+    no matter how large the recording is.
+    """
+    if not paths:
+        from benchmark import generate_log_block
+
+        yield from generate_log_block(random.Random(1), SYNTHETIC_LINES).splitlines(keepends=True)
+        return
+    for path in paths:
+        with open_log(path) as f:
+            for line in f:
+                yield line if line.endswith(b"\n") else line + b"\n"
+
+
+def iter_steps(lines: Iterator[bytes], rate: float, max_gap: float) -> Iterator[tuple[float, bytes]]:
+    """
+    (delay, line) pairs in recorded time
+
+    The delay is the gap between timestamps, capped at max_gap; untimestamped
+    lines (tracebacks, dumps) follow the previous line at once. A log whose
+    first lines carry no timestamps is replayed at `rate` lines per second.
+    """
+    head = list(itertools.islice(lines, TIMING_PROBE_LINES))
+    timed = any(TIMESTAMP.match(line) for line in head)
+    previous = None
+    for line in itertools.chain(head, lines):
+        if not timed:
+            yield 1 / rate, line
+            continue
+        seconds = line_seconds(line)
+        delay = 0.0
+        if seconds is not None:
+            if previous is not None:
+                delay = min(max(seconds - previous, 0), max_gap)
+            previous = seconds
+        yield delay, line
+
+
+def replay(args) -> int:
+    """Write the recorded session to stdout at args.speed times its recorded pace"""
+    out = sys.stdout.buffer
+    burst, stall = args.burst, args.stall
+    burst_block = None
+    if burst:
+        from benchmark import generate_log_block
+
+        burst_block = generate_log_block(random.Random(2), int(burst[0]))
+
+    started = time.monotonic()
+    next_burst = started + burst[1] if burst else None
+    next_stall = started + stall[1] if stall else None
+    next_mark = started
+    written = count = 0
+    pending = []
+    pending_size = 0
+
+    def flush():
+        nonlocal written, pending_size, next_mark
+        if args.mark_interval and time.monotonic() >= next_mark:
+            # Wall-clock send time, for measuring latency to the log file
+            pending.insert(0, f"REPLAY-MARK {time.time():.6f}\n".encode())
+            next_mark = time.monotonic() + args.mark_interval
+        data = b"".join(pending)
+        out.write(data)
+        out.flush()
+        written += len(data)
+        pending.clear()
+        pending_size = 0
+
+    for _ in range(args.loop):
+        # At speed 0 the recorded timing is irrelevant; skip parsing it
+        lines = iter_lines(args.log)
+        steps = iter_steps(lines, args.rate, args.max_gap) if args.speed else ((0, line) for line in lines)
+        for delay, line in steps:
+            if delay and args.speed:
+                if pending:
+                    flush()
+                time.sleep(delay / args.speed)
+            now = time.monotonic()
+            if next_burst is not None and now >= next_burst:
+                pending.append(burst_block)
+                pending_size += len(burst_block)
+                count += int(burst[0])
+                next_burst = now + burst[1]
+            if next_stall is not None and now >= next_stall:
+                if pending:
+                    flush()
+                time.sleep(stall[0])
+                next_stall = time.monotonic() + stall[1]
+            pending.append(line)
+            pending_size += len(line)
+            count += 1
+            if pending_size >= WRITE_CHUNK:
+                flush()
+    pending.append(f"REPLAY-DONE {written + sum(map(len, pending))} {count}\n".encode())
+    flush()
+    return args.exit_code
+
+
+def percentile(values: list[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def tail_marks(paths: list[Path], latencies: list[float], stop: threading.Event):
+    """Follow the session logs and record how long each REPLAY-MARK took to land"""
+    offsets = {path: 0 for path in paths}
+    partial = {path: b"" for path in paths}
+    while True:
+        finished = stop.is_set()
+        for path in paths:
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                continue
+            if size < offsets[path]:
+                # Rotated; the rest of the old segment is lost to this tail
+                offsets[path], partial[path] = 0, b""
+            if size == offsets[path]:
+                continue
+            with open(path, "rb") as f:
+                f.seek(offsets[path])
+                data = partial[path] + f.read(size - offsets[path])
+            seen = time.time()
+            offsets[path] = size
+            data, _, partial[path] = data.rpartition(b"\n")
+            latencies.extend(seen - float(stamp) for stamp in MARK_PATTERN.findall(data))
+        if finished:
+            return
+        time.sleep(TAIL_INTERVAL)
+
+
+def peak_rss_mb() -> tuple[Optional[float], Optional[float]]:
+    """Peak RSS of this process and of the largest finished child, in MB"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None, None
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    scale = 1024 ** 2 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(children, 1)
+
+
+def replay_env(args) -> dict:
+    env = dict(os.environ)
+    env.update({
+        ENV_PREFIX + "LOG": os.pathsep.join(os.path.abspath(path) for path in args.log),
+        ENV_PREFIX + "SPEED": str(args.speed),
+        ENV_PREFIX + "RATE": str(args.rate),
+        ENV_PREFIX + "MAX_GAP": str(args.max_gap),
+        ENV_PREFIX + "LOOP": str(args.loop),
+        ENV_PREFIX + "MARK_INTERVAL": str(args.mark_interval or 0.5),
+        ENV_PREFIX + "EXIT_CODE": str(args.exit_code),
+    })
+    for name in ("burst", "stall"):
+        value = getattr(args, name)
+        env[ENV_PREFIX + name.upper()] = f"{value[0]:g}:{value[1]:g}" if value else ""
+    return env
+
+
+def load(args) -> int:
+    """Run args.sessions replays in parallel through runner.run_process and report"""
+    import runner
+    from log_rotation import close_rotating_log
+    from session_events import SessionEventWriter, events_path_for
+
+    logger = logging.getLogger("gramaddict_replay")
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    out_dir = Path(args.output_dir or tempfile.mkdtemp(prefix="gramaddict_replay_"))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = [out_dir / f"replay_{i:03d}.log" for i in range(args.sessions)]
+    cmd = [sys.executable, os.path.abspath(__file__), "run", "--config", "replay.yml"]
+    env = replay_env(args)
+
+    latencies: list[float] = []
+    stop = threading.Event()
+    tail = threading.Thread(target=tail_marks, args=(paths, latencies, stop), daemon=True)
+    rss_before, _ = peak_rss_mb()
+
+    async def session(i: int, path: Path):
+        started = time.monotonic()
+        events = SessionEventWriter(events_path_for(path), account=f"replay_{i:03d}", mode="replay")
+        returncode = await runner.run_process(
+            cmd, env, str(path), logger, idle_timeout=args.idle_timeout, events=events
+        )
+        return returncode, time.monotonic() - started
+
+    async def run_all():
+        return await asyncio.gather(*(session(i, path) for i, path in enumerate(paths)))
+
+    print(f"Replaying {args.sessions} session(s) into {out_dir}...")
+    tail.start()
+    started = time.monotonic()
+    outcomes = asyncio.run(run_all())
+    elapsed = time.monotonic() - started
+    for path in paths:
+        close_rotating_log(str(path))
+    stop.set()
+    tail.join()
+    rss_after, rss_child = peak_rss_mb()
+
+    total_bytes = total_lines = 0
+    for path in paths:
+        # The replay's last line; a session stopped early has none
+        with open(path, "rb") as f:
+            f.seek(max(path.stat().st_size - 200, 0))
+            done = DONE_PATTERN.findall(f.read())
+        if done:
+            total_bytes += int(done[-1][0])
+            total_lines += int(done[-1][1])
+        else:
+            total_bytes += path.stat().st_size  # Current segment only
+
+    returncodes = [returncode for returncode, _ in outcomes]
+    report = {
+        "sessions": args.sessions,
+        "speed": args.speed,
+        "burst": args.burst,
+        "stall": args.stall,
+        "seconds": round(elapsed, 3),
+        "session_seconds_max": round(max(seconds for _, seconds in outcomes), 3),
+        "failed_sessions": sum(1 for returncode in returncodes if returncode != 0),
+        "bytes": total_bytes,
+        "lines": total_lines,
+        "mb_per_s": round(total_bytes / 1_000_000 / elapsed, 1) if elapsed else None,
+        "lines_per_s": round(total_lines / elapsed) if elapsed else None,
+        "latency_samples": len(latencies),
+        "latency_ms_p50": None,
+        "latency_ms_p95": None,
+        "latency_ms_max": None,
+        "runner_rss_mb_before": rss_before,
+        "runner_rss_mb_peak": rss_after,
+        "replay_rss_mb_peak": rss_child,
+        "log_dir": str(out_dir),
+    }
+    for key, fraction in (("p50", 0.5), ("p95", 0.95), ("max", 1.0)):
+        value = percentile(latencies, fraction)
+        report[f"latency_ms_{key}"] = round(value * 1000, 1) if value is not None else None
+
+    print(f"\n{'metric':<24} value")
+    for key, value in report.items():
+        print(f"{key:<24} {value}")
+    print(f"\nLatency includes up to {TAIL_INTERVAL * 1000:.0f}ms of polling by this tool.")
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    return 1 if report["failed_sessions"] and not args.stall else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="gramaddict", description="Replay recorded GramAddict sessions in place of the real bot"
+    )
+    parser.add_argument("-v", "--version", action="store_true", help="Print the version and exit")
+    commands = parser.add_subparsers(dest="command")
+
+    def add_replay_options(sub):
+        sub.add_argument("--log", action="append", help="Recorded session log (.log or .gz); repeat for several")
+        sub.add_argument("--speed", type=float, default=float(env_default("speed", 1)), help="Replay this many times faster than recorded; 0 = no delays (default: 1)")
+        sub.add_argument("--rate", type=float, default=float(env_default("rate", 20)), help="Lines per second for logs without timestamps (default: 20)")
+        sub.add_argument("--max-gap", type=float, default=float(env_default("max_gap", 60)), help="Longest recorded pause to reproduce, in seconds (default: 60)")
+        sub.add_argument("--burst", type=parse_every, default=parse_every(env_default("burst")), help="LINES:SECONDS - write LINES extra lines at once every SECONDS")
+        sub.add_argument("--stall", type=parse_every, default=parse_every(env_default("stall")), help="SECONDS:EVERY - go silent for SECONDS after every EVERY seconds")
+        sub.add_argument("--loop", type=int, default=int(env_default("loop", 1)), help="Replay the log this many times (default: 1)")
+        sub.add_argument("--mark-interval", type=float, default=float(env_default("mark_interval", 0)), help="Emit a timestamped REPLAY-MARK line this often, in seconds")
+        sub.add_argument("--exit-code", type=int, default=int(env_default("exit_code", 0)), help="Exit status once replayed (default: 0)")
+
+    run_parser = commands.add_parser("run", help="Replay a session (what runner.py calls)")
+    run_parser.add_argument("--config", help="Accepted like GramAddict's; not read")
+    add_replay_options(run_parser)
+
+    load_parser = commands.add_parser("load", help="Replay many sessions through runner.run_process")
+    load_parser.add_argument("--sessions", type=int, default=10, help="Parallel sessions (default: 10)")
+    load_parser.add_argument("--idle-timeout", type=float, help="runner's --idle-timeout, in seconds")
+    load_parser.add_argument("--output-dir", help="Where session logs go (default: a new temp directory)")
+    load_parser.add_argument("--output", type=Path, help="Also write the report JSON here")
+    add_replay_options(load_parser)
+
+    args = parser.parse_args()
+    if args.version:
+        print(VERSION)
+        return 0
+    if args.command is None:
+        parser.print_help()
+        return 0
+    if args.log is None:
+        args.log = [path for path in env_default("log", "").split(os.pathsep) if path]
+    if args.command == "run":
+        return replay(args)
+    return load(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
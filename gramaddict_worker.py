@@ -0,0 +1,478 @@
+"""
+Warm GramAddict worker: keeps GramAddict imported and forks a session per job
+Start it with `python runner.py worker`, then pass --use-worker to the runner.
+Each job runs in its own forked child, so a crashing session cannot poison
+the worker; the runner falls back to a normal subprocess if no worker runs
+
+Protocol over the Unix socket (.cache/gramaddict_worker.sock):
+    runner -> worker: one JSON line {"cmd": [...], "env": {...}, "cwd": "..."},
+                      then single control bytes: T (terminate) or K (kill)
+    worker -> runner: frames of 1 type byte + 4-byte big-endian length + payload
+                      P = child pid, O = output bytes, X = JSON {"returncode": n}
+"""
+import asyncio
+import json
+import os
+import selectors
+import signal
+import socket
+import struct
+import sys
+import time
+import traceback
+from typing import Optional
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+WORKER_SOCKET = os.path.join(ROOT, ".cache", "gramaddict_worker.sock")
+
+FRAME_HEADER = struct.Struct(">cI")
+READ_SIZE = 64 * 1024
+
+# A connection must deliver its request line within this time and size
+REQUEST_TIMEOUT = 10.0
+MAX_REQUEST_BYTES = 4 * 1024 * 1024
+# Stop reading a session's output while this much is still queued for its runner
+OUTBOX_LIMIT = 1024 * 1024
+
+# Imported once in the worker so every forked session starts warm
+PRELOAD_MODULES = ("uiautomator2", "GramAddict")
+
+
+def _frame(kind: bytes, payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(kind, len(payload)) + payload
+
+
+def load_entry_point():
+    """GramAddict's console-script function, or None if it cannot be imported here"""
+    from importlib.metadata import entry_points
+
+    for entry in entry_points(group="console_scripts", name="gramaddict"):
+        try:
+            return entry.load()
+        except Exception:
+            return None
+    return None
+
+
+class Job:
+    """One session: the runner's connection, the forked child and its output pipe"""
+
+    def __init__(self, conn: socket.socket, pid: int, output_fd: int):
+        self.conn = conn
+        self.pid = pid
+        self.output_fd = output_fd
+        self.started = time.monotonic()
+        self.returncode = None
+        # Frames not yet accepted by the (non-blocking) runner connection
+        self.outbox = bytearray()
+        self.conn_events = selectors.EVENT_READ
+        self.paused = False
+        self.finished = False
+
+
+class PendingRequest:
+    """A new connection whose JSON request line has not fully arrived yet"""
+
+    def __init__(self, conn: socket.socket):
+        self.conn = conn
+        self.buffer = bytearray()
+        self.deadline = time.monotonic() + REQUEST_TIMEOUT
+
+
+class GramAddictWorker:
+    """
+    Single-threaded accept/relay loop; forking from one thread keeps fork safe
+
+    Every socket is non-blocking so one slow or silent runner cannot stall
+    the loop: requests are buffered until their newline arrives and output
+    frames queue per job until the runner's socket is writable.
+    """
+
+    def __init__(self, socket_path: str = WORKER_SOCKET, log=print):
+        self.socket_path = socket_path
+        self.log = log
+        self.selector = selectors.DefaultSelector()
+        self.jobs = {}
+        self.draining = []
+        self.pending = []
+        self.entry_point = None
+        self.running = False
+        self.server = None
+
+    def preload(self):
+        """Import GramAddict and its dependencies once, before any fork"""
+        # Same search path the runner gives GramAddict through PYTHONPATH
+        if ROOT not in sys.path:
+            sys.path.insert(0, ROOT)
+
+        for name in PRELOAD_MODULES:
+            started = time.perf_counter()
+            try:
+                __import__(name)
+                self.log(f"Preloaded {name} in {time.perf_counter() - started:.2f}s")
+            except Exception as e:
+                self.log(f"Could not preload {name}: {e}")
+
+        self.entry_point = load_entry_point()
+        if self.entry_point is None:
+            self.log("GramAddict entry point unavailable; jobs will exec the executable instead")
+
+    def bind(self):
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                raise RuntimeError(f"A worker is already listening on {self.socket_path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.socket_path)  # Left behind by a worker that died
+            finally:
+                probe.close()
+
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self.server.listen(16)
+        self.selector.register(self.server, selectors.EVENT_READ, ("accept", None))
+
+    def serve_forever(self):
+        self.running = True
+        while self.running:
+            # Poll quickly while a finished session is still being reaped
+            for key, mask in self.selector.select(timeout=0.02 if self.draining else 0.5):
+                kind, item = key.data
+                if kind == "accept":
+                    self._accept()
+                elif kind == "request":
+                    self._read_request(item)
+                elif kind == "output":
+                    self._relay_output(item)
+                elif kind == "conn":
+                    if mask & selectors.EVENT_WRITE:
+                        self._flush(item)
+                    if mask & selectors.EVENT_READ and item.conn is not None:
+                        self._control(item)
+            self._expire_requests()
+            self._reap()
+
+    def stop(self, *_):
+        self.running = False
+
+    def close(self):
+        for job in list(self.jobs.values()) + self.draining:
+            self._signal(job, signal.SIGTERM)
+        for request in self.pending:
+            request.conn.close()
+        if self.server is not None:
+            self.server.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def _accept(self):
+        conn, _ = self.server.accept()
+        conn.setblocking(False)
+        request = PendingRequest(conn)
+        self.pending.append(request)
+        self.selector.register(conn, selectors.EVENT_READ, ("request", request))
+
+    def _read_request(self, request: PendingRequest):
+        try:
+            data = request.conn.recv(READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._reject(request, "connection closed before the request arrived")
+            return
+
+        request.buffer += data
+        line, newline, rest = request.buffer.partition(b"\n")
+        if not newline:
+            if len(request.buffer) > MAX_REQUEST_BYTES:
+                self._reject(request, "request too large")
+            return
+
+        self.pending.remove(request)
+        self.selector.unregister(request.conn)
+        try:
+            parsed = json.loads(line)
+            cmd = parsed["cmd"]
+            if not isinstance(cmd, list) or not cmd:
+                raise TypeError("cmd must be a non-empty list")
+        except (ValueError, KeyError, TypeError) as e:
+            self.log(f"Rejected job: {e}")
+            request.conn.close()
+            return
+        self._start_job(request.conn, parsed, bytes(rest))
+
+    def _reject(self, request: PendingRequest, reason: str):
+        self.log(f"Rejected job: {reason}")
+        self.pending.remove(request)
+        self.selector.unregister(request.conn)
+        request.conn.close()
+
+    def _expire_requests(self):
+        now = time.monotonic()
+        for request in list(self.pending):
+            if now > request.deadline:
+                self._reject(request, f"no request within {REQUEST_TIMEOUT:g}s")
+
+    def _start_job(self, conn: socket.socket, request: dict, early_control: bytes):
+        cmd = request["cmd"]
+        read_fd, write_fd = os.pipe()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            conn.close()
+            self._run_child(cmd, request.get("env"), request.get("cwd"), write_fd)
+
+        os.close(write_fd)
+        job = Job(conn, pid, read_fd)
+        self.jobs[pid] = job
+        self.log(f"Started job {pid}: {' '.join(map(str, cmd))}")
+        self.selector.register(read_fd, selectors.EVENT_READ, ("output", job))
+        self.selector.register(conn, selectors.EVENT_READ, ("conn", job))
+        self._send(job, _frame(b"P", str(pid).encode()))
+        if early_control:
+            self._handle_control(job, early_control)
+
+    def _run_child(self, cmd: list, env: Optional[dict], cwd: Optional[str], output_fd: int):
+        """In the forked child: become the session and never return"""
+        returncode = 1
+        try:
+            os.setsid()
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            self.selector.close()
+            self.server.close()
+            for job in [*self.jobs.values(), *self.draining]:
+                if job.conn is not None:
+                    job.conn.close()
+                if job.output_fd is not None:
+                    os.close(job.output_fd)
+            for request in self.pending:
+                request.conn.close()
+
+            os.dup2(output_fd, 1)
+            os.dup2(output_fd, 2)
+            os.close(output_fd)
+            if cwd:
+                os.chdir(cwd)
+            if env is not None:
+                os.environ.clear()
+                os.environ.update(env)
+
+            if self.entry_point is None:
+                os.execvpe(cmd[0], cmd, os.environ)
+
+            sys.argv = list(cmd)
+            try:
+                result = self.entry_point()
+                returncode = result if isinstance(result, int) else 0
+            except SystemExit as e:
+                returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                os._exit(returncode)
+
+    def _relay_output(self, job: Job):
+        data = os.read(job.output_fd, READ_SIZE)
+        if data:
+            self._send(job, _frame(b"O", data))  # Dropped if the runner went away
+            return
+
+        # Output closed: the child is exiting; reap it without blocking the loop
+        self.selector.unregister(job.output_fd)
+        os.close(job.output_fd)
+        job.output_fd = None
+        self.jobs.pop(job.pid, None)
+        self.draining.append(job)
+
+    def _send(self, job: Job, data: bytes):
+        if job.conn is None:
+            return
+        job.outbox += data
+        self._flush(job)
+
+    def _flush(self, job: Job):
+        """Send what the runner's socket takes now; wait for EVENT_WRITE for the rest"""
+        if job.conn is None:
+            return
+        try:
+            sent = job.conn.send(job.outbox) if job.outbox else 0
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self._drop_runner(job)
+            return
+        del job.outbox[:sent]
+
+        if job.finished and not job.outbox:
+            self.selector.unregister(job.conn)
+            job.conn.close()
+            job.conn = None
+            return
+
+        # A runner that falls behind leaves the child's output in its pipe
+        if job.output_fd is not None:
+            if not job.paused and len(job.outbox) >= OUTBOX_LIMIT:
+                self.selector.unregister(job.output_fd)
+                job.paused = True
+            elif job.paused and len(job.outbox) < OUTBOX_LIMIT:
+                self.selector.register(job.output_fd, selectors.EVENT_READ, ("output", job))
+                job.paused = False
+
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if job.outbox else 0)
+        if events != job.conn_events:
+            self.selector.modify(job.conn, events, ("conn", job))
+            job.conn_events = events
+
+    def _drop_runner(self, job: Job):
+        """The runner went away: stop the session and discard its remaining output"""
+        self.selector.unregister(job.conn)
+        job.conn.close()
+        job.conn = None
+        job.outbox.clear()
+        if job.paused:
+            self.selector.register(job.output_fd, selectors.EVENT_READ, ("output", job))
+            job.paused = False
+        self._signal(job, signal.SIGTERM)
+
+    def _control(self, job: Job):
+        try:
+            data = job.conn.recv(64)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop_runner(job)
+        else:
+            self._handle_control(job, data)
+
+    def _handle_control(self, job: Job, data: bytes):
+        if b"K" in data:
+            self._signal(job, signal.SIGKILL)
+        elif b"T" in data:
+            self._signal(job, signal.SIGTERM)
+
+    def _signal(self, job: Job, signum: int):
+        if job.returncode is None:
+            try:
+                os.killpg(job.pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _reap(self):
+        for job in list(self.draining):
+            pid, status = os.waitpid(job.pid, os.WNOHANG)
+            if pid == 0:
+                continue
+            job.returncode = os.waitstatus_to_exitcode(status)
+            self.draining.remove(job)
+            self.log(f"Job {job.pid} exited with {job.returncode} after {time.monotonic() - job.started:.1f}s")
+            # The connection closes once everything queued, X included, is sent
+            job.finished = True
+            self._send(job, _frame(b"X", json.dumps({"returncode": job.returncode}).encode()))
+
+
+def serve(socket_path: str = WORKER_SOCKET, log=print) -> int:
+    """Run the worker until SIGTERM or Ctrl+C"""
+    worker = GramAddictWorker(socket_path, log)
+    try:
+        worker.bind()
+    except RuntimeError as e:
+        log(str(e))
+        return 1
+
+    signal.signal(signal.SIGTERM, worker.stop)
+    worker.preload()
+    log(f"Worker listening on {socket_path}")
+    try:
+        worker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.close()
+    return 0
+
+
+class WorkerProcess:
+    """
+    A worker job seen from the runner, shaped like asyncio.subprocess.Process
+
+    Output frames are fed into .stdout, so the runner's pump, timeouts and
+    terminate_process() work the same as for a local child.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, limit: int):
+        self.stdout = asyncio.StreamReader(limit=limit)
+        self.pid = None
+        self.returncode = None
+        self._reader = reader
+        self._writer = writer
+        self._done = asyncio.Event()
+        self._relay_task = asyncio.get_running_loop().create_task(self._relay())
+
+    async def _relay(self):
+        try:
+            while True:
+                kind, length = FRAME_HEADER.unpack(await self._reader.readexactly(FRAME_HEADER.size))
+                payload = await self._reader.readexactly(length)
+                if kind == b"O":
+                    self.stdout.feed_data(payload)
+                elif kind == b"P":
+                    self.pid = int(payload)
+                elif kind == b"X":
+                    self.returncode = json.loads(payload)["returncode"]
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if self.returncode is None:
+                self.returncode = -1  # Worker vanished mid-session
+            self.stdout.feed_eof()
+            self._writer.close()
+            self._done.set()
+
+    async def wait(self) -> int:
+        await self._done.wait()
+        return self.returncode
+
+    def _send(self, control: bytes):
+        if self.returncode is None and not self._writer.is_closing():
+            self._writer.write(control)
+
+    def terminate(self):
+        self._send(b"T")
+
+    def kill(self):
+        self._send(b"K")
+
+
+async def open_worker_process(
+    cmd: list[str],
+    env: dict,
+    socket_path: str = WORKER_SOCKET,
+    limit: int = 2 ** 16,
+) -> Optional[WorkerProcess]:
+    """Submit a session to the worker, or return None if no worker is listening"""
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+    except OSError:
+        return None
+
+    request = {"cmd": cmd, "env": env, "cwd": os.getcwd()}
+    writer.write(json.dumps(request).encode() + b"\n")
+    await writer.drain()
+    return WorkerProcess(reader, writer, limit)
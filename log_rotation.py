@@ -0,0 +1,228 @@
+"""
+Size-bounded runner logs with gzip-compressed rotated segments
+Rotated segments are compressed on a background thread so the session
+writing the log never waits on gzip
+"""
+import os
+import shutil
+import threading
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+# Rotate once a log reaches this size; keep this many compressed segments
+LOG_MAX_BYTES = int(os.getenv("RUNNER_LOG_MAX_BYTES", 20 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv("RUNNER_LOG_BACKUPS", 5))
+
+_handlers = {}
+_handlers_lock = threading.Lock()
+
+
+def open_log(path, mode: str = "rb"):
+    """Open a log segment for reading, decompressing .gz segments as a stream"""
+    if str(path).endswith(".gz"):
+        import gzip  # Only needed once something has rotated; keeps runner startup lean
+        return gzip.open(path, mode)
+    return open(path, mode)
+
+
+def compress_file(source: str, dest: str):
+    """Gzip source into dest atomically, then remove source"""
+    import gzip
+
+    temp_path = f"{dest}.tmp"
+    with open(source, "rb") as src, gzip.open(temp_path, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(temp_path, dest)
+    os.unlink(source)
+
+
+def rotate_file(path: str, backup_count: int = LOG_BACKUP_COUNT):
+    """
+    Rotate path into path.1.gz, shifting older segments, and compress inline
+
+    For files written only between runs (e.g. event files); live logs use
+    CompressingRotatingFileHandler instead.
+    """
+    for i in range(backup_count - 1, 0, -1):
+        source = f"{path}.{i}.gz"
+        if os.path.exists(source):
+            os.replace(source, f"{path}.{i + 1}.gz")
+    pending = f"{path}.1"
+    os.replace(path, pending)
+    compress_file(pending, f"{pending}.gz")
+
+
+def compress_backups(path: str, backup_count: int = LOG_BACKUP_COUNT) -> int:
+    """
+    Gzip the plain <log>.N backups another program's rotation left behind
+
+    GramAddict rotates logs/<username>.log itself into uncompressed .log.1,
+    .log.2, ... and only ever shifts those, so they are always newer than
+    the .gz segments. The .gz segments are moved up past them and the plain
+    ones compressed in place, keeping "higher suffix is older". At most
+    backup_count segments are kept; older .gz segments past that are
+    deleted. Only call this while the writing program is not running.
+
+    Returns the number of segments compressed.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        return 0
+    plain, compressed = [], []
+    for entry in os.listdir(directory):
+        if not entry.startswith(f"{name}."):
+            continue
+        suffix = entry[len(name) + 1:]
+        if suffix.isdigit():
+            plain.append(int(suffix))
+        elif suffix.endswith(".gz") and suffix[:-3].isdigit():
+            compressed.append(int(suffix[:-3]))
+
+    shift = max(plain, default=0)
+    if shift:
+        for i in sorted(compressed, reverse=True):
+            os.replace(f"{path}.{i}.gz", f"{path}.{i + shift}.gz")
+        for i in plain:
+            compress_file(f"{path}.{i}", f"{path}.{i}.gz")
+    for i in compressed:
+        if i + shift > backup_count:
+            os.unlink(f"{path}.{i + shift}.gz")
+    return len(plain)
+
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler whose backups are <log>.1.gz, <log>.2.gz, ...
+
+    The full log is renamed to <log>.1 and gzipped in the background; the
+    next rollover waits for that to finish before shifting segments. Raw
+    child output goes through write_raw() so it counts towards the size
+    limit alongside the runner's own log records.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = LOG_MAX_BYTES,
+        backup_count: int = LOG_BACKUP_COUNT,
+        encoding: str = "utf-8",
+    ):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.namer = lambda name: f"{name}.gz"
+        self.rotator = self._rotate
+        self._compressor: Optional[threading.Thread] = None
+
+        # A segment left uncompressed by an interrupted run
+        leftover = f"{self.baseFilename}.1"
+        if os.path.exists(leftover) and not os.path.exists(f"{leftover}.gz"):
+            self._compress_in_background(leftover, f"{leftover}.gz")
+
+    def _compress_in_background(self, source: str, dest: str):
+        self._compressor = threading.Thread(
+            target=compress_file, args=(source, dest), name=f"gzip {os.path.basename(source)}"
+        )
+        self._compressor.start()
+
+    def _rotate(self, source: str, dest: str):
+        # Renaming frees the live file immediately; gzip happens off-thread
+        pending = dest[:-len(".gz")]
+        os.replace(source, pending)
+        self._compress_in_background(pending, dest)
+
+    def wait_for_compression(self):
+        """Block until the last rotated segment has been compressed"""
+        if self._compressor is not None:
+            self._compressor.join()
+            self._compressor = None
+
+    def doRollover(self):
+        self.wait_for_compression()
+        super().doRollover()
+
+    def write_raw(self, data: bytes):
+        """Append raw bytes (child output), rotating first if they would overflow the log"""
+        self.acquire()
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.flush()
+            size = self.stream.tell()
+            if self.maxBytes > 0 and size and size + len(data) > self.maxBytes:
+                self.doRollover()
+            self.stream.buffer.write(data)
+            self.stream.buffer.flush()
+        finally:
+            self.release()
+
+    def close(self):
+        super().close()
+        self.wait_for_compression()
+
+
+def get_rotating_log(path: str) -> CompressingRotatingFileHandler:
+    """Shared handler per log file, so log records and child output rotate together"""
+    path = os.path.abspath(path)
+    with _handlers_lock:
+        handler = _handlers.get(path)
+        if handler is None:
+            handler = _handlers[path] = CompressingRotatingFileHandler(path)
+        return handler
+
+
+def close_rotating_log(path: str):
+    """Close a shared handler and wait for its pending compression"""
+    with _handlers_lock:
+        handler = _handlers.pop(os.path.abspath(path), None)
+    if handler is not None:
+        handler.close()
+
+
+def self_test() -> int:
+    """Rotate a log like GramAddict does, more times than the cap, and check retention"""
+    import logging
+    import tempfile
+
+    failures = []
+    backup_count = 3
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "selftest.log")
+        for session in range(4):
+            # Two rollovers per session, compressed once the session is over
+            handler = RotatingFileHandler(path, maxBytes=64, backupCount=2)
+            logger = logging.getLogger(f"log_rotation.selftest.{session}")
+            logger.propagate = False
+            logger.addHandler(handler)
+            for line in range(3):
+                logger.warning("session %d line %d %s", session, line, "x" * 48)
+            logger.removeHandler(handler)
+            handler.close()
+            compress_backups(path, backup_count)
+
+        segments = sorted(entry for entry in os.listdir(temp_dir) if entry != "selftest.log")
+        expected = [f"selftest.log.{i}.gz" for i in range(1, backup_count + 1)]
+        if segments != expected:
+            failures.append(f"expected {expected}, found {segments}")
+        else:
+            lines = []
+            for entry in reversed(segments):
+                with open_log(os.path.join(temp_dir, entry), "rt") as log_file:
+                    lines.extend(line.split()[:4] for line in log_file)
+            order = [(int(parts[1]), int(parts[3])) for parts in lines]
+            if order != sorted(order) or order[-1] != (3, 1):
+                failures.append(f"segments out of order: {order}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        return 1
+    print(f"✓ Rotated backups compressed and capped at {backup_count}")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--self-test" not in sys.argv[1:]:
+        print("Usage: python log_rotation.py --self-test")
+        sys.exit(1)
+    sys.exit(self_test())
@@ -2,50 +2,271 @@
 Metrics Analyzer for Instagram Bot
 Analyzes logs and JSON data to provide insights and metrics
 """
+import hashlib
 import json
 import os
 import re
+import time
+from array import array
+from bisect import bisect_left
 from datetime import datetime, timedelta
 from pathlib import Path
+from itertools import accumulate
 from typing import Optional
-from collections import defaultdict
 
-
-class MetricsAnalyzer:
-    """Analyze Instagram bot metrics from logs and JSON data"""
-
-    def __init__(self, username: str):
-        self.username = username
-        self.base_path = Path(__file__).parent
-        self.accounts_path = self.base_path / "accounts" / username
-        self.logs_path = self.base_path / "logs"
-
-        # Data storage
-        self.interacted_users = {}
-        self.sessions = []
-
-        # Load data
-        self.load_data()
-
-    def load_data(self):
-        """Load interaction and session data from JSON files"""
-        # Load interacted users
-        users_file = self.accounts_path / "interacted_users.json"
-        if users_file.exists():
-            with open(users_file, 'r', encoding='utf-8') as f:
-                self.interacted_users = json.load(f)
-
-        # Load sessions
-        sessions_file = self.accounts_path / "sessions.json"
-        if sessions_file.exists():
-            with open(sessions_file, 'r', encoding='utf-8') as f:
-                self.sessions = json.load(f)
-
-    def get_account_stats(self) -> dict:
-        """Get overall account statistics"""
-        stats = {
-            "total_interactions": len(self.interacted_users),
-            "total_sessions": len(self.sessions),
+from log_rotation import open_log
+from metrics_index import InteractionIndex
+from session_events import iter_events
+
+
+# One alternation for every counter in get_filter_effectiveness, so each log
+# line is matched in a single pass. Group names are the stats keys.
+FILTER_LOG_PATTERN = re.compile(
+    r"(?P<total_checked>@\w+: interact)"
+    r"|(?P<private_accounts>Private account\.)"
+    r"|(?P<empty_accounts>Empty account\.)"
+    r"|(?P<business_accounts>Business account\.)"
+    r"|(?P<successful_interactions>successful interaction)"
+)
+
+# Lines without any of these substrings cannot match FILTER_LOG_PATTERN,
+# which lets the scanner skip decoding and the regex engine for most lines
+FILTER_LOG_HINTS = (b": interact", b" account.", b"successful interaction")
+
+# Bytes from the start of a log kept in its checkpoint to tell a reused
+# inode apart from the file the checkpoint was taken from
+CHECKPOINT_HEAD_BYTES = 64
+
+
+def scan_filter_lines(lines, counts: dict) -> None:
+    """Add FILTER_LOG_PATTERN matches from an iterable of byte lines into counts"""
+    finditer = FILTER_LOG_PATTERN.finditer
+    for line in lines:
+        if not any(hint in line for hint in FILTER_LOG_HINTS):
+            continue
+        for match in finditer(line.decode('utf-8', errors='replace')):
+            counts[match.lastgroup] += 1
+
+
+def scan_log_file(log_file: Path, checkpoint: Optional[dict] = None) -> tuple[dict, int, dict]:
+    """
+    Count filter decisions in one log file, resuming from a checkpoint
+
+    The checkpoint records the file identity (device + inode), the head of
+    the file, the byte offset of the last complete line and the counters up
+    to that offset. It is only reused when the identity and head still match
+    and the file has not shrunk, so rotation and truncation fall back to a
+    full scan. A trailing line without a newline is counted in the result
+    but left out of the new checkpoint, since it may still be growing.
+
+    Compressed (.gz) segments are never appended to, so their checkpoint is
+    reused whole while identity, size and mtime match; otherwise they are
+    decompressed as a stream and scanned once.
+
+    Returns (counts, bytes_scanned, new_checkpoint)
+    """
+    st = log_file.stat()
+    identity = f"{st.st_dev}:{st.st_ino}"
+
+    if log_file.suffix == ".gz":
+        return scan_compressed_log(log_file, checkpoint, identity, st)
+
+    with open(log_file, 'rb') as f:
+        head = f.read(CHECKPOINT_HEAD_BYTES)
+
+        offset = 0
+        counts = dict.fromkeys(FILTER_LOG_PATTERN.groupindex, 0)
+        if (
+            checkpoint
+            and checkpoint.get("identity") == identity
+            and checkpoint.get("offset", 0) <= st.st_size
+            and head.startswith(bytes.fromhex(checkpoint.get("head", "")))
+        ):
+            offset = checkpoint["offset"]
+            counts.update(checkpoint["counts"])
+
+        f.seek(offset)
+        resume_offset = offset
+        tail = b""
+
+        def complete_lines():
+            nonlocal offset, tail
+            for line in f:
+                if not line.endswith(b"\n"):
+                    tail = line
+                    return
+                offset += len(line)
+                yield line
+
+        scan_filter_lines(complete_lines(), counts)
+
+    new_checkpoint = {
+        "identity": identity,
+        "offset": offset,
+        "head": head[:offset].hex(),
+        "counts": dict(counts),
+    }
+
+    if tail:
+        scan_filter_lines((tail,), counts)
+
+    bytes_scanned = offset - resume_offset + len(tail)
+    return counts, bytes_scanned, new_checkpoint
+
+
+def scan_compressed_log(log_file: Path, checkpoint: Optional[dict], identity: str, st) -> tuple[dict, int, dict]:
+    """scan_log_file for an immutable gzip segment"""
+    signature = {"identity": identity, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if checkpoint and all(checkpoint.get(key) == value for key, value in signature.items()):
+        return dict(checkpoint["counts"]), 0, checkpoint
+
+    counts = dict.fromkeys(FILTER_LOG_PATTERN.groupindex, 0)
+    with open_log(log_file) as f:
+        scan_filter_lines(f, counts)
+        bytes_scanned = f.tell()
+
+    return counts, bytes_scanned, {**signature, "counts": dict(counts)}
+
+
+def scan_filter_logs(
+    log_files: list[Path], checkpoints: Optional[dict] = None
+) -> tuple[dict, int, float, dict]:
+    """
+    Stream log files line by line and count filter decisions in one pass
+
+    Args:
+        log_files: Files to scan, oldest first
+        checkpoints: Previous checkpoints keyed by file identity, or None
+            to scan everything from byte zero
+
+    Returns (counts, bytes_scanned, elapsed_seconds, new_checkpoints)
+    """
+    checkpoints = checkpoints or {}
+    counts = dict.fromkeys(FILTER_LOG_PATTERN.groupindex, 0)
+    bytes_scanned = 0
+    new_checkpoints = {}
+    started = time.perf_counter()
+
+    for log_file in log_files:
+        st = log_file.stat()
+        previous = checkpoints.get(f"{st.st_dev}:{st.st_ino}")
+        file_counts, file_bytes, checkpoint = scan_log_file(log_file, previous)
+        for key, value in file_counts.items():
+            counts[key] += value
+        bytes_scanned += file_bytes
+        new_checkpoints[checkpoint["identity"]] = checkpoint
+
+    return counts, bytes_scanned, time.perf_counter() - started, new_checkpoints
+
+def iter_json_object(path: Path, chunk_size: int = 1 << 20):
+    """
+    Yield (key, value) pairs of a top-level JSON object one member at a time
+
+    Only the current member is decoded, so memory stays bounded by the
+    largest single record rather than the whole file. Values are parsed with
+    the stdlib decoder, so each record is identical to what json.load returns.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def fill() -> bool:
+            """Append the next chunk to the buffer, dropping consumed text"""
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\n\r":
+                    pos += 1
+                if pos < len(buffer) or not fill():
+                    return
+
+        def expect(chars: str) -> str:
+            skip_whitespace()
+            if pos >= len(buffer) or buffer[pos] not in chars:
+                found = buffer[pos] if pos < len(buffer) else "end of file"
+                raise ValueError(f"Expected one of {chars!r} in {path}, found {found!r}")
+            return buffer[pos]
+
+        def decode():
+            """Decode the next complete JSON value, reading more text as needed"""
+            nonlocal pos
+            skip_whitespace()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof or not fill():
+                        raise
+                    continue
+                # A number is only complete once a delimiter follows it;
+                # "-1." would otherwise decode as -1 at a chunk boundary
+                if (
+                    isinstance(value, (int, float))
+                    and not (end < len(buffer) and buffer[end] in " \t\n\r,}]")
+                    and not eof
+                    and fill()
+                ):
+                    continue
+                pos = end
+                return value
+
+        fill()
+        expect("{")
+        pos += 1
+        if expect('}"') == "}":
+            return
+
+        while True:
+            key = decode()
+            expect(":")
+            pos += 1
+            yield key, decode()
+            if expect(",}") == "}":
+                return
+            pos += 1
+
+
+# Session fields summed by get_session_stats, keyed by the stats name
+SESSION_COUNTERS = {
+    "total_interactions": "total_interactions",
+    "successful_interactions": "successful_interactions",
+    "total_likes": "total_likes",
+    "total_follows": "total_followed",
+    "total_unfollows": "total_unfollowed",
+    "total_watched": "total_watched",
+}
+
+
+def parse_session_time(value: str) -> datetime:
+    """Parse a GramAddict session timestamp ("YYYY-MM-DD HH:MM:SS.ffffff")"""
+    return datetime.fromisoformat(value.replace(" ", "T"))
+
+
+class MetricsAggregator:
+    """
+    Compute every interacted-user and session statistic in a single pass
+
+    Feed records with add_user() and add_session(), then call finish().
+    MetricsAnalyzer caches one aggregator per load and serves its public
+    getters from it, so summary and export walk the data only once.
+    Windowed session totals come from SessionIndex instead.
+    """
+
+    def __init__(self, followed_statuses: tuple = ("following", "all")):
+        self.total_users = 0
+        self.total_sessions = 0
+        self.account = {
             "users_followed": 0,
             "users_unfollowed": 0,
             "currently_following": 0,
@@ -54,71 +275,165 @@ class MetricsAnalyzer:
             "total_comments_sent": 0,
             "total_pms_sent": 0,
         }
+        self.sources = {}
+        self.followed = {status: [] for status in followed_statuses}
+
+    def add_user(self, username: str, data: dict):
+        """Fold one interacted_users.json record into every statistic"""
+        self.total_users += 1
+        account = self.account
+        followed = data.get("followed")
+        following_status = data.get("following_status")
+        liked = data.get("liked", 0)
+        source = data.get("target", "unknown")
+
+        if followed:
+            account["users_followed"] += 1
+        if data.get("unfollowed"):
+            account["users_unfollowed"] += 1
+        if following_status == "following":
+            account["currently_following"] += 1
+
+        account["total_likes_given"] += liked
+        account["total_stories_watched"] += data.get("watched", 0)
+        account["total_comments_sent"] += data.get("commented", 0)
+        account["total_pms_sent"] += 1 if data.get("pm_sent") else 0
+
+        source_stats = self.sources.get(source)
+        if source_stats is None:
+            source_stats = self.sources[source] = {
+                "total_attempts": 0,
+                "successful": 0,
+                "followed": 0,
+                "likes_given": 0,
+            }
+        source_stats["total_attempts"] += 1
+        if liked > 0 or followed:
+            source_stats["successful"] += 1
+        if followed:
+            source_stats["followed"] += 1
+        source_stats["likes_given"] += liked
+
+        if followed and "all" in self.followed:
+            self.followed["all"].append({
+                "username": username,
+                "following_status": data.get("following_status", "unknown"),
+                "last_interaction": data.get("last_interaction"),
+                "source": source,
+            })
+        if following_status in self.followed and following_status != "all":
+            self.followed[following_status].append({
+                "username": username,
+                "last_interaction": data.get("last_interaction"),
+                "source": source,
+                "liked_posts": liked,
+            })
+
+    def add_session(self, session: dict):
+        """Fold one sessions.json entry into the session count"""
+        self.total_sessions += 1
+
+    def finish(self) -> "MetricsAggregator":
+        """Sort followed lists and derive success rates once all records are in"""
+        for accounts in self.followed.values():
+            # Sort by last interaction (most recent first); records with a
+            # missing or null timestamp go last instead of breaking the sort
+            accounts.sort(key=lambda x: x.get("last_interaction") or "", reverse=True)
+
+        for stats in self.sources.values():
+            if stats["total_attempts"] > 0:
+                stats["success_rate"] = round(
+                    (stats["successful"] / stats["total_attempts"]) * 100, 1
+                )
+            else:
+                stats["success_rate"] = 0
+
+        return self
+
+    def account_stats(self) -> dict:
+        return {
+            "total_interactions": self.total_users,
+            "total_sessions": self.total_sessions,
+            **self.account,
+        }
 
-        for username, data in self.interacted_users.items():
-            if data.get("followed"):
-                stats["users_followed"] += 1
-            if data.get("unfollowed"):
-                stats["users_unfollowed"] += 1
-            if data.get("following_status") == "following":
-                stats["currently_following"] += 1
 
-            stats["total_likes_given"] += data.get("liked", 0)
-            stats["total_stories_watched"] += data.get("watched", 0)
-            stats["total_comments_sent"] += data.get("commented", 0)
-            stats["total_pms_sent"] += 1 if data.get("pm_sent") else 0
+class SessionIndex:
+    """
+    Sessions sorted by start time with prefix sums for windowed totals
 
-        return stats
+    Timestamps are parsed once, when the index is built. A "last N days"
+    query is then a binary search for the cutoff plus prefix-sum lookups,
+    instead of re-parsing and rescanning every session. Times are kept as
+    integer microseconds of naive local time, so cutoff comparisons and
+    duration totals are exact.
+    """
 
-    def get_session_stats(self, days: int = 7) -> dict:
-        """Get session statistics for last N days"""
-        cutoff_date = datetime.now() - timedelta(days=days)
-        recent_sessions = []
+    EPOCH = datetime(1970, 1, 1)
+
+    def __init__(self, sessions: list[dict]):
+        entries = []
+        for session in sessions:
+            start = session.get("start_time", "")
+            if not start:
+                continue
+            try:
+                start_us = self.to_micros(parse_session_time(start))
+            except ValueError:
+                continue
 
-        for session in self.sessions:
-            start_time_str = session.get("start_time", "")
-            if start_time_str:
+            duration_us = None
+            finish = session.get("finish_time")
+            if finish:
                 try:
-                    start_time = datetime.fromisoformat(start_time_str.replace(" ", "T"))
-                    if start_time >= cutoff_date:
-                        recent_sessions.append(session)
+                    duration_us = self.to_micros(parse_session_time(finish)) - start_us
                 except ValueError:
-                    continue
+                    pass
+
+            entries.append((start_us, duration_us, session))
 
-        if not recent_sessions:
+        entries.sort(key=lambda entry: entry[0])
+
+        self.starts = array("q", (start_us for start_us, _, _ in entries))
+        self.prefix = {
+            name: list(accumulate((session.get(field, 0) for _, _, session in entries), initial=0))
+            for name, field in SESSION_COUNTERS.items()
+        }
+        self.duration_us = list(accumulate(
+            (duration_us or 0 for _, duration_us, _ in entries), initial=0
+        ))
+        self.duration_count = list(accumulate(
+            (duration_us is not None for _, duration_us, _ in entries), initial=0
+        ))
+
+    @classmethod
+    def to_micros(cls, value: datetime) -> int:
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return (value - cls.EPOCH) // timedelta(microseconds=1)
+
+    def stats(self, days: int, now: Optional[datetime] = None) -> dict:
+        """Session statistics for sessions started in the last N days"""
+        cutoff = self.to_micros((now or datetime.now()) - timedelta(days=days))
+        first = bisect_left(self.starts, cutoff)
+        last = len(self.starts)
+
+        if first == last:
             return {"message": f"No sessions in last {days} days"}
 
         stats = {
             "period_days": days,
-            "total_sessions": len(recent_sessions),
-            "total_interactions": sum(s.get("total_interactions", 0) for s in recent_sessions),
-            "successful_interactions": sum(s.get("successful_interactions", 0) for s in recent_sessions),
-            "total_likes": sum(s.get("total_likes", 0) for s in recent_sessions),
-            "total_follows": sum(s.get("total_followed", 0) for s in recent_sessions),
-            "total_unfollows": sum(s.get("total_unfollowed", 0) for s in recent_sessions),
-            "total_watched": sum(s.get("total_watched", 0) for s in recent_sessions),
+            "total_sessions": last - first,
+            **{name: prefix[last] - prefix[first] for name, prefix in self.prefix.items()},
             "avg_session_duration_minutes": 0,
             "success_rate": 0,
         }
 
-        # Calculate average session duration
-        durations = []
-        for session in recent_sessions:
-            start = session.get("start_time")
-            finish = session.get("finish_time")
-            if start and finish:
-                try:
-                    start_dt = datetime.fromisoformat(start.replace(" ", "T"))
-                    finish_dt = datetime.fromisoformat(finish.replace(" ", "T"))
-                    duration = (finish_dt - start_dt).total_seconds() / 60
-                    durations.append(duration)
-                except ValueError:
-                    continue
-
+        durations = self.duration_count[last] - self.duration_count[first]
         if durations:
-            stats["avg_session_duration_minutes"] = round(sum(durations) / len(durations), 2)
+            total_minutes = (self.duration_us[last] - self.duration_us[first]) / 60_000_000
+            stats["avg_session_duration_minutes"] = round(total_minutes / durations, 2)
 
-        # Calculate success rate
         if stats["total_interactions"] > 0:
             stats["success_rate"] = round(
                 (stats["successful_interactions"] / stats["total_interactions"]) * 100, 1
@@ -126,149 +441,489 @@ class MetricsAnalyzer:
 
         return stats
 
-    def get_followed_accounts(self, status: str = "following") -> list[dict]:
+
+class SessionRollups:
+    """
+    Hourly and daily rollups of sessions, persisted next to sessions.json
+
+    GramAddict only ever appends to sessions.json, so the store remembers
+    how many sessions it has folded in plus a fingerprint of the last one,
+    and update() only folds the new tail. If earlier entries changed, the
+    rollups are rebuilt from scratch. Follower growth snapshots are kept in
+    the same store.
+    """
+
+    VERSION = 1
+    GRANULARITIES = {"hourly": "%Y-%m-%d %H:00", "daily": "%Y-%m-%d"}
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.reset()
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == self.VERSION:
+                    self.sessions_seen = data["sessions_seen"]
+                    self.last_fingerprint = data["last_fingerprint"]
+                    self.buckets = data["buckets"]
+                    self.growth = data["growth"]
+            except (OSError, ValueError, KeyError):
+                # A damaged store is rebuilt on the next update
+                self.reset()
+
+    def reset(self):
+        self.sessions_seen = 0
+        self.last_fingerprint = None
+        self.buckets = {granularity: {} for granularity in self.GRANULARITIES}
+        self.growth = []
+
+    @staticmethod
+    def fingerprint(session: dict) -> str:
+        encoded = json.dumps(session, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha1(encoded).hexdigest()
+
+    def update(self, sessions: list[dict]) -> int:
         """
-        Get list of followed accounts
+        Fold sessions appended since the last update into the rollups
+
+        Returns the number of sessions folded in
+        """
+        seen = self.sessions_seen
+        if seen and (
+            len(sessions) < seen
+            or self.fingerprint(sessions[seen - 1]) != self.last_fingerprint
+        ):
+            self.reset()
+            seen = 0
+
+        new_sessions = sessions[seen:]
+        for session in new_sessions:
+            self.add_session(session)
+
+        if new_sessions:
+            self.sessions_seen = len(sessions)
+            self.last_fingerprint = self.fingerprint(sessions[-1])
+        return len(new_sessions)
+
+    def add_session(self, session: dict):
+        start = session.get("start_time") or ""
+        try:
+            start_dt = parse_session_time(start)
+        except ValueError:
+            start_dt = None
+
+        if start_dt is not None:
+            for granularity, key_format in self.GRANULARITIES.items():
+                key = start_dt.strftime(key_format)
+                bucket = self.buckets[granularity].get(key)
+                if bucket is None:
+                    bucket = self.buckets[granularity][key] = {
+                        "sessions": 0, **dict.fromkeys(SESSION_COUNTERS, 0)
+                    }
+                bucket["sessions"] += 1
+                for name, field in SESSION_COUNTERS.items():
+                    bucket[name] += session.get(field, 0)
+
+        profile_data = session.get("profile_data", {})
+        if start and profile_data:
+            parts = start.split()
+            self.growth.append({
+                "date": parts[0],  # Extract date
+                "time": parts[1] if len(parts) > 1 else "",
+                "followers": profile_data.get("followers", 0),
+                "following": profile_data.get("following", 0),
+                "posts": profile_data.get("posts", 0),
+            })
+
+    def save(self):
+        """Persist the rollups atomically"""
+        temp_file = self.path.with_suffix(".json.tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": self.VERSION,
+                "sessions_seen": self.sessions_seen,
+                "last_fingerprint": self.last_fingerprint,
+                "buckets": self.buckets,
+                "growth": self.growth,
+            }, f)
+        os.replace(temp_file, self.path)
+
+    def series(
+        self,
+        granularity: str = "daily",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> list[dict]:
+        """
+        Time series of bucket totals, oldest first
 
         Args:
-            status: "following", "unfollowed", or "all"
+            granularity: "hourly" or "daily"
+            start, end: Optional inclusive bounds on the bucket key; a date
+                as end includes every hour of that day
         """
-        accounts = []
-
-        for username, data in self.interacted_users.items():
-            if status == "all":
-                if data.get("followed"):
-                    accounts.append({
-                        "username": username,
-                        "following_status": data.get("following_status", "unknown"),
-                        "last_interaction": data.get("last_interaction"),
-                        "source": data.get("target", "unknown"),
-                    })
-            elif data.get("following_status") == status:
-                accounts.append({
-                    "username": username,
-                    "last_interaction": data.get("last_interaction"),
-                    "source": data.get("target", "unknown"),
-                    "liked_posts": data.get("liked", 0),
-                })
-
-        # Sort by last interaction (most recent first)
-        accounts.sort(key=lambda x: x.get("last_interaction", ""), reverse=True)
-        return accounts
+        series = []
+        for key in sorted(self.buckets[granularity]):
+            if start and key < start:
+                continue
+            if end and key > end and not key.startswith(end):
+                break
+            bucket = self.buckets[granularity][key]
+            series.append({
+                "bucket": key,
+                **bucket,
+                "success_rate": round(
+                    (bucket["successful_interactions"] / bucket["total_interactions"]) * 100, 1
+                ) if bucket["total_interactions"] > 0 else 0,
+            })
+        return series
 
-    def get_source_performance(self) -> dict:
-        """Analyze performance by source (hashtags, bloggers, etc.)"""
-        sources = defaultdict(lambda: {
-            "total_attempts": 0,
-            "successful": 0,
-            "followed": 0,
-            "likes_given": 0,
-        })
 
-        for username, data in self.interacted_users.items():
-            source = data.get("target", "unknown")
-            sources[source]["total_attempts"] += 1
+class MetricsAnalyzer:
+    """Analyze Instagram bot metrics from logs and JSON data"""
 
-            if data.get("liked", 0) > 0 or data.get("followed"):
-                sources[source]["successful"] += 1
+    def __init__(
+        self,
+        username: str,
+        incremental_logs: bool = True,
+        use_index: bool = False,
+        streaming: bool = False,
+        base_path: Optional[Path] = None,
+    ):
+        self.username = username
+        self.incremental_logs = incremental_logs
+        self.use_index = use_index
+        self.streaming = streaming
+        self.base_path = Path(base_path) if base_path else Path(__file__).parent
+        self.accounts_path = self.base_path / "accounts" / username
+        self.logs_path = self.base_path / "logs"
+        self.checkpoints_path = self.base_path / "metrics" / "checkpoints"
 
-            if data.get("followed"):
-                sources[source]["followed"] += 1
+        # Data storage
+        self._interacted_users = {}
+        self.sessions = []
+        self.index: Optional[InteractionIndex] = None
+        self._aggregates: Optional[MetricsAggregator] = None
+        self.session_index = SessionIndex([])
+        self._rollups: Optional[SessionRollups] = None
 
-            sources[source]["likes_given"] += data.get("liked", 0)
+        # Load data
+        self.load_data()
 
-        # Calculate success rates
-        for source, stats in sources.items():
-            if stats["total_attempts"] > 0:
-                stats["success_rate"] = round(
-                    (stats["successful"] / stats["total_attempts"]) * 100, 1
+    @property
+    def interacted_users(self) -> dict:
+        """Interacted users mapping, loaded on first access in index or streaming mode"""
+        if self._interacted_users is None:
+            users_file = self.accounts_path / "interacted_users.json"
+            with open(users_file, 'r', encoding='utf-8') as f:
+                self._interacted_users = json.load(f)
+        return self._interacted_users
+
+    @interacted_users.setter
+    def interacted_users(self, value: dict):
+        self._interacted_users = value
+
+    def iter_interacted_users(self):
+        """
+        Yield (username, record) pairs of interacted users
+
+        In streaming mode records are parsed from disk one at a time instead
+        of materializing the whole mapping.
+        """
+        if self._interacted_users is not None:
+            yield from self._interacted_users.items()
+            return
+
+        yield from iter_json_object(self.accounts_path / "interacted_users.json")
+
+    def load_data(self):
+        """Load interaction and session data from JSON files"""
+        self._aggregates = None
+        self._rollups = None
+
+        # Load interacted users, or only refresh the index when it is enabled
+        users_file = self.accounts_path / "interacted_users.json"
+        if users_file.exists():
+            if self.use_index:
+                self.index = InteractionIndex(
+                    users_file, self.accounts_path / "interacted_users.sqlite"
                 )
+                if self.streaming:
+                    self.index.refresh(records=lambda: iter_json_object(users_file))
+                else:
+                    self.index.refresh()
+                self._interacted_users = None
+            elif self.streaming:
+                self._interacted_users = None
             else:
-                stats["success_rate"] = 0
+                with open(users_file, 'r', encoding='utf-8') as f:
+                    self._interacted_users = json.load(f)
+
+        # Load sessions
+        sessions_file = self.accounts_path / "sessions.json"
+        if sessions_file.exists():
+            with open(sessions_file, 'r', encoding='utf-8') as f:
+                self.sessions = json.load(f)
+        self.session_index = SessionIndex(self.sessions)
+
+    @property
+    def aggregates(self) -> MetricsAggregator:
+        """Statistics from one pass over users and sessions, cached until load_data"""
+        if self._aggregates is None:
+            # Streaming keeps memory flat: followed lists are built by a
+            # separate pass only when get_followed_accounts asks for them
+            aggregator = MetricsAggregator(followed_statuses=() if self.streaming else ("following", "all"))
+            if self.index:
+                # Indexed SQL aggregates stand in for the user half of the pass
+                indexed = self.index.get_account_stats()
+                aggregator.total_users = indexed.pop("total_interactions")
+                aggregator.account.update(indexed)
+                aggregator.sources = self.index.get_source_performance()
+                for status in aggregator.followed:
+                    aggregator.followed[status] = self.index.get_followed_accounts(status)
+            else:
+                for username, data in self.iter_interacted_users():
+                    aggregator.add_user(username, data)
+
+            for session in self.sessions:
+                aggregator.add_session(session)
+
+            self._aggregates = aggregator.finish()
+        return self._aggregates
+
+    def get_account_stats(self) -> dict:
+        """Get overall account statistics"""
+        return self.aggregates.account_stats()
+
+    def get_session_stats(self, days: int = 7) -> dict:
+        """Get session statistics for last N days"""
+        return self.session_index.stats(days)
+
+    def get_followed_accounts(self, status: str = "following") -> list[dict]:
+        """
+        Get list of followed accounts
+
+        Args:
+            status: "following", "unfollowed", or "all"
+        """
+        aggregates = self.aggregates
+        if status not in aggregates.followed:
+            if self.index:
+                accounts = self.index.get_followed_accounts(status)
+            else:
+                extra = MetricsAggregator(followed_statuses=(status,))
+                for username, data in self.iter_interacted_users():
+                    extra.add_user(username, data)
+                accounts = extra.finish().followed[status]
+            aggregates.followed[status] = accounts
+        return list(aggregates.followed[status])
+
+    def get_source_performance(self) -> dict:
+        """Analyze performance by source (hashtags, bloggers, etc.)"""
+        return {source: dict(stats) for source, stats in self.aggregates.sources.items()}
 
-        return dict(sources)
+    def get_log_files(self) -> list[Path]:
+        """
+        List the account log and its rotated backups, oldest first
 
-    def get_filter_effectiveness(self) -> dict:
-        """Analyze filter effectiveness from recent logs"""
+        GramAddict rotates `<username>.log` into `<username>.log.1`,
+        `<username>.log.2`, ... where a higher suffix means an older file.
+        After each session runner.py compresses those into
+        `<username>.log.N.gz`; plain backups GramAddict rotated since then
+        are newer than every compressed one.
+        """
         log_file = self.logs_path / f"{self.username}.log"
-        if not log_file.exists():
+        backups = []
+        for path in self.logs_path.glob(f"{self.username}.log.*"):
+            suffix = path.name[len(log_file.name) + 1:]
+            plain = suffix.isdigit()
+            suffix = suffix.removesuffix(".gz")
+            if suffix.isdigit():
+                backups.append((plain, -int(suffix), path))
+
+        files = [path for _, _, path in sorted(backups)]
+        if log_file.exists():
+            files.append(log_file)
+        return files
+
+    def load_log_checkpoints(self) -> dict:
+        """Load log scan checkpoints from the previous run, if any"""
+        checkpoint_file = self.checkpoints_path / f"{self.username}_filters.json"
+        if not checkpoint_file.exists():
+            return {}
+
+        try:
+            with open(checkpoint_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get("files", {})
+        except (OSError, ValueError, AttributeError):
+            # A damaged checkpoint only costs one full rescan
+            return {}
+
+    def save_log_checkpoints(self, checkpoints: dict):
+        """Persist log scan checkpoints atomically"""
+        self.checkpoints_path.mkdir(parents=True, exist_ok=True)
+        checkpoint_file = self.checkpoints_path / f"{self.username}_filters.json"
+        temp_file = checkpoint_file.with_suffix(".json.tmp")
+
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({"updated_at": datetime.now().isoformat(), "files": checkpoints}, f)
+        os.replace(temp_file, checkpoint_file)
+
+    def get_filter_effectiveness(self, incremental: Optional[bool] = None) -> dict:
+        """
+        Analyze filter effectiveness from the account log and its rotated backups
+
+        Args:
+            incremental: Resume from the checkpoint of the previous run and
+                only parse bytes appended since then. False rescans everything.
+                Defaults to the analyzer's incremental_logs setting.
+        """
+        log_files = self.get_log_files()
+        if not log_files:
             return {"error": "Log file not found"}
 
+        if incremental is None:
+            incremental = self.incremental_logs
+
+        try:
+            previous = self.load_log_checkpoints() if incremental else {}
+            counts, bytes_scanned, elapsed, checkpoints = scan_filter_logs(log_files, previous)
+            self.save_log_checkpoints(checkpoints)
+        except Exception as e:
+            return {"error": str(e)}
+
         stats = {
-            "total_checked": 0,
-            "private_accounts": 0,
-            "empty_accounts": 0,
-            "business_accounts": 0,
-            "successful_interactions": 0,
+            "total_checked": counts["total_checked"],
+            "private_accounts": counts["private_accounts"],
+            "empty_accounts": counts["empty_accounts"],
+            "business_accounts": counts["business_accounts"],
+            "successful_interactions": counts["successful_interactions"],
             "rejection_rate": 0,
+            "log_files": len(log_files),
+            "bytes_scanned": bytes_scanned,
+            "scan_seconds": round(elapsed, 3),
+            "throughput_mb_s": round(bytes_scanned / 1_000_000 / elapsed, 1) if elapsed > 0 else 0,
         }
 
-        try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-                # Count interactions
-                stats["total_checked"] = len(re.findall(r'@\w+: interact', content))
-                stats["private_accounts"] = len(re.findall(r'Private account\.', content))
-                stats["empty_accounts"] = len(re.findall(r'Empty account\.', content))
-                stats["business_accounts"] = len(re.findall(r'Business account\.', content))
-                stats["successful_interactions"] = len(re.findall(r'successful interaction', content))
-
-                # Calculate rejection rate
-                total_rejections = (
-                    stats["private_accounts"] +
-                    stats["empty_accounts"] +
-                    stats["business_accounts"]
-                )
-
-                if stats["total_checked"] > 0:
-                    stats["rejection_rate"] = round(
-                        (total_rejections / stats["total_checked"]) * 100, 1
-                    )
+        # Calculate rejection rate
+        total_rejections = (
+            stats["private_accounts"] +
+            stats["empty_accounts"] +
+            stats["business_accounts"]
+        )
 
-        except Exception as e:
-            return {"error": str(e)}
+        if stats["total_checked"] > 0:
+            stats["rejection_rate"] = round(
+                (total_rejections / stats["total_checked"]) * 100, 1
+            )
 
         return stats
 
-    def get_follower_growth(self) -> list[dict]:
-        """Get follower/following counts from session data"""
-        growth = []
+    def get_event_files(self) -> list[Path]:
+        """Event files the runner wrote next to its logs, oldest first"""
+        paths = [*self.logs_path.rglob("*.events.jsonl"), *self.logs_path.rglob("*.events.jsonl.*.gz")]
+        return sorted(paths, key=lambda path: path.stat().st_mtime)
 
-        for session in self.sessions:
-            start_time = session.get("start_time")
-            profile_data = session.get("profile_data", {})
+    def get_event_summary(self) -> dict:
+        """
+        Summarize the runner's structured session events for this account
 
-            if start_time and profile_data:
-                growth.append({
-                    "date": start_time.split()[0],  # Extract date
-                    "time": start_time.split()[1] if len(start_time.split()) > 1 else "",
-                    "followers": profile_data.get("followers", 0),
-                    "following": profile_data.get("following", 0),
-                    "posts": profile_data.get("posts", 0),
-                })
+        Reads pre-parsed events instead of scanning the raw text logs.
+        """
+        summary = {
+            "runs": 0,
+            "timed_out": 0,
+            "interactions": 0,
+            "likes": 0,
+            "follows": 0,
+            "rejections": {},
+            "rejection_rate": 0,
+            "last_summary": None,
+        }
 
-        return growth
+        for event in iter_events(self.get_event_files(), account=self.username):
+            event_type = event["type"]
+            if event_type == "session_end":
+                summary["runs"] += 1
+                if event.get("reason"):
+                    summary["timed_out"] += 1
+            elif event_type == "interaction_start":
+                summary["interactions"] += 1
+            elif event_type == "like":
+                summary["likes"] += event.get("count", 1)
+            elif event_type == "follow":
+                summary["follows"] += 1
+            elif event_type == "filter_rejected":
+                reason = event.get("reason", "unknown")
+                summary["rejections"][reason] = summary["rejections"].get(reason, 0) + 1
+            elif event_type == "session_summary":
+                summary["last_summary"] = event
+
+        if summary["interactions"] > 0:
+            summary["rejection_rate"] = round(
+                sum(summary["rejections"].values()) / summary["interactions"] * 100, 1
+            )
 
-    def export_metrics_to_json(self, output_file: Optional[str] = None):
-        """Export all metrics to JSON file"""
-        if output_file is None:
-            output_file = self.base_path / "metrics" / f"{self.username}_metrics.json"
-        else:
-            output_file = Path(output_file)
+        return summary
+
+    @property
+    def rollups(self) -> SessionRollups:
+        """Hourly/daily session rollups, brought up to date with sessions.json"""
+        if self._rollups is None:
+            rollups = SessionRollups(self.accounts_path / "rollups.json")
+            if rollups.update(self.sessions) and self.accounts_path.exists():
+                rollups.save()
+            self._rollups = rollups
+        return self._rollups
+
+    def get_timeseries(
+        self,
+        granularity: str = "daily",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> list[dict]:
+        """
+        Get likes, follows, unfollows, watched, interactions and success
+        rate per hour or day
 
-        output_file.parent.mkdir(exist_ok=True)
+        Args:
+            granularity: "hourly" or "daily"
+            start, end: Optional inclusive bounds, e.g. "2025-12-01"
+        """
+        return self.rollups.series(granularity, start, end)
+
+    def get_follower_growth(self) -> list[dict]:
+        """Get follower/following counts from session data"""
+        return list(self.rollups.growth)
 
+    def collect_metrics(self, include_followed: bool = True) -> dict:
+        """Collect every metric into one JSON-serializable dict"""
         metrics = {
             "username": self.username,
             "generated_at": datetime.now().isoformat(),
             "account_stats": self.get_account_stats(),
             "recent_sessions": self.get_session_stats(days=7),
-            "followed_accounts": self.get_followed_accounts(status="following"),
             "source_performance": self.get_source_performance(),
             "filter_effectiveness": self.get_filter_effectiveness(),
             "follower_growth": self.get_follower_growth(),
         }
+        if include_followed:
+            # Only built on request; in streaming mode it costs another pass
+            metrics["followed_accounts"] = self.get_followed_accounts(status="following")
+        return metrics
+
+    def export_metrics_to_json(self, output_file: Optional[str] = None):
+        """Export all metrics to JSON file"""
+        if output_file is None:
+            output_file = self.base_path / "metrics" / f"{self.username}_metrics.json"
+        else:
+            output_file = Path(output_file)
+
+        output_file.parent.mkdir(exist_ok=True)
+
+        metrics = self.collect_metrics()
 
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(metrics, f, indent=2, ensure_ascii=False)
@@ -310,6 +965,11 @@ class MetricsAnalyzer:
             print(f"  Private accounts: {filter_stats['private_accounts']}")
             print(f"  Empty accounts: {filter_stats['empty_accounts']}")
             print(f"  Rejection rate: {filter_stats['rejection_rate']}%")
+            print(
+                f"  Scanned {filter_stats['log_files']} log file(s), "
+                f"{filter_stats['bytes_scanned'] / 1_000_000:.1f} MB "
+                f"in {filter_stats['scan_seconds']}s ({filter_stats['throughput_mb_s']} MB/s)"
+            )
 
         # Top sources
         print(f"\n🎯 Top Sources (by interactions):")
@@ -327,23 +987,283 @@ class MetricsAnalyzer:
         print(f"\n{'='*60}\n")
 
 
+def discover_accounts(base_path: Optional[Path] = None) -> list[str]:
+    """Find account directories under accounts/ that hold GramAddict data"""
+    accounts_root = (base_path or Path(__file__).parent) / "accounts"
+    if not accounts_root.is_dir():
+        return []
+
+    return sorted(
+        path.name
+        for path in accounts_root.iterdir()
+        if path.is_dir()
+        and ((path / "interacted_users.json").exists() or (path / "sessions.json").exists())
+    )
+
+
+def analyze_account(username: str, options: dict) -> dict:
+    """Process pool worker: collect metrics for one account"""
+    try:
+        analyzer = MetricsAnalyzer(username, **options)
+        return analyzer.collect_metrics(include_followed=False)
+    except Exception as e:
+        return {"username": username, "error": str(e)}
+
+
+def _sum_into(total: dict, values: dict, keys):
+    for key in keys:
+        total[key] = total.get(key, 0) + values.get(key, 0)
+
+
+def merge_fleet_metrics(results: list[dict]) -> dict:
+    """Merge per-account metrics from analyze_account into fleet totals"""
+    account_keys = (
+        "total_interactions", "total_sessions", "users_followed", "users_unfollowed",
+        "currently_following", "total_likes_given", "total_stories_watched",
+        "total_comments_sent", "total_pms_sent",
+    )
+    filter_keys = (
+        "total_checked", "private_accounts", "empty_accounts", "business_accounts",
+        "successful_interactions", "log_files", "bytes_scanned",
+    )
+
+    account_stats = dict.fromkeys(account_keys, 0)
+    sessions = dict.fromkeys(("total_sessions", *SESSION_COUNTERS), 0)
+    duration_minutes = 0
+    sources = {}
+    filters = dict.fromkeys(filter_keys, 0)
+
+    for metrics in results:
+        if "error" in metrics:
+            continue
+
+        _sum_into(account_stats, metrics["account_stats"], account_keys)
+
+        recent = metrics["recent_sessions"]
+        if "message" not in recent:
+            _sum_into(sessions, recent, sessions)
+            duration_minutes += recent["avg_session_duration_minutes"] * recent["total_sessions"]
+
+        for source, stats in metrics["source_performance"].items():
+            _sum_into(
+                sources.setdefault(source, {}), stats,
+                ("total_attempts", "successful", "followed", "likes_given"),
+            )
+
+        if "error" not in metrics["filter_effectiveness"]:
+            _sum_into(filters, metrics["filter_effectiveness"], filter_keys)
+
+    for stats in sources.values():
+        stats["success_rate"] = round(
+            (stats["successful"] / stats["total_attempts"]) * 100, 1
+        ) if stats["total_attempts"] > 0 else 0
+
+    if sessions["total_sessions"]:
+        # Weighted by session count; per-account averages hide the sample sizes
+        sessions["avg_session_duration_minutes"] = round(
+            duration_minutes / sessions["total_sessions"], 2
+        )
+        sessions["success_rate"] = round(
+            (sessions["successful_interactions"] / sessions["total_interactions"]) * 100, 1
+        ) if sessions["total_interactions"] > 0 else 0
+        sessions = {"period_days": 7, **sessions}
+    else:
+        sessions = {"message": "No sessions in last 7 days"}
+
+    rejections = filters["private_accounts"] + filters["empty_accounts"] + filters["business_accounts"]
+    filters["rejection_rate"] = round(
+        (rejections / filters["total_checked"]) * 100, 1
+    ) if filters["total_checked"] > 0 else 0
+
+    return {
+        "account_stats": account_stats,
+        "recent_sessions": sessions,
+        "source_performance": sources,
+        "filter_effectiveness": filters,
+    }
+
+
+def analyze_fleet(
+    usernames: Optional[list[str]] = None,
+    workers: Optional[int] = None,
+    **options,
+) -> dict:
+    """
+    Analyze many accounts in parallel on a process pool
+
+    Args:
+        usernames: Accounts to analyze, defaults to every discovered account
+        workers: Pool size, defaults to the CPU count
+        options: MetricsAnalyzer keyword arguments applied to every account
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    usernames = usernames if usernames is not None else discover_accounts()
+    started = time.perf_counter()
+
+    results = []
+    if usernames:
+        workers = min(workers or os.cpu_count() or 1, len(usernames))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(analyze_account, usernames, [options] * len(usernames)))
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "accounts": usernames,
+        "analysis_seconds": round(time.perf_counter() - started, 2),
+        "fleet": merge_fleet_metrics(results),
+        "per_account": {metrics["username"]: metrics for metrics in results},
+    }
+
+
+def export_fleet_metrics(report: dict, output_file: Optional[str] = None) -> Path:
+    """Export a fleet report from analyze_fleet to JSON"""
+    if output_file is None:
+        output_file = Path(__file__).parent / "metrics" / "fleet_metrics.json"
+    else:
+        output_file = Path(output_file)
+
+    output_file.parent.mkdir(exist_ok=True)
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    return output_file
+
+
+def print_fleet_summary(report: dict):
+    """Print a formatted fleet summary to console"""
+    fleet = report["fleet"]
+
+    print(f"\n{'='*60}")
+    print(f"📊 Instagram Bot Metrics - Fleet ({len(report['accounts'])} accounts)")
+    print(f"{'='*60}\n")
+
+    stats = fleet["account_stats"]
+    print("📈 Overall Statistics:")
+    print(f"  Total interactions: {stats['total_interactions']}")
+    print(f"  Users followed: {stats['users_followed']}")
+    print(f"  Currently following: {stats['currently_following']}")
+    print(f"  Likes given: {stats['total_likes_given']}")
+
+    print(f"\n📅 Last 7 Days:")
+    session_stats = fleet["recent_sessions"]
+    if "message" not in session_stats:
+        print(f"  Sessions: {session_stats['total_sessions']}")
+        print(f"  Interactions: {session_stats['total_interactions']}")
+        print(f"  Success rate: {session_stats['success_rate']}%")
+    else:
+        print(f"  {session_stats['message']}")
+
+    print(f"\n🔍 Filter Effectiveness:")
+    filter_stats = fleet["filter_effectiveness"]
+    print(f"  Accounts checked: {filter_stats['total_checked']}")
+    print(f"  Rejection rate: {filter_stats['rejection_rate']}%")
+
+    print(f"\n👥 Per Account:")
+    for username, metrics in report["per_account"].items():
+        if "error" in metrics:
+            print(f"  @{username}: ERROR {metrics['error']}")
+            continue
+        account = metrics["account_stats"]
+        print(f"  @{username}: {account['total_interactions']} interactions, "
+              f"{account['currently_following']} following, {account['total_sessions']} sessions")
+
+    print(f"\n  Analyzed in {report['analysis_seconds']}s")
+    print(f"\n{'='*60}\n")
+
+
+def self_test() -> int:
+    """Check every loading mode on a small dataset with null and missing timestamps"""
+    import tempfile
+
+    users = {
+        "recent": {"followed": True, "following_status": "following", "last_interaction": "2025-03-02 10:00:00.000000", "target": "#python"},
+        "older": {"followed": True, "following_status": "following", "last_interaction": "2025-03-01 10:00:00.000000", "target": "#python"},
+        "null_time": {"followed": True, "following_status": "following", "last_interaction": None, "target": "#devops"},
+        "no_time": {"followed": True, "following_status": "unfollowed", "unfollowed": True, "target": "#devops"},
+        "liked_only": {"liked": 2, "last_interaction": None, "target": "#aws"},
+    }
+    failures = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        base = Path(temp_dir)
+        account_dir = base / "accounts" / "selftest"
+        account_dir.mkdir(parents=True)
+        (account_dir / "interacted_users.json").write_text(json.dumps(users))
+
+        for mode in ({}, {"streaming": True}, {"use_index": True}):
+            try:
+                analyzer = MetricsAnalyzer("selftest", base_path=base, **mode)
+                stats = analyzer.get_account_stats()
+                following = [account["username"] for account in analyzer.get_followed_accounts("following")]
+                followed = analyzer.get_followed_accounts("all")
+            except Exception as e:
+                failures.append(f"{mode or 'default'}: {type(e).__name__}: {e}")
+                continue
+            if stats["users_followed"] != 4 or stats["currently_following"] != 3:
+                failures.append(f"{mode or 'default'}: unexpected stats {stats}")
+            if following != ["recent", "older", "null_time"] or len(followed) != 4:
+                failures.append(f"{mode or 'default'}: unexpected followed order {following}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        return 1
+    print("✓ Metrics analyzer OK with null and missing timestamps")
+    return 0
+
+
 def main():
     """CLI interface for metrics analyzer"""
     import sys
 
-    if len(sys.argv) < 2:
-        print("Usage: python metrics_analyzer.py <username> [command]")
+    options = {arg for arg in sys.argv[1:] if arg.startswith("--")}
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+
+    if "--self-test" in options:
+        sys.exit(self_test())
+
+    if len(args) < 1:
+        print("Usage: python metrics_analyzer.py <username|all> [command] [options]")
         print("\nCommands:")
         print("  summary       - Print summary (default)")
         print("  export        - Export metrics to JSON")
         print("  followed      - List followed accounts")
         print("  sources       - Show source performance")
+        print("  timeseries    - Daily totals (add 'hourly' for hourly buckets)")
+        print("  events        - Summarize the runner's structured session events")
+        print("\nUse 'all' as username to analyze every account under accounts/ in")
+        print("parallel (commands: summary, export)")
+        print("\nOptions:")
+        print("  --full-rescan - Ignore log checkpoints and parse logs from the start")
+        print("  --index       - Query interacted users through the SQLite index")
+        print("  --stream      - Parse interacted_users.json one record at a time")
+        print("  --self-test   - Check the analyzer on a built-in dataset and exit")
         sys.exit(1)
 
-    username = sys.argv[1]
-    command = sys.argv[2] if len(sys.argv) > 2 else "summary"
+    username = args[0]
+    command = args[1] if len(args) > 1 else "summary"
 
-    analyzer = MetricsAnalyzer(username)
+    analyzer_options = {
+        "incremental_logs": "--full-rescan" not in options,
+        "use_index": "--index" in options,
+        "streaming": "--stream" in options,
+    }
+
+    if username == "all":
+        if command not in ("summary", "export"):
+            print(f"Unknown fleet command: {command}")
+            sys.exit(1)
+
+        report = analyze_fleet(**analyzer_options)
+        if command == "summary":
+            print_fleet_summary(report)
+        else:
+            output_file = export_fleet_metrics(report)
+            print(f"✓ Fleet metrics exported to: {output_file}")
+        return
+
+    analyzer = MetricsAnalyzer(username, **analyzer_options)
 
     if command == "summary":
         analyzer.print_summary()
@@ -366,6 +1286,28 @@ def main():
             print(f"  {source}:")
             print(f"    Attempts: {data['total_attempts']}, Success: {data['success_rate']}%, Followed: {data['followed']}")
 
+    elif command == "timeseries":
+        granularity = args[2] if len(args) > 2 else "daily"
+        if granularity not in SessionRollups.GRANULARITIES:
+            print(f"Unknown granularity: {granularity}")
+            sys.exit(1)
+        print(f"\n📈 {granularity.capitalize()} Activity:\n")
+        for bucket in analyzer.get_timeseries(granularity):
+            print(f"  {bucket['bucket']}: {bucket['sessions']} sessions, "
+                  f"{bucket['total_interactions']} interactions, {bucket['total_likes']} likes, "
+                  f"{bucket['total_follows']} follows, {bucket['total_unfollows']} unfollows, "
+                  f"{bucket['total_watched']} watched, {bucket['success_rate']}% success")
+
+    elif command == "events":
+        events = analyzer.get_event_summary()
+        print(f"\n🧾 Session Events ({events['runs']} runs, {events['timed_out']} timed out):\n")
+        print(f"  Interactions: {events['interactions']}")
+        print(f"  Likes: {events['likes']}")
+        print(f"  Follows: {events['follows']}")
+        for reason, count in sorted(events["rejections"].items()):
+            print(f"  Rejected ({reason}): {count}")
+        print(f"  Rejection rate: {events['rejection_rate']}%")
+
     else:
         print(f"Unknown command: {command}")
         sys.exit(1)
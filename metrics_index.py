@@ -0,0 +1,233 @@
+"""
+SQLite index of interacted_users.json for the metrics analyzer
+Rebuilt only when the JSON file changes, so repeated queries skip json.load
+"""
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+
+class InteractionIndex:
+    """Indexed, queryable copy of interacted_users.json"""
+
+    SCHEMA_VERSION = 1
+
+    # Columns hold the exact expressions MetricsAnalyzer evaluates on each
+    # record, so aggregates over them match the dict-walking code
+    SCHEMA = """
+        CREATE TABLE users (
+            username TEXT NOT NULL,
+            followed INTEGER NOT NULL,
+            unfollowed INTEGER NOT NULL,
+            following_status TEXT,
+            status_label TEXT,
+            last_interaction TEXT,
+            target TEXT,
+            liked,
+            watched,
+            commented,
+            pm_sent INTEGER NOT NULL,
+            successful INTEGER NOT NULL
+        );
+        CREATE INDEX idx_users_status ON users (following_status, last_interaction);
+        CREATE INDEX idx_users_followed ON users (followed, last_interaction);
+        CREATE INDEX idx_users_target ON users (target);
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+
+    def __init__(self, json_path: Path, db_path: Path):
+        self.json_path = Path(json_path)
+        self.db_path = Path(db_path)
+        self._conn = None
+
+    def _source_signature(self) -> dict:
+        st = self.json_path.stat()
+        return {
+            "schema_version": str(self.SCHEMA_VERSION),
+            "source_mtime_ns": str(st.st_mtime_ns),
+            "source_size": str(st.st_size),
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path)
+        return self._conn
+
+    def close(self):
+        """Close the database connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def is_fresh(self) -> bool:
+        """Check whether the index was built from the current JSON file"""
+        if not self.db_path.exists():
+            return False
+
+        try:
+            rows = self._connect().execute("SELECT key, value FROM meta").fetchall()
+        except sqlite3.DatabaseError:
+            return False
+
+        return dict(rows) == self._source_signature()
+
+    def refresh(self, force: bool = False, records=None) -> bool:
+        """
+        Rebuild the index if the JSON file changed since the last build
+
+        Returns True if the index was rebuilt
+        """
+        if not force and self.is_fresh():
+            return False
+
+        self.build(records)
+        return True
+
+    def build(self, records=None):
+        """
+        Build the index from scratch and swap it in atomically
+
+        Args:
+            records: Optional callable returning (username, record) pairs,
+                e.g. a streaming parser. Defaults to json.load of the file.
+        """
+        signature = self._source_signature()
+        if records is None:
+            with open(self.json_path, 'r', encoding='utf-8') as f:
+                users = json.load(f).items()
+        else:
+            users = records()
+
+        temp_path = self.db_path.with_name(f"{self.db_path.name}.{os.getpid()}.tmp")
+        if temp_path.exists():
+            temp_path.unlink()
+
+        conn = sqlite3.connect(temp_path)
+        try:
+            conn.executescript(self.SCHEMA)
+            conn.executemany(
+                "INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._row(username, data) for username, data in users),
+            )
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", signature.items())
+            conn.commit()
+        finally:
+            conn.close()
+
+        self.close()
+        os.replace(temp_path, self.db_path)
+
+    @staticmethod
+    def _row(username: str, data: dict) -> tuple:
+        liked = data.get("liked", 0)
+        return (
+            username,
+            1 if data.get("followed") else 0,
+            1 if data.get("unfollowed") else 0,
+            data.get("following_status"),
+            data.get("following_status", "unknown"),
+            data.get("last_interaction"),
+            data.get("target", "unknown"),
+            liked,
+            data.get("watched", 0),
+            data.get("commented", 0),
+            1 if data.get("pm_sent") else 0,
+            1 if (liked or 0) > 0 or data.get("followed") else 0,
+        )
+
+    def count(self) -> int:
+        """Number of indexed users"""
+        return self._connect().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def get_account_stats(self) -> dict:
+        """Same keys as MetricsAnalyzer.get_account_stats, minus total_sessions"""
+        row = self._connect().execute(
+            """
+            SELECT
+                COUNT(*),
+                COALESCE(SUM(followed), 0),
+                COALESCE(SUM(unfollowed), 0),
+                COALESCE(SUM(following_status = 'following'), 0),
+                COALESCE(SUM(liked), 0),
+                COALESCE(SUM(watched), 0),
+                COALESCE(SUM(commented), 0),
+                COALESCE(SUM(pm_sent), 0)
+            FROM users
+            """
+        ).fetchone()
+
+        return {
+            "total_interactions": row[0],
+            "users_followed": row[1],
+            "users_unfollowed": row[2],
+            "currently_following": row[3],
+            "total_likes_given": row[4],
+            "total_stories_watched": row[5],
+            "total_comments_sent": row[6],
+            "total_pms_sent": row[7],
+        }
+
+    def get_source_performance(self) -> dict:
+        """Per-source totals, in first-seen order like the dict-walking code"""
+        rows = self._connect().execute(
+            """
+            SELECT target, COUNT(*), SUM(successful), SUM(followed), COALESCE(SUM(liked), 0)
+            FROM users
+            GROUP BY target
+            ORDER BY MIN(rowid)
+            """
+        ).fetchall()
+
+        return {
+            target: {
+                "total_attempts": attempts,
+                "successful": successful,
+                "followed": followed,
+                "likes_given": likes,
+            }
+            for target, attempts, successful, followed, likes in rows
+        }
+
+    def get_followed_accounts(self, status: str = "following") -> list[dict]:
+        """Followed accounts sorted by last interaction, most recent first"""
+        conn = self._connect()
+
+        # rowid keeps ties in file order, matching Python's stable sort
+        if status == "all":
+            rows = conn.execute(
+                """
+                SELECT username, status_label, last_interaction, target
+                FROM users
+                WHERE followed = 1
+                ORDER BY last_interaction DESC, rowid
+                """
+            ).fetchall()
+            return [
+                {
+                    "username": username,
+                    "following_status": label,
+                    "last_interaction": last_interaction,
+                    "source": target,
+                }
+                for username, label, last_interaction, target in rows
+            ]
+
+        rows = conn.execute(
+            """
+            SELECT username, last_interaction, target, liked
+            FROM users
+            WHERE following_status = ?
+            ORDER BY last_interaction DESC, rowid
+            """,
+            (status,),
+        ).fetchall()
+        return [
+            {
+                "username": username,
+                "last_interaction": last_interaction,
+                "source": target,
+                "liked_posts": liked,
+            }
+            for username, last_interaction, target, liked in rows
+        ]
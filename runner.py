@@ -1,29 +1,39 @@
+import startup_profile  # First, so --profile-startup can time the imports below
+
 import argparse
+import asyncio
 import logging
 import os
+import re
 import subprocess
 import sys
-import tempfile
-from typing import Optional
+import time
+from typing import BinaryIO, Optional
 
 from dotenv import load_dotenv
 
+from device_manager import AdbError, DeviceManager, get_device_tracker, parse_device_list
+from gramaddict_launcher import EXECUTABLE_ENV, find_executable
+from gramaddict_worker import WORKER_SOCKET, open_worker_process, serve as serve_worker
+from log_rotation import close_rotating_log, compress_backups, get_rotating_log
+from session_events import SessionEventWriter, events_path_for
+
 # Override system env vars with .env values for flexible device switching
-load_dotenv(override=True)
+with startup_profile.step("load .env"):
+    load_dotenv(override=True)
 
 ROOT = os.path.abspath(os.path.dirname(__file__))
 DEVICE = os.getenv("DEVICE", "127.0.0.1:5555")
 USERNAME = os.getenv("INSTAGRAM_USER_A") or os.getenv("INSTAGRAM_USER")
 
-
-def resolve_gramaddict_executable() -> Optional[str]:
-    win_path = os.path.join(ROOT, ".venv", "Scripts", "gramaddict.exe")
-    if os.path.exists(win_path):
-        return win_path
-    nix_path = os.path.join(ROOT, ".venv", "bin", "gramaddict")
-    if os.path.exists(nix_path):
-        return nix_path
-    return None
+CONFIG_MAP = {
+    "growth": os.path.join(ROOT, "accounts", "strategy_growth.yml"),
+    "cleanup": os.path.join(ROOT, "accounts", "strategy_cleanup.yml"),
+    "morning": os.path.join(ROOT, "accounts", "session_morning.yml"),
+    "lunch": os.path.join(ROOT, "accounts", "session_lunch.yml"),
+    "evening": os.path.join(ROOT, "accounts", "session_evening.yml"),
+    "extra": os.path.join(ROOT, "accounts", "session_extra.yml"),
+}
 
 
 def setup_logging(task_name: str) -> tuple[logging.Logger, str]:
@@ -44,30 +54,45 @@ def setup_logging(task_name: str) -> tuple[logging.Logger, str]:
     stream_handler.setFormatter(formatter)
     logger.addHandler(stream_handler)
 
-    file_handler = logging.FileHandler(log_path, encoding="utf-8")
+    # Shared with the output pump so both rotate the same file
+    file_handler = get_rotating_log(log_path)
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
 
     return logger, log_path
 
 
-def check_adb(device: str, logger: logging.Logger) -> bool:
-    try:
-        result = subprocess.run(["adb", "devices"], capture_output=True, text=True, check=True)
-    except FileNotFoundError:
-        logger.error("ADB not installed or not in PATH.")
-        return False
-    except subprocess.CalledProcessError as exc:
-        logger.error("ADB command failed: %s", exc)
-        if exc.stdout:
-            logger.error("adb stdout: %s", exc.stdout.strip())
-        if exc.stderr:
-            logger.error("adb stderr: %s", exc.stderr.strip())
-        return False
+def check_adb(device: str, logger: logging.Logger, wait: float = 0.0) -> bool:
+    devices = None
+
+    # Answer from the adb server's live device table instead of forking `adb devices`
+    tracker = get_device_tracker()
+    if tracker.running:
+        if wait and tracker.state(device) != "device":
+            logger.info("Waiting up to %ss for device %s...", wait, device)
+            tracker.wait_for(device, timeout=wait)
+        devices = tracker.devices()
+        output = "".join(f"{serial}\t{state}\n" for serial, state in devices.items())
 
-    output = (result.stdout or "") + (result.stderr or "")
-    if device not in output:
-        logger.error("Device %s not found. adb output:\n%s", device, output.strip())
+    if devices is None:
+        try:
+            result = subprocess.run(["adb", "devices"], capture_output=True, text=True, check=True)
+        except FileNotFoundError:
+            logger.error("ADB not installed or not in PATH.")
+            return False
+        except subprocess.CalledProcessError as exc:
+            logger.error("ADB command failed: %s", exc)
+            if exc.stdout:
+                logger.error("adb stdout: %s", exc.stdout.strip())
+            if exc.stderr:
+                logger.error("adb stderr: %s", exc.stderr.strip())
+            return False
+
+        output = (result.stdout or "") + (result.stderr or "")
+        devices = parse_device_list(result.stdout or "")
+
+    if devices.get(device) != "device":
+        logger.error("Device %s not found or not online. adb output:\n%s", device, output.strip())
         logger.error("Ensure BlueStacks is running and ADB bridge is enabled.")
         return False
 
@@ -75,77 +100,233 @@ def check_adb(device: str, logger: logging.Logger) -> bool:
     return True
 
 
-def stream_process_output(proc: subprocess.Popen, log_path: str) -> None:
-    with open(log_path, "a", encoding="utf-8") as sink:
-        for line in proc.stdout or []:
-            sys.stdout.write(line)
-            sys.stdout.flush()
-            sink.write(line)
-        sink.flush()
+# Instagram releases GramAddict is known to work with (see docs/INSTAGRAM_DOWNGRADE.md)
+TESTED_INSTAGRAM_VERSIONS = ("300.", "313.")
+
 
+def check_device_profile(device: str, logger: logging.Logger) -> bool:
+    """Log what the device is, and fail early if Instagram is not installed"""
+    try:
+        profile = DeviceManager(device).get_profile()
+    except (OSError, AdbError, ValueError) as exc:
+        logger.warning("Could not read the profile of device %s: %s", device, exc)
+        return True
+
+    screen = profile["screen"] or {}
+    logger.info(
+        "Device %s: %s %s, Android %s, %sx%s @ %sdpi",
+        device, profile["manufacturer"], profile["model"], profile["android"],
+        screen.get("width"), screen.get("height"), profile["density"],
+    )
 
-def run_gramaddict(config_path: str, task_name: str, logger: logging.Logger, log_path: str) -> int:
-    executable = resolve_gramaddict_executable()
+    instagram = profile["instagram"]
+    if instagram is None:
+        logger.error("Instagram is not installed on %s.", device)
+        return False
+    if not instagram["version"].startswith(TESTED_INSTAGRAM_VERSIONS):
+        logger.warning(
+            "Instagram %s on %s is not a version tested with GramAddict (%s); "
+            "see docs/INSTAGRAM_DOWNGRADE.md if the session crashes.",
+            instagram["version"], device, ", ".join(f"{v}x" for v in TESTED_INSTAGRAM_VERSIONS),
+        )
+    else:
+        logger.info("Instagram %s on %s is a tested version.", instagram["version"], device)
+    return True
+
+
+# Output pump tuning: read size, bytes buffered before a write, and the
+# longest a partial batch may wait before it is flushed to console and log
+PUMP_CHUNK_SIZE = 256 * 1024
+PUMP_FLUSH_BYTES = 64 * 1024
+PUMP_FLUSH_INTERVAL = 0.25
+
+# Grace period between SIGTERM and SIGKILL when a session times out
+TERMINATE_GRACE_SECONDS = 10.0
+
+
+async def pump_process_output(
+    stream: asyncio.StreamReader,
+    log_path: str,
+    console: Optional[BinaryIO] = None,
+    wall_timeout: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+    events: Optional[SessionEventWriter] = None,
+) -> Optional[str]:
+    """
+    Copy a child's output to the rotating log (and console) in large binary chunks
+
+    Output is batched: it is written once PUMP_FLUSH_BYTES have accumulated
+    or PUMP_FLUSH_INTERVAL has passed, so verbose children cost a handful of
+    writes per second instead of one write and flush per line. The batch is
+    bounded, and the stream reader's own buffer is bounded by its limit.
+
+    Returns None when the stream ends, or "wall" / "idle" when the wall-clock
+    or no-output timeout (seconds) expired first. The caller terminates the
+    child in that case. Each chunk is also fed to events, if given.
+    """
+    loop = asyncio.get_running_loop()
+    started = last_output = last_flush = loop.time()
+    pending = bytearray()
+    log = get_rotating_log(log_path)
+
+    def flush():
+        nonlocal last_flush
+        if pending:
+            log.write_raw(bytes(pending))
+            if console is not None:
+                sys.stdout.flush()  # Keep ordering with logger output on the text layer
+                console.write(pending)
+                console.flush()
+            pending.clear()
+            if events is not None:
+                events.flush()
+        last_flush = loop.time()
+
+    try:
+        while True:
+            now = loop.time()
+            deadlines = []
+            if wall_timeout is not None:
+                deadlines.append(("wall", started + wall_timeout))
+            if idle_timeout is not None:
+                deadlines.append(("idle", last_output + idle_timeout))
+            if pending:
+                deadlines.append(("flush", last_flush + PUMP_FLUSH_INTERVAL))
+
+            reason, deadline = min(deadlines, key=lambda item: item[1], default=(None, None))
+            try:
+                chunk = await asyncio.wait_for(
+                    stream.read(PUMP_CHUNK_SIZE),
+                    None if deadline is None else max(deadline - now, 0),
+                )
+            except asyncio.TimeoutError:
+                if reason == "flush":
+                    flush()
+                    continue
+                return reason
+
+            if not chunk:
+                return None
+
+            last_output = loop.time()
+            pending += chunk
+            if events is not None:
+                events.feed(chunk)
+            if len(pending) >= PUMP_FLUSH_BYTES or last_output - last_flush >= PUMP_FLUSH_INTERVAL:
+                flush()
+    finally:
+        flush()
+
+
+async def terminate_process(proc: asyncio.subprocess.Process, grace: float = TERMINATE_GRACE_SECONDS) -> None:
+    """Ask a child to exit, then kill it if it is still running after the grace period"""
+    if proc.returncode is not None:
+        return
+    try:
+        proc.terminate()
+        await asyncio.wait_for(proc.wait(), grace)
+    except ProcessLookupError:
+        pass
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+
+
+async def run_process(
+    cmd: list[str],
+    env: dict,
+    log_path: str,
+    logger: logging.Logger,
+    console: Optional[BinaryIO] = None,
+    wall_timeout: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+    events: Optional[SessionEventWriter] = None,
+    use_worker: bool = False,
+) -> int:
+    """Run a child (or a warm worker job), pump its output and enforce the session timeouts"""
+    proc = None
+    if use_worker:
+        proc = await open_worker_process(cmd, env, limit=PUMP_CHUNK_SIZE)
+        if proc is None:
+            logger.warning("No GramAddict worker at %s; starting a subprocess instead.", WORKER_SOCKET)
+    if proc is None:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            env=env,
+            limit=PUMP_CHUNK_SIZE,
+        )
+    startup_profile.mark("child launched")
+    reason = None
+    if events is not None:
+        events.open()
+    try:
+        reason = await pump_process_output(proc.stdout, log_path, console, wall_timeout, idle_timeout, events)
+        if reason == "wall":
+            logger.error("Session exceeded its %gs wall-clock limit; terminating.", wall_timeout)
+        elif reason == "idle":
+            logger.error("No output for %gs; terminating hung session.", idle_timeout)
+        if reason is not None:
+            await terminate_process(proc)
+        await proc.wait()
+    finally:
+        # Also covers cancellation (e.g. Ctrl+C) so no child is left behind
+        if proc.returncode is None:
+            await terminate_process(proc)
+        if events is not None:
+            events.close(proc.returncode, reason)
+
+    return proc.returncode
+
+
+def prepare_gramaddict_command(
+    config_path: str,
+    logger: logging.Logger,
+    device: Optional[str] = None,
+    username: Optional[str] = None,
+) -> Optional[tuple[list[str], dict]]:
+    """
+    Build the GramAddict command line, environment and injected config
+
+    Device and username default to DEVICE and INSTAGRAM_USER_A from .env.
+    Returns (cmd, env), or None if GramAddict or the config is missing.
+    """
+    executable = find_executable()
     if not executable:
-        logger.error("GramAddict executable not found inside .venv.")
-        return 1
+        logger.error("GramAddict executable not found inside .venv (or at %s).", EXECUTABLE_ENV)
+        return None
 
     if not os.path.exists(config_path):
         logger.error("Config file not found: %s", config_path)
-        return 1
-
-    abs_config = os.path.abspath(config_path)
-    temp_config_path = None
+        return None
 
     # Inject device and username from .env into config (flexible for USB/emulator switching and multi-account)
-    device = os.getenv("DEVICE")
-    username = USERNAME  # Already loaded at module level from INSTAGRAM_USER_A or INSTAGRAM_USER
+    if device is None:
+        device = os.getenv("DEVICE")
+    if username is None:
+        username = USERNAME  # Already loaded at module level from INSTAGRAM_USER_A or INSTAGRAM_USER
 
     if device or username:
-        # Read original config as text to preserve formatting (yaml.dump mangles lists!)
-        with open(abs_config, 'r', encoding='utf-8') as f:
-            original_lines = f.readlines()
-
-        # Inject device and username at the beginning (after initial comments)
-        new_lines = []
-        injected = False
-
-        for line in original_lines:
-            # Add device and username before first non-comment, non-empty line
-            if not injected and line.strip() and not line.strip().startswith('#'):
-                if username:
-                    new_lines.append(f"username: {username}\n")
-                if device:
-                    new_lines.append(f"device: {device}\n")
-                injected = True
-            new_lines.append(line)
-
-        # If no non-comment line found, add at the end
-        if not injected:
-            if username:
-                new_lines.append(f"\nusername: {username}\n")
-            if device:
-                new_lines.append(f"device: {device}\n")
-
-        # Write to temporary config file
-        temp_config = tempfile.NamedTemporaryFile(mode='w', suffix='.yml', delete=False, encoding='utf-8')
-        temp_config.writelines(new_lines)
-        temp_config.close()
-        temp_config_path = temp_config.name
-        abs_config = temp_config_path
+        from config_render import render_config  # Pulls in yaml; only needed once a config is prepared
+
+        # Overrides replace the template's own keys; the rendered file is
+        # cached by content, so there is no temp file to clean up
+        abs_config = str(render_config(config_path, {"username": username or None, "device": device or None}))
 
         if username:
             logger.info("Injected username %s into config", username)
         if device:
             logger.info("Injected device %s into config", device)
     else:
+        abs_config = os.path.abspath(config_path)
         logger.warning("DEVICE and USERNAME not set in .env; will use values from config YAML if present.")
 
     cmd = [executable, "run", "--config", abs_config]
     logger.info("Running command: %s", " ".join(cmd))
 
     # Verify credentials are available
-    if not USERNAME:
+    if not username:
         logger.warning("INSTAGRAM_USER_A not set in .env; config must include username.")
 
     env = os.environ.copy()
@@ -154,48 +335,240 @@ def run_gramaddict(config_path: str, task_name: str, logger: logging.Logger, log
     env.setdefault("PYTHONUNBUFFERED", "1")
     env.setdefault("GRAMADDICT_LOG_LEVEL", "INFO")
 
-    proc = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        env=env,
-    )
+    return cmd, env
+
+
+def run_gramaddict(
+    config_path: str,
+    task_name: str,
+    logger: logging.Logger,
+    log_path: str,
+    device: Optional[str] = None,
+    username: Optional[str] = None,
+    wall_timeout: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+    use_worker: bool = False,
+) -> int:
+    with startup_profile.step("prepare command"):
+        prepared = prepare_gramaddict_command(config_path, logger, device, username)
+    if prepared is None:
+        return 1
+    cmd, env = prepared
+    events = SessionEventWriter(events_path_for(log_path), account=username or USERNAME, mode=task_name)
+
+    returncode = asyncio.run(run_process(
+        cmd, env, log_path, logger,
+        console=sys.stdout.buffer,
+        wall_timeout=wall_timeout,
+        idle_timeout=idle_timeout,
+        events=events,
+        use_worker=use_worker,
+    ))
+    compress_account_logs(username or USERNAME, logger)
+
+    if returncode == 0:
+        logger.info("Task finished successfully.")
+    else:
+        logger.error("Task failed or stopped (exit code %s).", returncode)
 
-    stream_process_output(proc, log_path)
+    return returncode
 
-    proc.wait()
 
-    # Cleanup temp config file
-    if temp_config_path and os.path.exists(temp_config_path):
-        try:
-            os.unlink(temp_config_path)
-        except Exception as e:
-            logger.warning("Failed to cleanup temp config: %s", e)
+def compress_account_logs(username: Optional[str], logger: logging.Logger):
+    """Gzip GramAddict's own rotated logs/<username>.log.N once its session is over"""
+    if not username:
+        return
+    try:
+        count = compress_backups(os.path.join(ROOT, "logs", f"{username}.log"))
+    except OSError as exc:
+        logger.warning("Could not compress rotated logs of %s: %s", username, exc)
+        return
+    if count:
+        logger.info("Compressed %s rotated log segment(s) of %s", count, username)
+
+
+def load_fleet_map(path: str) -> tuple[list[dict], Optional[int]]:
+    """
+    Load the account -> device -> session map for fleet mode
+
+    Returns (jobs, max_concurrent). Each job has account, device and mode,
+    and optionally config to override the mode's default config file.
+    """
+    import yaml
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+
+    jobs = []
+    for index, entry in enumerate(data.get("sessions") or [], start=1):
+        missing = [key for key in ("account", "device", "mode") if not entry.get(key)]
+        if missing:
+            raise ValueError(f"{path}: session #{index} is missing {', '.join(missing)}")
+        if entry["mode"] not in CONFIG_MAP and not entry.get("config"):
+            raise ValueError(f"{path}: session #{index} has unknown mode {entry['mode']!r}")
+
+        jobs.append({
+            "account": str(entry["account"]),
+            "device": str(entry["device"]),
+            "mode": entry["mode"],
+            "config": entry.get("config") or CONFIG_MAP.get(entry["mode"]),
+        })
+
+    return jobs, data.get("max-concurrent")
+
+
+async def run_fleet_session(
+    job: dict,
+    logger: logging.Logger,
+    wall_timeout: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+    use_worker: bool = False,
+) -> dict:
+    """Run one account's session on its device; the caller keeps the device free"""
+    name = f"{job['account']}@{job['device']} ({job['mode']})"
+    log_dir = os.path.join(ROOT, "logs", "fleet")
+    os.makedirs(log_dir, exist_ok=True)
+    # The device is part of the name, so one account's sessions on two
+    # devices never share a log file (or its rotating handler)
+    serial = re.sub(r"[^\w.-]", "_", job["device"])
+    log_path = os.path.join(log_dir, f"{job['account']}_{job['mode']}_{serial}.log")
+    result = {**job, "log": log_path, "returncode": 1, "seconds": 0.0}
+
+    # Both talk to the device synchronously; keep them off the event loop so
+    # a slow device cannot stall other sessions' pumps and timeouts
+    if not await asyncio.to_thread(check_adb, job["device"], logger):
+        return result
+    if not await asyncio.to_thread(check_device_profile, job["device"], logger):
+        return result
+
+    # Renders and writes the config; file I/O stays off the event loop too
+    prepared = await asyncio.to_thread(
+        prepare_gramaddict_command, job["config"], logger, job["device"], job["account"]
+    )
+    if prepared is None:
+        return result
+    cmd, env = prepared
 
-    if proc.returncode == 0:
-        logger.info("Task finished successfully.")
+    logger.info("Starting %s -> %s", name, log_path)
+    started = time.monotonic()
+    try:
+        result["returncode"] = await run_process(
+            cmd, env, log_path, logger,
+            wall_timeout=wall_timeout,
+            idle_timeout=idle_timeout,
+            events=SessionEventWriter(events_path_for(log_path), account=job["account"], mode=job["mode"]),
+            use_worker=use_worker,
+        )
+    finally:
+        close_rotating_log(log_path)
+
+    result["seconds"] = round(time.monotonic() - started, 1)
+    await asyncio.to_thread(compress_account_logs, job["account"], logger)
+
+    if result["returncode"] == 0:
+        logger.info("Finished %s in %ss", name, result["seconds"])
     else:
-        logger.error("Task failed or stopped (exit code %s).", proc.returncode)
+        logger.error("%s failed (exit code %s); see %s", name, result["returncode"], log_path)
+    return result
+
+
+async def run_fleet_job(
+    job: dict,
+    logger: logging.Logger,
+    host_slots: asyncio.Semaphore,
+    device_lock: asyncio.Lock,
+    wall_timeout: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+    use_worker: bool = False,
+) -> dict:
+    """Run one fleet session once its device and a host slot are free"""
+    # One session per device at a time; the host slot caps total concurrency
+    async with device_lock, host_slots:
+        try:
+            return await run_fleet_session(job, logger, wall_timeout, idle_timeout, use_worker)
+        except Exception:
+            # One broken account (bad config, unwritable log dir...) must not abort the fleet
+            logger.exception("%s@%s (%s) failed to run", job["account"], job["device"], job["mode"])
+            return {**job, "returncode": 1, "seconds": 0.0}
+
+
+async def run_fleet(
+    jobs: list[dict],
+    logger: logging.Logger,
+    max_concurrent: int,
+    wall_timeout: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+    use_worker: bool = False,
+) -> list[dict]:
+    """Run fleet sessions concurrently, serialized per device"""
+    host_slots = asyncio.Semaphore(max_concurrent)
+    device_locks = {job["device"]: asyncio.Lock() for job in jobs}
+    return await asyncio.gather(*(
+        run_fleet_job(job, logger, host_slots, device_locks[job["device"]], wall_timeout, idle_timeout, use_worker)
+        for job in jobs
+    ))
+
+
+def main_fleet(
+    map_path: str,
+    max_concurrent: Optional[int],
+    wall_timeout: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+    use_worker: bool = False,
+) -> int:
+    logger, _ = setup_logging("fleet")
 
-    return proc.returncode
+    try:
+        jobs, map_concurrency = load_fleet_map(map_path)
+    except (OSError, ValueError) as exc:
+        logger.error("Could not load fleet map: %s", exc)
+        return 1
+
+    if not jobs:
+        logger.error("No sessions defined in %s", map_path)
+        return 1
+
+    max_concurrent = max_concurrent or map_concurrency or os.cpu_count() or 1
+    devices = {job["device"] for job in jobs}
+    logger.info(
+        "Starting fleet: %s sessions on %s devices, up to %s at once",
+        len(jobs), len(devices), max_concurrent,
+    )
+
+    started = time.monotonic()
+    results = asyncio.run(run_fleet(jobs, logger, max_concurrent, wall_timeout, idle_timeout, use_worker))
+
+    failed = [result for result in results if result["returncode"] != 0]
+    logger.info(
+        "Fleet finished in %.1fs: %s succeeded, %s failed",
+        time.monotonic() - started, len(results) - len(failed), len(failed),
+    )
+    return 1 if failed else 0
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="GramAddict task runner")
-    parser.add_argument("mode", choices=["growth", "cleanup", "morning", "lunch", "evening", "extra"], help="Select which strategy to run")
+    parser.add_argument("mode", choices=[*CONFIG_MAP, "fleet", "worker"], help="Select which strategy to run, 'fleet' to run many accounts at once, or 'worker' to start the warm GramAddict worker")
+    parser.add_argument("--wait-device", type=float, default=0.0, metavar="SECONDS", help="Wait this long for the device to come online before failing")
+    parser.add_argument("--map", default=os.path.join(ROOT, "accounts", "fleet.yml"), help="Fleet map of account/device/mode sessions (fleet mode)")
+    parser.add_argument("--max-concurrent", type=int, default=None, help="Maximum sessions running at once on this host (fleet mode)")
+    parser.add_argument("--timeout", type=float, default=None, metavar="MINUTES", help="Terminate a session that runs longer than this")
+    parser.add_argument("--idle-timeout", type=float, default=None, metavar="MINUTES", help="Terminate a session that prints nothing for this long")
+    parser.add_argument("--use-worker", action="store_true", help="Run sessions in the warm worker started by 'runner.py worker', if it is running")
+    parser.add_argument("--profile-startup", action="store_true", help="Report import and pre-flight costs up to launching GramAddict")
     args = parser.parse_args()
 
-    config_map = {
-        "growth": os.path.join(ROOT, "accounts", "strategy_growth.yml"),
-        "cleanup": os.path.join(ROOT, "accounts", "strategy_cleanup.yml"),
-        "morning": os.path.join(ROOT, "accounts", "session_morning.yml"),
-        "lunch": os.path.join(ROOT, "accounts", "session_lunch.yml"),
-        "evening": os.path.join(ROOT, "accounts", "session_evening.yml"),
-        "extra": os.path.join(ROOT, "accounts", "session_extra.yml"),
-    }
+    wall_timeout = args.timeout * 60 if args.timeout else None
+    idle_timeout = args.idle_timeout * 60 if args.idle_timeout else None
+
+    if args.mode == "fleet":
+        return main_fleet(args.map, args.max_concurrent, wall_timeout, idle_timeout, args.use_worker)
 
-    config_path = config_map[args.mode]
+    if args.mode == "worker":
+        logger, _ = setup_logging("worker")
+        return serve_worker(log=logger.info)
+
+    config_path = CONFIG_MAP[args.mode]
 
     logger, log_path = setup_logging(args.mode)
     logger.info("Starting %s task with config %s", args.mode, config_path)
@@ -206,10 +579,21 @@ def main() -> int:
 
     # Check device from .env (not cached global variable)
     device = os.getenv("DEVICE")
-    if device and not check_adb(device, logger):
+    with startup_profile.step("check adb"):
+        device_ok = not device or check_adb(device, logger, wait=args.wait_device)
+    if not device_ok:
+        return 1
+    with startup_profile.step("device profile"):
+        profile_ok = not device or check_device_profile(device, logger)
+    if not profile_ok:
         return 1
 
-    return run_gramaddict(config_path, args.mode, logger, log_path)
+    return run_gramaddict(
+        config_path, args.mode, logger, log_path,
+        wall_timeout=wall_timeout,
+        idle_timeout=idle_timeout,
+        use_worker=args.use_worker,
+    )
 
 
 if __name__ == "__main__":
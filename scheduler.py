@@ -0,0 +1,500 @@
+"""
+Scheduler daemon: runs the daily sessions that install_cron_linux.sh used to
+start from cron, without sessions colliding on a device
+
+Each day it plans every account's sessions inside their working hours with
+a random delay, queues them per device so two sessions never share one,
+and places accounts without a fixed device on whichever device frees up
+first. Time comes from a Clock, so a FakeClock can drive a week of
+sessions in a test without waiting
+
+Usage:
+    python scheduler.py                          # Run until stopped
+    python scheduler.py --plan --days 7          # Print the next week's plan
+    python scheduler.py --map accounts/schedule.yml --use-worker
+    python scheduler.py --self-test              # Simulate a day with a crashing session
+"""
+import argparse
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import random
+import sys
+from datetime import date, datetime, time, timedelta
+from typing import Awaitable, Callable, Optional
+
+import yaml
+
+from runner import CONFIG_MAP, DEVICE, ROOT, USERNAME, run_fleet_session, setup_logging
+
+SCHEDULE_MAP = os.path.join(ROOT, "accounts", "schedule.yml")
+
+DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# Same windows and days as the cron lines and session templates; a
+# `working-hours` entry in the session config or schedule map wins
+MODE_DEFAULTS = {
+    "morning": {"working-hours": ["9.00-11.00"], "days": DAY_NAMES, "duration": 60},
+    "lunch": {"working-hours": ["12.00-14.00"], "days": DAY_NAMES, "duration": 60},
+    "extra": {"working-hours": ["15.00-17.00"], "days": ("mon", "wed", "fri"), "duration": 45},
+    "evening": {"working-hours": ["17.00-19.00"], "days": DAY_NAMES, "duration": 60},
+    "cleanup": {"working-hours": ["23.00-23.59"], "days": ("sun",), "duration": 15},
+    "growth": {"working-hours": ["9.00-22.00"], "days": DAY_NAMES, "duration": 60},
+}
+# What the cron installer ran
+DEFAULT_MODES = ["morning", "lunch", "extra", "evening", "cleanup"]
+
+DEFAULT_JITTER_MINUTES = 15  # Matches the cron lines' `sleep $((RANDOM % 900))`
+DEVICE_GAP_MINUTES = 2       # Let Instagram settle before the next account starts
+MIN_SESSION_MINUTES = 10     # Skip a session that would get less than this before its window closes
+
+
+class Clock:
+    """Wall-clock time for the scheduler"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    async def sleep_until(self, when: datetime):
+        # Re-check in short steps so a suspended host or clock change cannot oversleep
+        while (delay := (when - self.now()).total_seconds()) > 0:
+            await asyncio.sleep(min(delay, 60))
+
+    async def sleep(self, seconds: float):
+        await self.sleep_until(self.now() + timedelta(seconds=seconds))
+
+
+class FakeClock(Clock):
+    """
+    Virtual time for tests: jumps to the earliest sleeper once every task waits
+
+    Sessions run by a test should sleep on this clock too, so a whole day
+    passes in milliseconds and in a reproducible order.
+    """
+
+    # Event-loop turns given to runnable tasks before time moves on
+    SETTLE_TURNS = 50
+
+    def __init__(self, start: datetime):
+        self.current = start
+        self._sleepers = []
+        self._order = itertools.count()
+        self._advancer: Optional[asyncio.Task] = None
+
+    def now(self) -> datetime:
+        return self.current
+
+    def advance(self, seconds: float):
+        self.current += timedelta(seconds=seconds)
+
+    async def sleep_until(self, when: datetime):
+        if when <= self.current:
+            await asyncio.sleep(0)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (when, next(self._order), future))
+        if self._advancer is None or self._advancer.done():
+            self._advancer = asyncio.get_running_loop().create_task(self._advance())
+        await future
+
+    async def _advance(self):
+        while self._sleepers:
+            for _ in range(self.SETTLE_TURNS):
+                await asyncio.sleep(0)
+            when = self._sleepers[0][0]
+            self.current = max(self.current, when)
+            while self._sleepers and self._sleepers[0][0] <= self.current:
+                _, _, future = heapq.heappop(self._sleepers)
+                if not future.done():
+                    future.set_result(None)
+
+
+def parse_working_hours(value) -> list[tuple[int, int]]:
+    """
+    GramAddict working-hours ("10.15-16.40", "9-22" or a list of them) as
+    (start, end) minutes after midnight; a window past midnight ends after 1440
+    """
+    if isinstance(value, (str, int, float)):
+        value = [value]
+
+    windows = []
+    for item in value or []:
+        text = str(item).strip()
+        try:
+            start_text, end_text = text.split("-")
+            start, end = (_parse_clock(part) for part in (start_text, end_text))
+        except ValueError:
+            raise ValueError(f"Invalid working-hours entry {text!r} (expected e.g. 9.00-11.30)") from None
+        if end <= start:
+            end += 24 * 60
+        windows.append((start, end))
+    return windows
+
+
+def _parse_clock(text: str) -> int:
+    hours, _, minutes = text.strip().partition(".")
+    hours, minutes = int(hours), int(minutes or 0)
+    if not (0 <= hours <= 24 and 0 <= minutes < 60):
+        raise ValueError(text)
+    return hours * 60 + minutes
+
+
+def _config_working_hours(config_path: str):
+    """The session config's own working-hours, if it sets one"""
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError):
+        return None
+    return data.get("working-hours") if isinstance(data, dict) else None
+
+
+def load_schedule(path: str = SCHEDULE_MAP) -> dict:
+    """
+    Load the schedule map (accounts, device pool and per-mode overrides)
+
+    Without a map, schedules the .env account on the .env device for the
+    same sessions the cron installer set up.
+    """
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+    elif USERNAME:
+        data = {"accounts": [{"account": USERNAME, "device": DEVICE}]}
+    else:
+        raise ValueError(f"{path} not found and INSTAGRAM_USER_A is not set")
+
+    pool = [str(device) for device in data.get("devices") or []]
+    accounts = []
+    for index, entry in enumerate(data.get("accounts") or [], start=1):
+        if not entry.get("account"):
+            raise ValueError(f"{path}: account #{index} is missing account")
+        if not entry.get("device") and not pool:
+            raise ValueError(f"{path}: account #{index} has no device and there is no devices pool")
+        modes = entry.get("modes") or DEFAULT_MODES
+        unknown = [mode for mode in modes if mode not in CONFIG_MAP]
+        if unknown:
+            raise ValueError(f"{path}: account #{index} has unknown mode(s) {', '.join(map(str, unknown))}")
+        accounts.append({
+            "account": str(entry["account"]),
+            "device": str(entry["device"]) if entry.get("device") else None,
+            "modes": list(modes),
+        })
+
+    modes = {}
+    for mode in {mode for account in accounts for mode in account["modes"]}:
+        settings = {**MODE_DEFAULTS[mode]}
+        config_hours = _config_working_hours(CONFIG_MAP[mode])
+        if config_hours:
+            settings["working-hours"] = config_hours
+        settings.update((data.get("modes") or {}).get(mode) or {})
+
+        days = [str(day).lower()[:3] for day in settings["days"]]
+        unknown = [day for day in days if day not in DAY_NAMES]
+        if unknown:
+            raise ValueError(f"{path}: mode {mode} has unknown day(s) {', '.join(unknown)}")
+        windows = parse_working_hours(settings["working-hours"])
+        if not windows:
+            raise ValueError(f"{path}: mode {mode} has no working-hours")
+        modes[mode] = {
+            "windows": windows,
+            "days": {DAY_NAMES.index(day) for day in days},
+            "duration": float(settings["duration"]),
+        }
+
+    return {
+        "accounts": accounts,
+        "devices": pool,
+        "modes": modes,
+        "jitter": float(data.get("jitter", DEFAULT_JITTER_MINUTES)),
+        "max-concurrent": data.get("max-concurrent"),
+    }
+
+
+class Scheduler:
+    """
+    Plans each day's sessions and runs them through per-device queues
+
+    run_session(session, wall_timeout) runs one planned session and returns
+    a dict with returncode and seconds; it defaults to the runner's fleet
+    session, and tests pass a coroutine that sleeps on the FakeClock.
+    """
+
+    def __init__(
+        self,
+        schedule: dict,
+        logger: logging.Logger,
+        clock: Optional[Clock] = None,
+        run_session: Optional[Callable[[dict, Optional[float]], Awaitable[dict]]] = None,
+        rng: Optional[random.Random] = None,
+        max_concurrent: Optional[int] = None,
+        wall_timeout: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+        use_worker: bool = False,
+    ):
+        self.schedule = schedule
+        self.logger = logger
+        self.clock = clock or Clock()
+        self.run_session = run_session or self._run_fleet_session
+        self.rng = rng or random.Random()
+        self.max_concurrent = max_concurrent or schedule.get("max-concurrent") or os.cpu_count() or 1
+        self.wall_timeout = wall_timeout
+        self.idle_timeout = idle_timeout
+        self.use_worker = use_worker
+        # Learned session length per (account, mode), in minutes
+        self.durations = {}
+
+    async def _run_fleet_session(self, session: dict, wall_timeout: Optional[float]) -> dict:
+        return await run_fleet_session(session, self.logger, wall_timeout, self.idle_timeout, self.use_worker)
+
+    def _duration(self, account: str, mode: str) -> float:
+        return self.durations.get((account, mode), self.schedule["modes"][mode]["duration"])
+
+    def plan(self, day: date, not_before: Optional[datetime] = None) -> list[dict]:
+        """
+        The day's sessions with start time, deadline and device
+
+        Sessions are placed in order of their jittered start. Each goes to
+        the device (its own, or the pool's) where it can start soonest, after
+        that device's previous session and the account's previous session.
+        A session that cannot start before its window closes is dropped.
+        """
+        midnight = datetime.combine(day, time.min)
+        not_before = not_before or midnight
+        jitter = self.schedule["jitter"]
+
+        wanted = []
+        for account in self.schedule["accounts"]:
+            for mode in account["modes"]:
+                settings = self.schedule["modes"][mode]
+                if day.weekday() not in settings["days"]:
+                    continue
+                window_start, window_end = self.rng.choice(settings["windows"])
+                deadline = midnight + timedelta(minutes=window_end)
+                if deadline <= not_before:
+                    continue  # Already over by the time the scheduler started
+                duration = self._duration(account["account"], mode)
+                slack = max(0.0, window_end - window_start - duration)
+                start = midnight + timedelta(minutes=window_start + self.rng.uniform(0, min(jitter, slack)))
+                wanted.append({
+                    "account": account["account"],
+                    "mode": mode,
+                    "config": CONFIG_MAP[mode],
+                    "devices": [account["device"]] if account["device"] else self.schedule["devices"],
+                    "start": max(start, not_before),
+                    "deadline": deadline,
+                    "duration": duration,
+                })
+
+        device_free = {}
+        account_free = {}
+        device_load = {}
+        planned = []
+        for session in sorted(wanted, key=lambda s: s["start"]):
+            account_ready = max(session["start"], account_free.get(session["account"], session["start"]))
+            device, start = min(
+                ((device, max(account_ready, device_free.get(device, account_ready)))
+                 for device in session.pop("devices")),
+                key=lambda choice: (choice[1], device_load.get(choice[0], 0)),
+            )
+            end = start + timedelta(minutes=session.pop("duration"))
+            if session["deadline"] - start < timedelta(minutes=MIN_SESSION_MINUTES):
+                self.logger.warning(
+                    "No device free for %s (%s) before %s; skipping it today",
+                    session["account"], session["mode"], session["deadline"].strftime("%H:%M"),
+                )
+                continue
+
+            device_free[device] = end + timedelta(minutes=DEVICE_GAP_MINUTES)
+            account_free[session["account"]] = end
+            device_load[device] = device_load.get(device, 0) + 1
+            planned.append({**session, "device": device, "start": start})
+
+        return sorted(planned, key=lambda s: (s["start"], s["device"]))
+
+    async def run_day(self, day: date) -> list[dict]:
+        """Plan the day and run each device's queue until its last session ends"""
+        planned = self.plan(day, not_before=self.clock.now())
+        self.logger.info(
+            "Planned %s sessions on %s devices for %s",
+            len(planned), len({s["device"] for s in planned}), day.isoformat(),
+        )
+        for session in planned:
+            self.logger.info(
+                "  %s %s@%s (%s)", session["start"].strftime("%H:%M"),
+                session["account"], session["device"], session["mode"],
+            )
+
+        queues = {}
+        for session in planned:
+            queues.setdefault(session["device"], []).append(session)
+
+        host_slots = asyncio.Semaphore(self.max_concurrent)
+        account_locks = {session["account"]: asyncio.Lock() for session in planned}
+        results = await asyncio.gather(*(
+            self._run_queue(queue, host_slots, account_locks) for queue in queues.values()
+        ))
+        return sorted((result for queue in results for result in queue), key=lambda r: r["started"] or r["start"])
+
+    async def _run_queue(self, queue: list[dict], host_slots: asyncio.Semaphore, account_locks: dict) -> list[dict]:
+        """Run one device's sessions in order; a late session shifts the ones after it"""
+        results = []
+        for session in queue:
+            await self.clock.sleep_until(session["start"])
+            async with account_locks[session["account"]], host_slots:
+                started = self.clock.now()
+                remaining = (session["deadline"] - started).total_seconds()
+                if remaining < MIN_SESSION_MINUTES * 60:
+                    self.logger.warning(
+                        "%s@%s (%s) could not start before %s; skipped",
+                        session["account"], session["device"], session["mode"],
+                        session["deadline"].strftime("%H:%M"),
+                    )
+                    results.append({**session, "started": None, "returncode": None, "seconds": 0.0})
+                    continue
+
+                # Never run past the end of the working hours
+                wall_timeout = min(self.wall_timeout or remaining, remaining)
+                try:
+                    result = await self.run_session(session, wall_timeout)
+                except Exception:
+                    # One broken session must not cancel the other devices' queues
+                    self.logger.exception(
+                        "%s@%s (%s) crashed", session["account"], session["device"], session["mode"],
+                    )
+                    result = {"returncode": 1, "seconds": (self.clock.now() - started).total_seconds()}
+
+            if result.get("returncode") == 0:
+                key = (session["account"], session["mode"])
+                minutes = (self.clock.now() - started).total_seconds() / 60
+                self.durations[key] = (self._duration(*key) + minutes) / 2
+            results.append({**session, **result, "started": started})
+        return results
+
+    async def run(self, days: Optional[int] = None):
+        """Run day after day (or for `days` days), sleeping until each next midnight"""
+        for _ in itertools.count() if days is None else range(days):
+            today = self.clock.now().date()
+            results = await self.run_day(today)
+            failed = [r for r in results if r["returncode"] not in (0, None)]
+            skipped = [r for r in results if r["returncode"] is None]
+            self.logger.info(
+                "Day %s done: %s ran, %s failed, %s skipped",
+                today.isoformat(), len(results) - len(skipped), len(failed), len(skipped),
+            )
+            await self.clock.sleep_until(datetime.combine(today + timedelta(days=1), time.min))
+
+
+def print_plan(scheduler: Scheduler, days: int):
+    today = scheduler.clock.now().date()
+    for offset in range(days):
+        day = today + timedelta(days=offset)
+        planned = scheduler.plan(day, not_before=scheduler.clock.now())
+        print(f"\n{day.isoformat()} ({DAY_NAMES[day.weekday()]}): {len(planned)} sessions")
+        for session in planned:
+            print(
+                f"  {session['start']:%H:%M}  {session['device']:<22} "
+                f"{session['account']:<24} {session['mode']:<8} (until {session['deadline']:%H:%M})"
+            )
+
+
+def self_test() -> int:
+    """Run a day on a FakeClock where one session raises and check the rest still run"""
+    logger = logging.getLogger("scheduler.selftest")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    schedule = {
+        "accounts": [
+            {"account": "alpha", "device": "device-1", "modes": ["morning", "lunch"]},
+            {"account": "broken", "device": "device-1", "modes": ["morning"]},
+            {"account": "gamma", "device": "device-2", "modes": ["morning", "evening"]},
+        ],
+        "devices": [],
+        "modes": {
+            mode: {
+                "windows": parse_working_hours(MODE_DEFAULTS[mode]["working-hours"]),
+                "days": set(range(7)),
+                "duration": 30.0,
+            }
+            for mode in ("morning", "lunch", "evening")
+        },
+        "jitter": DEFAULT_JITTER_MINUTES,
+        "max-concurrent": None,
+    }
+    clock = FakeClock(datetime(2025, 3, 3))
+
+    async def run_session(session: dict, wall_timeout: Optional[float]) -> dict:
+        await clock.sleep(20 * 60)
+        if session["account"] == "broken":
+            raise RuntimeError("session crashed")
+        return {"returncode": 0, "seconds": 20 * 60.0}
+
+    scheduler = Scheduler(schedule, logger, clock=clock, run_session=run_session, rng=random.Random(1))
+    results = asyncio.run(scheduler.run_day(clock.now().date()))
+
+    ran = sorted((r["account"], r["mode"], r["returncode"]) for r in results)
+    expected = [
+        ("alpha", "lunch", 0), ("alpha", "morning", 0), ("broken", "morning", 1),
+        ("gamma", "evening", 0), ("gamma", "morning", 0),
+    ]
+    if ran != expected:
+        print(f"FAIL expected {expected}, got {ran}")
+        return 1
+    if clock.now().hour < 17:
+        print(f"FAIL day stopped early at {clock.now():%H:%M}")
+        return 1
+    print("✓ A crashing session is recorded as failed and the rest of the day runs")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run GramAddict sessions on a schedule, one per device at a time")
+    parser.add_argument("--map", default=SCHEDULE_MAP, help="Schedule map of accounts, devices and mode overrides")
+    parser.add_argument("--plan", action="store_true", help="Print the planned sessions and exit")
+    parser.add_argument("--days", type=int, default=None, help="Days to plan (--plan, default 1) or run (default: forever)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed the random delays (reproducible plans)")
+    parser.add_argument("--max-concurrent", type=int, default=None, help="Maximum sessions running at once on this host")
+    parser.add_argument("--timeout", type=float, default=None, metavar="MINUTES", help="Terminate a session that runs longer than this")
+    parser.add_argument("--idle-timeout", type=float, default=None, metavar="MINUTES", help="Terminate a session that prints nothing for this long")
+    parser.add_argument("--use-worker", action="store_true", help="Run sessions in the warm worker started by 'runner.py worker', if it is running")
+    parser.add_argument("--self-test", action="store_true", help="Run a simulated day with a crashing session and exit")
+    args = parser.parse_args()
+
+    if args.self_test:
+        return self_test()
+
+    logger, _ = setup_logging("scheduler")
+    try:
+        schedule = load_schedule(args.map)
+    except (OSError, ValueError, yaml.YAMLError) as exc:
+        logger.error("Could not load schedule: %s", exc)
+        return 1
+    if not schedule["accounts"]:
+        logger.error("No accounts defined in %s", args.map)
+        return 1
+
+    scheduler = Scheduler(
+        schedule, logger,
+        rng=random.Random(args.seed),
+        max_concurrent=args.max_concurrent,
+        wall_timeout=args.timeout * 60 if args.timeout else None,
+        idle_timeout=args.idle_timeout * 60 if args.idle_timeout else None,
+        use_worker=args.use_worker,
+    )
+
+    if args.plan:
+        print_plan(scheduler, args.days or 1)
+        return 0
+
+    try:
+        asyncio.run(scheduler.run(args.days))
+    except KeyboardInterrupt:
+        logger.info("Scheduler stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
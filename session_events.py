@@ -0,0 +1,205 @@
+"""
+Structured events parsed from GramAddict's output as a session runs
+The runner writes them as JSON lines next to each text log, so analytics can
+read typed events instead of re-running regexes over raw logs
+"""
+import json
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+from log_rotation import LOG_MAX_BYTES, open_log, rotate_file
+
+# GramAddict colours its console output
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+
+EVENT_PATTERN = re.compile(
+    r"(?P<account_info>Hello, @(?P<account>[\w.]+)! You have (?P<followers>\d+) followers"
+    r" and (?P<followings>\d+) followings)"
+    r"|(?P<interaction_start>@(?P<user>[\w.]+): interact)"
+    r"|(?P<filter_rejected>(?P<reason>Private|Empty|Business) account\.)"
+    r"|(?P<follow>Followed @(?P<followed_user>[\w.]+))"
+    r"|(?P<progress>Session progress: (?P<likes>\d+) likes, (?P<watched>\d+) watched,"
+    r" (?P<commented>\d+) commented, (?P<pm_sent>\d+) PM sent, (?P<followed>\d+) followed)"
+    r"|(?P<summary_start>\bTOTAL\s*$)"
+)
+
+# Lines without any of these substrings cannot produce an event
+EVENT_HINTS = (b"Hello, @", b": interact", b" account.", b"Followed @", b"Session progress", b"TOTAL")
+
+# Lines of the end-of-run TOTAL block and the summary keys they fill
+SUMMARY_PATTERN = re.compile(
+    r"(?P<key>Completed sessions|Total duration|Total interactions|Successful interactions"
+    r"|Total followed|Total likes|Total comments|Total PM sent|Total watched|Total unfollowed)"
+    r": (?P<value>.*)$"
+)
+SUMMARY_KEYS = {
+    "Completed sessions": "completed_sessions",
+    "Total duration": "duration_seconds",
+    "Total interactions": "interactions",
+    "Successful interactions": "successful_interactions",
+    "Total followed": "followed",
+    "Total likes": "likes",
+    "Total comments": "comments",
+    "Total PM sent": "pm_sent",
+    "Total watched": "watched",
+    "Total unfollowed": "unfollowed",
+}
+
+
+def events_path_for(log_path) -> Path:
+    """Event file written alongside a runner text log"""
+    log_path = Path(log_path)
+    return log_path.with_name(f"{log_path.stem}.events.jsonl")
+
+
+def parse_summary_value(key: str, value: str) -> int:
+    """'(8) 8 for #fastapi' -> 8, '0:07:26' -> 446 seconds"""
+    if key == "duration_seconds":
+        seconds = 0
+        for part in value.strip().split(":"):
+            seconds = seconds * 60 + int(float(part))
+        return seconds
+
+    match = re.search(r"\d+", value)
+    return int(match.group()) if match else 0
+
+
+class SessionEventWriter:
+    """
+    Turn a child's raw output into typed events in a JSON-lines file
+
+    feed() accepts arbitrary byte chunks, so it can sit directly behind the
+    output pump; partial lines are held until their newline arrives.
+    """
+
+    def __init__(self, path, account: Optional[str] = None, mode: Optional[str] = None):
+        self.path = Path(path)
+        self.account = account
+        self.mode = mode
+        self.counts = {}
+        self._partial = b""
+        self._pending = []
+        self._user = None
+        self._progress = None
+        self._summary = None
+        self._sink = None
+
+    def open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Event files are only appended per run, so rotate between runs
+        if self.path.exists() and self.path.stat().st_size > LOG_MAX_BYTES:
+            rotate_file(str(self.path))
+        self._sink = open(self.path, "ab")
+        self.emit("session_start", mode=self.mode)
+
+    def emit(self, event_type: str, **fields):
+        """Queue one event; it reaches the file on the next flush()"""
+        event = {"ts": round(time.time(), 3), "type": event_type, "account": self.account}
+        event.update(fields)
+        self.counts[event_type] = self.counts.get(event_type, 0) + 1
+        self._pending.append(json.dumps(event, separators=(",", ":")))
+
+    def feed(self, chunk: bytes):
+        """Parse every complete line in chunk"""
+        lines = (self._partial + chunk).split(b"\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._parse_line(line)
+
+    def _parse_line(self, line: bytes):
+        if self._summary is not None:
+            match = SUMMARY_PATTERN.search(ANSI_ESCAPE.sub("", line.decode("utf-8", errors="replace")))
+            if match:
+                key = SUMMARY_KEYS[match.group("key")]
+                self._summary[key] = parse_summary_value(key, match.group("value"))
+                return
+            if self._summary:
+                self._finish_summary()
+
+        if not any(hint in line for hint in EVENT_HINTS):
+            return
+
+        match = EVENT_PATTERN.search(ANSI_ESCAPE.sub("", line.decode("utf-8", errors="replace")))
+        if not match:
+            return
+
+        kind = match.lastgroup
+        if kind == "account_info":
+            self.account = match.group("account")
+            self.emit(
+                "account_info",
+                followers=int(match.group("followers")),
+                followings=int(match.group("followings")),
+            )
+        elif kind == "interaction_start":
+            self._user = match.group("user")
+            self.emit("interaction_start", user=self._user)
+        elif kind == "filter_rejected":
+            self.emit("filter_rejected", user=self._user, reason=match.group("reason").lower())
+        elif kind == "follow":
+            self.emit("follow", user=match.group("followed_user"))
+        elif kind == "progress":
+            # GramAddict does not log each like, but reports running totals
+            # after every interaction; the increase is what this user got
+            likes = int(match.group("likes"))
+            previous = self._progress if self._progress is not None and self._progress <= likes else 0
+            if likes > previous:
+                self.emit("like", user=self._user, count=likes - previous)
+            self._progress = likes
+        elif kind == "summary_start":
+            self._summary = {}
+
+    def _finish_summary(self):
+        self.emit("session_summary", **self._summary)
+        self._summary = None
+        self._progress = None
+
+    def flush(self):
+        if self._pending and self._sink is not None:
+            self._sink.write(("\n".join(self._pending) + "\n").encode("utf-8"))
+            self._sink.flush()
+        self._pending.clear()
+
+    def close(self, returncode: Optional[int] = None, reason: Optional[str] = None):
+        """Parse any unterminated last line, record how the run ended and close the file"""
+        if self._partial:
+            self._parse_line(self._partial)
+            self._partial = b""
+        if self._summary:
+            self._finish_summary()
+        self.emit("session_end", returncode=returncode, reason=reason)
+        self.flush()
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+
+def iter_events(paths, account: Optional[str] = None, types: Optional[set] = None):
+    """
+    Yield events from JSON-lines event files
+
+    Args:
+        paths: Event files (plain or rotated .gz), read in the order given
+        account: Only yield events recorded for this account
+        types: Only yield these event types
+    """
+    for path in paths:
+        try:
+            f = open_log(path)
+        except FileNotFoundError:
+            continue
+        with f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn last line of a file still being written
+                if account is not None and event.get("account") != account:
+                    continue
+                if types is not None and event.get("type") not in types:
+                    continue
+                yield event
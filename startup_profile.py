@@ -0,0 +1,95 @@
+"""
+Opt-in startup profiling for the runner and tools (--profile-startup)
+Import this module before anything else: when the flag is on the command
+line it times each top-level import the script makes and every pre-flight
+step, up to the moment the GramAddict child is launched
+"""
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+STARTED = time.perf_counter()
+ENABLED = "--profile-startup" in sys.argv
+PROFILE_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "startup_profile.jsonl")
+
+_records = []
+_reported = False
+_original_import = builtins.__import__
+_import_depth = threading.local()
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Only the outermost import is recorded, so each entry is the inclusive
+    # cost of one import statement in the script or its own modules
+    if level or name in sys.modules or threading.current_thread() is not threading.main_thread():
+        return _original_import(name, globals, locals, fromlist, level)
+
+    depth = getattr(_import_depth, "value", 0)
+    _import_depth.value = depth + 1
+    started = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _import_depth.value = depth
+        if depth == 0:
+            _records.append(("import", name, time.perf_counter() - started))
+
+
+if ENABLED:
+    builtins.__import__ = _timed_import
+
+
+@contextmanager
+def step(label: str):
+    """Time one pre-flight step (a no-op unless profiling is enabled)"""
+    if not ENABLED or _reported:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _records.append(("step", label, time.perf_counter() - started))
+
+
+def mark(label: str = "child launched"):
+    """
+    Stop profiling, print the report and append it to logs/startup_profile.jsonl
+
+    Called once the script reaches its real work (normally right after the
+    GramAddict child is spawned); later calls are ignored.
+    """
+    global _reported
+    if not ENABLED or _reported:
+        return
+    _reported = True
+    builtins.__import__ = _original_import
+
+    total = time.perf_counter() - STARTED
+    script = os.path.basename(sys.argv[0])
+
+    print(f"\n⏱  Startup profile ({script}): {label} after {total * 1000:.1f} ms", file=sys.stderr)
+    for kind, name, seconds in sorted(_records, key=lambda record: record[2], reverse=True):
+        print(f"  {seconds * 1000:8.1f} ms  {kind:<6} {name}", file=sys.stderr)
+    sys.stderr.flush()
+
+    entry = {
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "script": script,
+        "label": label,
+        "total_ms": round(total * 1000, 1),
+        "imports_ms": {name: round(seconds * 1000, 1) for kind, name, seconds in _records if kind == "import"},
+        "steps_ms": {name: round(seconds * 1000, 1) for kind, name, seconds in _records if kind == "step"},
+    }
+    try:
+        os.makedirs(os.path.dirname(PROFILE_LOG), exist_ok=True)
+        with open(PROFILE_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"  (could not record profile: {e})", file=sys.stderr)
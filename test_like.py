@@ -1,3 +1,5 @@
+import startup_profile  # First, so --profile-startup can time the imports below
+
 import os
 import sys
 import subprocess
@@ -6,6 +8,8 @@ import logging
 import argparse
 from dotenv import load_dotenv
 from device_manager import DeviceManager, load_device_from_env
+from crash_archive import CrashArchive
+from gramaddict_launcher import find_executable, get_help, get_version
 
 # Enhanced test runner for Instagram bot
 # - Supports both USB (physical) and network (MEmu) devices
@@ -17,8 +21,11 @@ from device_manager import DeviceManager, load_device_from_env
 #   python test_like.py --device fbc9d1f30eb2     # Specific USB device
 #   python test_like.py --device 127.0.0.1:21533  # MEmu emulator
 #   python test_like.py --account A               # Uses DEVICE_A from .env
+#   python test_like.py --capture-help            # Also log `gramaddict --help` output
+#   python test_like.py --profile-startup         # Report startup costs
 
-load_dotenv()
+with startup_profile.step("load .env"):
+    load_dotenv()
 
 ROOT = os.path.abspath(os.path.dirname(__file__))
 os.chdir(ROOT)
@@ -27,6 +34,8 @@ os.chdir(ROOT)
 parser = argparse.ArgumentParser(description="Run Instagram bot test session")
 parser.add_argument("--device", help="Device ID (USB or network IP:port)", default=None)
 parser.add_argument("--account", help="Account suffix for multi-account (_A, _B, etc.)", default="")
+parser.add_argument("--capture-help", action="store_true", help="Append `gramaddict --help` and `run --help` output to the log")
+parser.add_argument("--profile-startup", action="store_true", help="Report import and pre-flight costs up to launching GramAddict")
 args = parser.parse_args()
 
 # Configuration
@@ -126,7 +135,9 @@ logging.info("Config content:\n%s", masked)
 logging.info("Checking ADB connection...")
 
 # Check if ADB is available
-if not DeviceManager.check_adb_available():
+with startup_profile.step("check adb"):
+    adb_available = DeviceManager.check_adb_available()
+if not adb_available:
     logging.error("adb not found in PATH. Ensure ADB is installed.")
     sys.exit(1)
 
@@ -134,7 +145,9 @@ if not DeviceManager.check_adb_available():
 dm = DeviceManager(DEVICE)
 logging.info(f"Device: {DEVICE} (type: {dm.device_type})")
 
-if not dm.ensure_connected(logging):
+with startup_profile.step("connect device"):
+    connected = dm.ensure_connected(logging)
+if not connected:
     logging.error(f"Failed to connect to device {DEVICE}")
 
     # List available devices
@@ -150,10 +163,10 @@ if not dm.ensure_connected(logging):
 
 logging.info(f"[OK] Device {DEVICE} is ready")
 
-# Locate GramAddict CLI in the local venv
-gramaddict_exe = os.path.join(ROOT, ".venv", "Scripts", "gramaddict.exe")
-if not os.path.exists(gramaddict_exe):
-    logging.error("gramaddict CLI not found at %s. Activate .venv or adjust path.", gramaddict_exe)
+# Locate GramAddict CLI in the local venv (Windows or Linux layout, or GRAMADDICT_EXECUTABLE)
+gramaddict_exe = find_executable()
+if not gramaddict_exe:
+    logging.error("gramaddict CLI not found in .venv. Activate .venv or set GRAMADDICT_EXECUTABLE.")
     sys.exit(1)
 
 # Ensure sitecustomize from project root is available to the subprocess
@@ -170,23 +183,18 @@ abs_config = os.path.abspath(CONFIG_PATH)
 # debug mode (and environment variables) instead of passing `-vv`.
 cmd = [gramaddict_exe, "run", "--config", abs_config]
 logging.info("Running: %s", " ".join(cmd))
-# Capture help output to diagnose CLI flags
-try:
-    help_proc = subprocess.run([gramaddict_exe, "--help"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=env)
-    with open(log_file, "a", encoding="utf-8") as lf:
-        lf.write("\n--- gramaddict --help ---\n")
-        lf.write(help_proc.stdout or "")
-except Exception:
-    logging.debug("Failed to capture 'gramaddict --help' output")
-
-try:
-    help_proc2 = subprocess.run([gramaddict_exe, "run", "--help"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=env)
-    with open(log_file, "a", encoding="utf-8") as lf:
-        lf.write("\n--- gramaddict run --help ---\n")
-        lf.write(help_proc2.stdout or "")
-except Exception:
-    logging.debug("Failed to capture 'gramaddict run --help' output")
-
+# Capture help output to diagnose CLI flags (opt-in; cached per GramAddict install,
+# so only the first capture after an install or upgrade spawns GramAddict)
+if args.capture_help:
+    with startup_profile.step("capture help"):
+        with open(log_file, "a", encoding="utf-8") as lf:
+            lf.write("\n--- gramaddict version: %s ---\n" % get_version(env))
+            lf.write("\n--- gramaddict --help ---\n")
+            lf.write(get_help(env=env) or "")
+            lf.write("\n--- gramaddict run --help ---\n")
+            lf.write(get_help("run", env) or "")
+
+startup_profile.mark("child launched")
 proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=env)
 
 # Append run output to log file with timestamp
@@ -204,10 +212,17 @@ else:
     if proc.stdout:
         tail = "\n".join(proc.stdout.splitlines()[-60:])
         logging.error("--- Last output lines ---\n%s", tail)
-    # If GramAddict produced a crash zip, mention it
-    crashes_dir = os.path.join(ROOT, "crashes", "latest")
+    # If GramAddict produced a crash zip, archive it and say whether it is a known crash
+    crashes_dir = os.path.join(ROOT, "crashes")
     if os.path.isdir(crashes_dir):
-        logging.info("Crash artifacts (if any) available in: %s", crashes_dir)
+        archive = CrashArchive()
+        for crash in archive.ingest_all():
+            logging.info(
+                "Archived crash #%s (%s): %s at %s; %s crashes with signature %s in the last 7 days",
+                crash["id"], crash["source"], crash["exception"] or "no traceback", crash["top_frame"],
+                archive.count_signature(crash["signature"]), crash["signature"],
+            )
+        logging.info("Crash history: python crash_archive.py stats")
     sys.exit(proc.returncode)
 
 if __name__ == '__main__':